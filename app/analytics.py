@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import base64
+import json
+import sqlite3
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .database import get_connection
+from .cache import read_data_version
+from .config import get_settings
+from .database import average_sql, get_connection, get_pool
+
+EXPORT_BATCH_SIZE = 500
 
 DATE_FORMATS: Tuple[str, ...] = (
     "%Y-%m-%d",
@@ -13,6 +21,7 @@ DATE_FORMATS: Tuple[str, ...] = (
 )
 
 
+@lru_cache(maxsize=256)
 def _parse_date(value: Optional[str]) -> Optional[str]:
     if not value:
         return None
@@ -25,15 +34,42 @@ def _parse_date(value: Optional[str]) -> Optional[str]:
     raise ValueError(f"Unsupported date format: {value}")
 
 
-def _apply_date_filters(base_query: str, start: Optional[str], end: Optional[str]) -> Tuple[str, List[Any]]:
+def cache_key(name: str, **filters: Any) -> Tuple[Any, ...]:
+    """Return a hashable key for ``name`` with its filters normalised.
+
+    Dates are reduced to their parsed form so equivalent spellings share an
+    entry; invalid dates raise ``ValueError`` like the fetch functions do.
+    """
+
+    normalised = []
+    for field, value in sorted(filters.items()):
+        if field in ("start_date", "end_date"):
+            value = _parse_date(value)
+        normalised.append((field, value))
+    return (name, *normalised)
+
+
+def data_version() -> int:
+    """Return the counter bumped by every write to the analytics tables."""
+
+    with get_connection() as conn:
+        return read_data_version(conn)
+
+
+def _date_window(column: str, start: Optional[str], end: Optional[str]) -> Tuple[List[str], List[Any]]:
     conditions: List[str] = []
     params: List[Any] = []
     if start:
-        conditions.append("last_activity_at >= ?")
+        conditions.append(f"{column} >= ?")
         params.append(_parse_date(start))
     if end:
-        conditions.append("last_activity_at <= ?")
+        conditions.append(f"{column} <= ?")
         params.append(_parse_date(end))
+    return conditions, params
+
+
+def _apply_date_filters(base_query: str, start: Optional[str], end: Optional[str]) -> Tuple[str, List[Any]]:
+    conditions, params = _date_window("last_activity_at", start, end)
     if conditions:
         connector = " AND "
         clause = " WHERE " + connector.join(conditions)
@@ -52,60 +88,190 @@ def _fetch_all(query: str, params: Iterable[Any]) -> List[Dict[str, Any]]:
     return [dict(zip(columns, row)) for row in rows]
 
 
-def fetch_course_progress(course_id: Optional[int] = None, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
-    query = "SELECT * FROM course_progress_view"
-    params: List[Any] = []
-    clauses: List[str] = []
+def _iter_batches(query: str, params: Iterable[Any], batch_size: int) -> Iterator[Tuple[List[str], List[sqlite3.Row]]]:
+    """Yield ``(columns, rows)`` batches from a live cursor.
+
+    The pooled connection is checked out lazily and returned once the
+    generator is exhausted or closed. Consumers such as ``StreamingResponse``
+    may resume the generator from different worker threads, so the checkout
+    bypasses the pool's per-thread reuse.
+    """
+
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        cursor = conn.execute(query, tuple(params))
+        columns = [col[0] for col in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield columns, rows
+    finally:
+        pool.release(conn)
+
+
+# Aggregates computed over the progress rows inside a date window; the column
+# names and order match course/group_progress_rollup_view.
+_WINDOW_AGGREGATES = f"""
+    COUNT(DISTINCT lcp.learner_id) AS total_learners,
+    SUM(CASE WHEN lcp.status = 'completed' THEN 1 ELSE 0 END) AS completed_learners,
+    SUM(CASE WHEN lcp.status = 'in_progress' THEN 1 ELSE 0 END) AS in_progress_learners,
+    SUM(CASE WHEN lcp.status = 'not_started' THEN 1 ELSE 0 END) AS not_started_learners,
+    SUM(CASE WHEN lcp.status = 'stalled' THEN 1 ELSE 0 END) AS stalled_learners,
+    {average_sql("AVG(lcp.progress_percent)")} AS average_progress_percent,
+    {average_sql("AVG(lcp.score)")} AS average_score,
+    MAX(lcp.last_activity_at) AS last_activity_at
+"""
+
+
+def _course_progress_query(
+    course_id: Optional[int],
+    start_date: Optional[str],
+    end_date: Optional[str],
+) -> Tuple[str, List[Any]]:
+    """Build the course aggregate query.
+
+    Without a date window the incrementally maintained rollup answers in
+    O(courses). With one, the window and course predicates are applied to
+    ``learner_course_progress`` rows before grouping, so only progress with
+    activity inside the window is counted and the cost follows the window.
+    """
+
+    window, params = _date_window("lcp.last_activity_at", start_date, end_date)
+    if not window:
+        query = "SELECT * FROM course_progress_rollup_view"
+        if course_id is not None:
+            query += " WHERE course_id = ?"
+            params.append(course_id)
+        return query + " ORDER BY course_title", params
 
     if course_id is not None:
-        clauses.append("course_id = ?")
+        window.append("lcp.course_id = ?")
         params.append(course_id)
+    query = f"""
+        SELECT
+            c.id AS course_id,
+            c.title AS course_title,
+            c.category AS course_category,
+            c.created_at AS course_created_at,{_WINDOW_AGGREGATES}
+        FROM learner_course_progress lcp
+        JOIN courses c ON c.id = lcp.course_id
+        WHERE {" AND ".join(window)}
+        GROUP BY c.id
+        ORDER BY course_title
+    """
+    return query, params
 
-    if clauses:
-        query += " WHERE " + " AND ".join(clauses)
-
-    query, date_params = _apply_date_filters(query, start_date, end_date)
-    params.extend(date_params)
 
-    query += " ORDER BY course_title"
-    return _fetch_all(query, params)
+def _group_progress_query(
+    course_id: Optional[int],
+    group_id: Optional[int],
+    start_date: Optional[str],
+    end_date: Optional[str],
+) -> Tuple[str, List[Any]]:
+    """Build the group aggregate query; see :func:`_course_progress_query`.
 
+    In a date window ``total_learners`` counts the members with activity in
+    the window rather than the whole membership.
+    """
 
-def fetch_group_progress(
-    course_id: Optional[int] = None,
-    group_id: Optional[int] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-) -> List[Dict[str, Any]]:
-    query = "SELECT * FROM group_progress_view"
-    params: List[Any] = []
-    clauses: List[str] = []
+    window, params = _date_window("lcp.last_activity_at", start_date, end_date)
+    if not window:
+        query = "SELECT * FROM group_progress_rollup_view"
+        clauses: List[str] = []
+        if course_id is not None:
+            clauses.append("course_id = ?")
+            params.append(course_id)
+        if group_id is not None:
+            clauses.append("group_id = ?")
+            params.append(group_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        return query + " ORDER BY group_name", params
 
     if course_id is not None:
-        clauses.append("course_id = ?")
+        window.append("g.course_id = ?")
         params.append(course_id)
     if group_id is not None:
-        clauses.append("group_id = ?")
+        window.append("gm.group_id = ?")
         params.append(group_id)
+    query = f"""
+        SELECT
+            g.id AS group_id,
+            g.name AS group_name,
+            g.course_id,
+            c.title AS course_title,
+            c.category AS course_category,{_WINDOW_AGGREGATES}
+        FROM learner_course_progress lcp
+        JOIN group_memberships gm ON gm.learner_id = lcp.learner_id
+        JOIN groups g ON g.id = gm.group_id AND g.course_id = lcp.course_id
+        JOIN courses c ON c.id = g.course_id
+        WHERE {" AND ".join(window)}
+        GROUP BY g.id
+        ORDER BY group_name
+    """
+    return query, params
 
-    if clauses:
-        query += " WHERE " + " AND ".join(clauses)
 
-    query, date_params = _apply_date_filters(query, start_date, end_date)
-    params.extend(date_params)
+def _columnar_snapshot() -> Any:
+    """Return the columnar snapshot when ``ANALYTICS_BACKEND=columnar``, else None."""
 
-    query += " ORDER BY group_name"
-    return _fetch_all(query, params)
+    if get_settings().analytics_backend != "columnar":
+        return None
+    from .columnar import get_snapshot
 
+    return get_snapshot()
 
-def fetch_learner_progress(
+
+def fetch_course_progress(course_id: Optional[int] = None, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+    snapshot = _columnar_snapshot()
+    if snapshot is not None:
+        return snapshot.course_progress(course_id, start_date, end_date)
+    return _fetch_all(*_course_progress_query(course_id, start_date, end_date))
+
+
+def iter_course_progress(
+    course_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Tuple[List[str], List[sqlite3.Row]]]:
+    query, params = _course_progress_query(course_id, start_date, end_date)
+    return _iter_batches(query, params, batch_size)
+
+
+def fetch_group_progress(
     course_id: Optional[int] = None,
     group_id: Optional[int] = None,
-    learner_id: Optional[int] = None,
-    status: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
+    snapshot = _columnar_snapshot()
+    if snapshot is not None:
+        return snapshot.group_progress(course_id, group_id, start_date, end_date)
+    return _fetch_all(*_group_progress_query(course_id, group_id, start_date, end_date))
+
+
+def iter_group_progress(
+    course_id: Optional[int] = None,
+    group_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Tuple[List[str], List[sqlite3.Row]]]:
+    query, params = _group_progress_query(course_id, group_id, start_date, end_date)
+    return _iter_batches(query, params, batch_size)
+
+
+def _learner_progress_query(
+    course_id: Optional[int],
+    group_id: Optional[int],
+    learner_id: Optional[int],
+    status: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+) -> Tuple[str, List[Any]]:
     query = "SELECT * FROM learner_progress_view"
     params: List[Any] = []
     clauses: List[str] = []
@@ -114,8 +280,11 @@ def fetch_learner_progress(
         clauses.append("course_id = ?")
         params.append(course_id)
     if group_id is not None:
+        # The view reaches groups through a LEFT JOIN the planner cannot
+        # reorder; the membership subquery lets it start from the group.
+        clauses.append("learner_id IN (SELECT learner_id FROM group_memberships WHERE group_id = ?)")
         clauses.append("group_id = ?")
-        params.append(group_id)
+        params.extend([group_id, group_id])
     if learner_id is not None:
         clauses.append("learner_id = ?")
         params.append(learner_id)
@@ -128,13 +297,182 @@ def fetch_learner_progress(
 
     query, date_params = _apply_date_filters(query, start_date, end_date)
     params.extend(date_params)
+    return query, params
+
 
+def fetch_learner_progress(
+    course_id: Optional[int] = None,
+    group_id: Optional[int] = None,
+    learner_id: Optional[int] = None,
+    status: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    query, params = _learner_progress_query(course_id, group_id, learner_id, status, start_date, end_date)
     query += " ORDER BY last_activity_at DESC"
     return _fetch_all(query, params)
 
 
+def iter_learner_progress(
+    course_id: Optional[int] = None,
+    group_id: Optional[int] = None,
+    learner_id: Optional[int] = None,
+    status: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Tuple[List[str], List[sqlite3.Row]]]:
+    """Stream learner progress in ``batch_size`` chunks for exports.
+
+    Query construction (and therefore date validation) happens eagerly so
+    callers can reject bad filters before the first row is sent.
+    """
+
+    query, params = _learner_progress_query(course_id, group_id, learner_id, status, start_date, end_date)
+    query += " ORDER BY last_activity_at DESC"
+    return _iter_batches(query, params, batch_size)
+
+
+# learner_progress_view yields one row per group membership, so the group is
+# the final tie-break after (last_activity_at, learner_id, course_id).
+_LEARNER_KEYSET = "(last_activity_at, learner_id, course_id, COALESCE(group_id, 0))"
+_LEARNER_KEYSET_ORDER = " ORDER BY last_activity_at DESC, learner_id DESC, course_id DESC, COALESCE(group_id, 0) DESC"
+
+
+def _encode_cursor(row: Dict[str, Any]) -> str:
+    key = [row["last_activity_at"], row["learner_id"], row["course_id"], row["group_id"] or 0]
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid pagination cursor") from exc
+    if not isinstance(key, list) or len(key) != 4:
+        raise ValueError("Invalid pagination cursor")
+    last_activity_at, *ids = key
+    if not (last_activity_at is None or isinstance(last_activity_at, str)):
+        raise ValueError("Invalid pagination cursor")
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in ids):
+        raise ValueError("Invalid pagination cursor")
+    return key
+
+
+def _learner_progress_page_query(
+    course_id: Optional[int],
+    group_id: Optional[int],
+    learner_id: Optional[int],
+    status: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    limit: int,
+    cursor: Optional[str],
+) -> Tuple[str, List[Any]]:
+    query, params = _learner_progress_query(course_id, group_id, learner_id, status, start_date, end_date)
+    if cursor:
+        connector = " AND " if " WHERE " in query.upper() else " WHERE "
+        query += f"{connector}{_LEARNER_KEYSET} < (?, ?, ?, ?)"
+        params.extend(_decode_cursor(cursor))
+    query += _LEARNER_KEYSET_ORDER + " LIMIT ?"
+    # One extra row tells whether another page follows.
+    params.append(limit + 1)
+    return query, params
+
+
+def fetch_learner_progress_page(
+    course_id: Optional[int] = None,
+    group_id: Optional[int] = None,
+    learner_id: Optional[int] = None,
+    status: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Return one keyset-paginated page of learner progress.
+
+    Rows are ordered newest activity first; ``next_cursor`` is an opaque token
+    for the following page, or ``None`` once the result set is exhausted.
+    Every page is a bounded index range scan, however deep it is.
+    """
+
+    query, params = _learner_progress_page_query(
+        course_id, group_id, learner_id, status, start_date, end_date, limit, cursor
+    )
+    rows = _fetch_all(query, params)
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+
+DASHBOARD_SECTIONS: Tuple[str, ...] = ("course", "group", "learner")
+
+
+def fetch_dashboard(
+    sections: Iterable[str] = DASHBOARD_SECTIONS,
+    course_id: Optional[int] = None,
+    group_id: Optional[int] = None,
+    learner_id: Optional[int] = None,
+    status: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Return the requested dashboard sections from one consistent snapshot.
+
+    All sections are read on a single pooled connection inside one read
+    transaction, so the course, group and learner numbers agree even while
+    progress is being written.
+    """
+
+    requested = set(sections)
+    unknown = requested - set(DASHBOARD_SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown dashboard sections: {', '.join(sorted(unknown))}")
+
+    start_date = _parse_date(start_date)
+    end_date = _parse_date(end_date)
+
+    payload: Dict[str, Any] = {}
+    # The fetch helpers below re-enter get_connection() on this thread and so
+    # share this connection and its transaction.
+    with get_connection() as conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        if "course" in requested:
+            payload["course_progress"] = fetch_course_progress(
+                course_id=course_id, start_date=start_date, end_date=end_date
+            )
+        if "group" in requested:
+            payload["group_progress"] = fetch_group_progress(
+                course_id=course_id, group_id=group_id, start_date=start_date, end_date=end_date
+            )
+        if "learner" in requested:
+            payload["learner_progress"] = fetch_learner_progress_page(
+                course_id=course_id,
+                group_id=group_id,
+                learner_id=learner_id,
+                status=status,
+                start_date=start_date,
+                end_date=end_date,
+                limit=limit,
+                cursor=cursor,
+            )
+    return payload
+
+
 __all__ = [
+    "DASHBOARD_SECTIONS",
+    "cache_key",
+    "data_version",
     "fetch_course_progress",
+    "fetch_dashboard",
     "fetch_group_progress",
     "fetch_learner_progress",
+    "fetch_learner_progress_page",
+    "iter_course_progress",
+    "iter_group_progress",
+    "iter_learner_progress",
 ]
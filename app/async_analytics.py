@@ -0,0 +1,171 @@
+"""Async access to the analytics queries with request coalescing.
+
+Blocking SQLite work runs on a dedicated, bounded thread pool instead of the
+Starlette threadpool, and identical in-flight requests (same function, same
+normalised filters) are coalesced so only one of them hits the database while
+every caller receives its result.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from . import analytics
+from .cache import CachedResponse, get_response_cache
+from .config import get_settings
+
+T = TypeVar("T")
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when the database executor queue is full."""
+
+
+class DatabaseExecutor:
+    """Bounded thread pool dedicated to blocking database calls."""
+
+    def __init__(self, max_workers: int, max_queue: int) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analytics-db")
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._peak_queued = 0
+
+    def _run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            if self._queued >= self._max_queue:
+                self._rejected += 1
+                raise ExecutorBusyError("Analytics database executor is saturated")
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+        try:
+            future = self._pool.submit(self._run, fn, *args, **kwargs)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            raise
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self._max_workers,
+                "max_queue": self._max_queue,
+                "queue_depth": self._queued,
+                "peak_queue_depth": self._peak_queued,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution."""
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Future[Any]] = {}
+        self._calls = 0
+        self._executions = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        self._calls += 1
+        future = self._inflight.get(key)
+        if future is None:
+            self._executions += 1
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller disconnecting does not cancel the shared work.
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        coalesced = self._calls - self._executions
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self._calls,
+            "executions": self._executions,
+            "coalesced": coalesced,
+            "coalescing_ratio": round(coalesced / self._calls, 4) if self._calls else 0.0,
+        }
+
+
+_executor: DatabaseExecutor | None = None
+_executor_lock = threading.Lock()
+_single_flight = SingleFlight()
+
+
+def get_executor() -> DatabaseExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                settings = get_settings()
+                _executor = DatabaseExecutor(settings.analytics_db_workers, settings.analytics_db_max_queue)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+async def data_version() -> int:
+    # Not coalesced: a caller joining an older in-flight read could miss a
+    # write that committed before its own request arrived.
+    return await get_executor().run(analytics.data_version)
+
+
+async def cached_response(name: str, version: int, build: Callable[[], Any], **filters: Any) -> CachedResponse:
+    """Return the cached JSON body for ``name``/``filters`` at ``version``.
+
+    A miss is built once on the DB executor however many requests are
+    waiting for the same key and version.
+    """
+
+    cache = get_response_cache()
+    key = analytics.cache_key(name, **filters)
+    entry = cache.get(key, version)
+    if entry is not None:
+        return entry
+    return await _single_flight.do(
+        (key, version), lambda: get_executor().run(cache.build, key, version, build)
+    )
+
+
+def executor_stats() -> Dict[str, Any]:
+    return {"executor": get_executor().stats(), "single_flight": _single_flight.stats()}
+
+
+__all__ = [
+    "DatabaseExecutor",
+    "ExecutorBusyError",
+    "SingleFlight",
+    "cached_response",
+    "data_version",
+    "executor_stats",
+    "get_executor",
+    "shutdown_executor",
+]
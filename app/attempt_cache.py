@@ -0,0 +1,156 @@
+"""In-process cache of SCORM attempt tokens.
+
+Every runtime request (content, commit, resume) carries an attempt token that
+has to be checked against ``scorm_attempts``. :class:`AttemptCache` keeps what
+that check needs (attempt id, package, object prefix and expiry) per token in
+a bounded LRU, so a busy attempt costs one database read rather than one per
+request. Launches fill it as they create attempts; other tokens are loaded on
+first use.
+
+Attempt rows do not change once written, so positive entries stay valid
+until evicted, and expiry is decided from the cached ``expires_at``.
+
+An attempt launched through another worker may not have a row yet: rows are
+written behind, within ``SCORM_ATTEMPT_FLUSH_SECONDS``. Tokens are therefore
+self-verifying (see :class:`AttemptTokenSigner`): they carry the package and
+expiry under an HMAC, so any worker can accept one without the row. Only
+tokens that fail that check are cached as unknown, for
+``SCORM_ATTEMPT_CACHE_NEGATIVE_TTL_SECONDS``.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class CachedAttempt:
+    # None while the attempt row is still queued for writing.
+    attempt_id: int | None
+    package_id: int
+    object_prefix: str
+    expires_at: datetime
+
+    def expired(self, now: datetime | None = None) -> bool:
+        return self.expires_at <= (now or datetime.utcnow())
+
+
+class AttemptTokenSigner:
+    """Issue and check ``<nonce>.<package id>.<expiry>.<mac>`` attempt tokens.
+
+    The package id and the expiry (Unix seconds) are hexadecimal; the MAC is
+    the first 128 bits of an HMAC-SHA256 over the rest of the token.
+    """
+
+    def __init__(self, key: bytes) -> None:
+        self._key = key
+
+    def _mac(self, claims: str) -> str:
+        return hmac.new(self._key, claims.encode("ascii"), hashlib.sha256).hexdigest()[:32]
+
+    def issue(self, package_id: int, expires_at: datetime) -> str:
+        expires = int(expires_at.replace(tzinfo=timezone.utc).timestamp())
+        claims = f"{secrets.token_hex(8)}.{package_id:x}.{expires:x}"
+        return f"{claims}.{self._mac(claims)}"
+
+    def verify(self, token: str) -> Tuple[int, datetime] | None:
+        """Return ``(package_id, expires_at)`` if ``token`` was issued with this key."""
+
+        claims, _, mac = token.rpartition(".")
+        parts = claims.split(".")
+        if len(parts) != 3 or not hmac.compare_digest(self._mac(claims), mac):
+            return None
+        try:
+            package_id, expires = int(parts[1], 16), int(parts[2], 16)
+        except ValueError:
+            return None
+        return package_id, datetime.fromtimestamp(expires, timezone.utc).replace(tzinfo=None)
+
+
+class AttemptCache:
+    """LRU of attempt tokens with short-lived negative entries."""
+
+    def __init__(self, max_entries: int, negative_ttl: float) -> None:
+        self._max_entries = max_entries
+        self._negative_ttl = negative_ttl
+        # token -> (attempt, or None if unknown; monotonic time a None entry lapses)
+        self._entries: "OrderedDict[str, Tuple[CachedAttempt | None, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._negative_expired = 0
+
+    def lookup(self, token: str, load: Callable[[str], CachedAttempt | None]) -> CachedAttempt | None:
+        """Return the cached attempt for ``token``, calling ``load`` on a miss."""
+
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                attempt, lapses_at = entry
+                if attempt is not None:
+                    self._entries.move_to_end(token)
+                    self._hits += 1
+                    return attempt
+                if time.monotonic() < lapses_at:
+                    self._negative_hits += 1
+                    return None
+                del self._entries[token]
+                self._negative_expired += 1
+            self._misses += 1
+
+        attempt = load(token)
+        if attempt is None:
+            self._put(token, None, time.monotonic() + self._negative_ttl)
+        else:
+            self.put(token, attempt)
+        return attempt
+
+    def put(self, token: str, attempt: CachedAttempt) -> None:
+        self._put(token, attempt, 0.0)
+
+    def _put(self, token: str, attempt: CachedAttempt | None, lapses_at: float) -> None:
+        with self._lock:
+            current = self._entries.get(token)
+            # A miss racing with the launch that creates the token must not
+            # replace the launch's entry with "unknown".
+            if attempt is None and current is not None and current[0] is not None:
+                return
+            self._entries[token] = (attempt, lapses_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def forget(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._negative_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._negative_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "negative_expired": self._negative_expired,
+            }
+
+
+__all__ = ["AttemptCache", "AttemptTokenSigner", "CachedAttempt"]
@@ -0,0 +1,119 @@
+"""Background removal of expired SCORM attempts.
+
+Every launch adds a ``scorm_attempts`` row; without a sweeper the table and
+its token index grow forever. :class:`AttemptSweeper` wakes every
+``SCORM_ATTEMPT_SWEEP_INTERVAL_SECONDS`` and removes attempts that expired
+more than ``SCORM_ATTEMPT_SWEEP_GRACE_SECONDS`` ago, in transactions of at
+most ``SCORM_ATTEMPT_SWEEP_BATCH_SIZE`` rows with a short pause between them
+so launches are never queued behind a long write. With
+``SCORM_ATTEMPT_ARCHIVE`` set, removed rows are copied to
+``scorm_attempts_archive`` for audit in the same transaction. The CMI
+state of removed attempts (``scorm_cmi_snapshots`` and ``scorm_cmi_log``)
+is deleted in that transaction as well; it is only needed to resume.
+
+The sweeper reports its throughput and the remaining backlog; a backlog that
+stays near zero while ``live_attempts`` levels off means the table has
+reached its steady-state size.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from .config import get_settings
+from .database import get_database
+from .workers import PeriodicWorker, SharedWorker
+
+logger = logging.getLogger(__name__)
+
+
+class AttemptSweeper(PeriodicWorker):
+    """Thread that deletes (or archives) expired attempts in small batches."""
+
+    def __init__(
+        self,
+        interval: float,
+        batch_size: int,
+        pause: float,
+        grace_seconds: float,
+        archive: bool,
+    ) -> None:
+        super().__init__(interval, name="scorm-attempt-sweeper", run_first=True)
+        self._batch_size = batch_size
+        self._pause = pause
+        self._grace = timedelta(seconds=grace_seconds)
+        self._archive = archive
+        self._swept_total = 0
+        self._backlog = 0
+        self._live_attempts = 0
+
+    def run_once(self) -> int:
+        return self.sweep()
+
+    def sweep(self) -> int:
+        """Sweep everything currently past the grace period; returns the number of rows removed."""
+
+        db = get_database()
+        cutoff = datetime.utcnow() - self._grace
+        started = time.perf_counter()
+        swept = batches = 0
+        while not self._stopped.is_set():
+            removed = db.sweep_expired_attempts(cutoff, self._batch_size, self._archive)
+            swept += removed
+            batches += 1 if removed else 0
+            if removed < self._batch_size:
+                break
+            # Let queued launch writes take the lock between batches.
+            self._stopped.wait(self._pause)
+        seconds = time.perf_counter() - started
+
+        backlog = db.count_expired_attempts(datetime.utcnow() - self._grace)
+        live = db.count_attempts()
+        with self._lock:
+            self._swept_total += swept
+            self._backlog = backlog
+            self._live_attempts = live
+            self._record_run(
+                swept=swept,
+                batches=batches,
+                seconds=round(seconds, 4),
+                rows_per_second=round(swept / seconds, 1) if seconds and swept else 0.0,
+            )
+        if swept:
+            logger.info("Swept %d expired SCORM attempts in %d batch(es), %.2fs; backlog %d", swept, batches, seconds, backlog)
+        return swept
+
+    def _stats(self) -> Dict[str, Any]:
+        return {
+            "archive": self._archive,
+            "swept_total": self._swept_total,
+            "backlog": self._backlog,
+            "live_attempts": self._live_attempts,
+        }
+
+
+def _new_sweeper() -> AttemptSweeper:
+    settings = get_settings()
+    return AttemptSweeper(
+        settings.scorm_attempt_sweep_interval_seconds,
+        settings.scorm_attempt_sweep_batch_size,
+        settings.scorm_attempt_sweep_pause_seconds,
+        settings.scorm_attempt_sweep_grace_seconds,
+        settings.scorm_attempt_archive,
+    )
+
+
+_sweeper = SharedWorker(_new_sweeper)
+
+
+def get_sweeper() -> AttemptSweeper:
+    return _sweeper.get()
+
+
+def stop_sweeper() -> None:
+    _sweeper.stop()
+
+
+__all__ = ["AttemptSweeper", "get_sweeper", "stop_sweeper"]
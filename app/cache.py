@@ -0,0 +1,178 @@
+"""Data-versioned response cache for the analytics endpoints.
+
+Every write to the tables the analytics read from bumps a single counter in
+``analytics_data_version`` (maintained by triggers, so it also sees writes
+from other processes). Cached responses are keyed on the normalised filter
+tuple and only served while the counter still matches the version they were
+built at. The ETag is derived from the same key and version, so a matching
+``If-None-Match`` can be answered without running the query at all.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List
+
+from .config import get_settings
+
+VERSIONED_TABLES = ("courses", "groups", "learners", "group_memberships", "learner_course_progress")
+
+
+def _version_triggers() -> List[str]:
+    statements = []
+    for table in VERSIONED_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            name = f"trg_{table}_data_version_{event.lower()}"
+            statements.append(f"DROP TRIGGER IF EXISTS {name};")
+            statements.append(
+                f"""
+                CREATE TRIGGER {name} AFTER {event} ON {table}
+                BEGIN
+                    UPDATE analytics_data_version SET version = version + 1 WHERE id = 1;
+                END;
+                """
+            )
+    return statements
+
+
+DATA_VERSION_STATEMENTS: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS analytics_data_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );
+    """,
+    "INSERT OR IGNORE INTO analytics_data_version (id, version) VALUES (1, 0);",
+    *_version_triggers(),
+]
+
+
+def read_data_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT version FROM analytics_data_version WHERE id = 1").fetchone()
+    return int(row[0]) if row else 0
+
+
+def make_etag(key: Hashable, version: int) -> str:
+    digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=12).hexdigest()
+    return f'"{digest}-{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Apply the weak comparison RFC 9110 prescribes for ``If-None-Match``."""
+
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    version: int
+    etag: str
+    body: bytes
+
+
+class ResponseCache:
+    """LRU cache of serialised JSON bodies bounded by total byte size."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, version: int) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: CachedResponse) -> None:
+        size = len(entry.body)
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self._evictions += 1
+
+    def build(self, key: Hashable, version: int, build: Callable[[], Any]) -> CachedResponse:
+        """Serialise ``build()`` and store it as the entry for ``key`` at ``version``."""
+
+        body = json.dumps(build(), separators=(",", ":"), default=str).encode("utf-8")
+        entry = CachedResponse(version=version, etag=make_etag(key, version), body=body)
+        self.put(key, entry)
+        return entry
+
+    def get_or_build(self, key: Hashable, version: int, build: Callable[[], Any]) -> CachedResponse:
+        entry = self.get(key, version)
+        if entry is None:
+            entry = self.build(key, version, build)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+            }
+
+
+_response_cache: ResponseCache | None = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(get_settings().analytics_cache_max_bytes)
+    return _response_cache
+
+
+__all__ = [
+    "CachedResponse",
+    "DATA_VERSION_STATEMENTS",
+    "ResponseCache",
+    "etag_matches",
+    "get_response_cache",
+    "make_etag",
+    "read_data_version",
+]
@@ -0,0 +1,625 @@
+"""Optional in-memory columnar analytics engine backed by NumPy.
+
+The engine keeps one array-backed snapshot of ``learner_course_progress``
+(course, learner, status code, progress, score and epoch-encoded activity)
+plus the group memberships, and answers course/group aggregates and score
+distributions with vectorised filters and group-bys.
+
+The snapshot follows the database through ``analytics_change_log``, which
+triggers append to on every progress, membership or catalog write. Each
+query first applies the log entries past the snapshot's watermark: changed
+progress rows are re-read by key and patched in place, deleted ones are
+tombstoned. The log trims itself; a snapshot that falls behind the retained
+window simply reloads.
+
+Set ``ANALYTICS_BACKEND=columnar`` to serve ``fetch_course_progress`` and
+``fetch_group_progress`` from the engine. Results match the SQL path:
+averages are summed exactly (``math.fsum``) and both paths drop float noise
+below ``AVERAGE_NOISE_PLACES`` before rounding. The row-level
+``fetch_learner_progress`` and ``fetch_learner_progress_page`` always read
+SQLite; they return individual rows through an index, which the engine
+would not make cheaper.
+"""
+from __future__ import annotations
+
+import math
+import sqlite3
+import threading
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .analytics import _parse_date
+from .database import AVERAGE_NOISE_PLACES, get_connection
+
+# NumPy is optional (the SQL backend works without it) and imported on first
+# use, so the API does not pay for it at start-up unless this engine is used.
+np: Any = None
+
+STATUS_CODES: Dict[str, int] = {"not_started": 0, "in_progress": 1, "completed": 2, "stalled": 3}
+
+# Entries kept in analytics_change_log; older ones are trimmed every 1,000 writes.
+CHANGE_LOG_RETENTION = 100_000
+
+_KEY_STRIDE = 1 << 32
+
+
+def _change_log_triggers() -> List[str]:
+    progress_key_change = "OLD.learner_id IS NOT NEW.learner_id OR OLD.course_id IS NOT NEW.course_id"
+    triggers = {
+        "trg_lcp_change_log_insert": (
+            "AFTER INSERT ON learner_course_progress",
+            "INSERT INTO analytics_change_log (kind, learner_id, course_id) "
+            "VALUES ('progress', NEW.learner_id, NEW.course_id);",
+        ),
+        "trg_lcp_change_log_update": (
+            "AFTER UPDATE ON learner_course_progress",
+            "INSERT INTO analytics_change_log (kind, learner_id, course_id) "
+            "VALUES ('progress', NEW.learner_id, NEW.course_id);\n"
+            "            INSERT INTO analytics_change_log (kind, learner_id, course_id) "
+            f"SELECT 'progress', OLD.learner_id, OLD.course_id WHERE {progress_key_change};",
+        ),
+        "trg_lcp_change_log_delete": (
+            "AFTER DELETE ON learner_course_progress",
+            "INSERT INTO analytics_change_log (kind, learner_id, course_id) "
+            "VALUES ('progress', OLD.learner_id, OLD.course_id);",
+        ),
+        "trg_change_log_trim": (
+            "AFTER INSERT ON analytics_change_log WHEN NEW.seq % 1000 = 0",
+            f"DELETE FROM analytics_change_log WHERE seq <= NEW.seq - {CHANGE_LOG_RETENTION};",
+        ),
+    }
+    for table, kind in (("group_memberships", "membership"), ("courses", "catalog"), ("groups", "catalog")):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            triggers[f"trg_{table}_change_log_{event.lower()}"] = (
+                f"AFTER {event} ON {table}",
+                f"INSERT INTO analytics_change_log (kind) VALUES ('{kind}');",
+            )
+
+    statements = []
+    for name, (event, body) in triggers.items():
+        statements.append(f"DROP TRIGGER IF EXISTS {name};")
+        statements.append(
+            f"""
+            CREATE TRIGGER {name} {event}
+            BEGIN
+            {body}
+            END;
+            """
+        )
+    return statements
+
+
+CHANGE_LOG_STATEMENTS: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS analytics_change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL CHECK (kind IN ('progress', 'membership', 'catalog')),
+        learner_id INTEGER,
+        course_id INTEGER
+    );
+    """,
+    *_change_log_triggers(),
+]
+
+
+class ColumnarUnavailableError(RuntimeError):
+    """Raised when the columnar engine is used without NumPy installed."""
+
+
+def _require_numpy() -> None:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError as exc:
+            raise ColumnarUnavailableError("The columnar analytics engine requires numpy") from exc
+        np = numpy
+
+
+def _epochs(values: Sequence[str]) -> "np.ndarray":
+    # ISO-8601 text as stored by the service ("YYYY-MM-DD[T ]HH:MM:SS[Z]").
+    cleaned = [value[:19].replace(" ", "T") for value in values]
+    return np.array(cleaned, dtype="datetime64[s]").astype(np.int64)
+
+
+def _round(value: float, places: int = 2) -> float:
+    # SQLite's ROUND() rounds half away from zero on the decimal digits.
+    return float(Decimal(repr(float(value))).quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP))
+
+
+def _average(total: float, count: int) -> float:
+    # Mirrors ROUND(ROUND(AVG(x), AVERAGE_NOISE_PLACES), 2) on the SQL path.
+    return _round(_round(total / count, AVERAGE_NOISE_PLACES))
+
+
+def _group_sums(values: "np.ndarray", inverse: "np.ndarray", count: "np.ndarray") -> List[float]:
+    """Exactly rounded per-group sums, independent of summation order."""
+
+    ordered = values[np.argsort(inverse, kind="stable")]
+    return [math.fsum(group) for group in np.split(ordered, np.cumsum(count)[:-1])]
+
+
+class ColumnarSnapshot:
+    """Array-backed snapshot of learner progress with incremental refresh."""
+
+    def __init__(self) -> None:
+        _require_numpy()
+        self._lock = threading.Lock()
+        self._watermark: int | None = None
+        self._reset(0)
+
+    # -- storage -----------------------------------------------------------
+
+    def _reset(self, capacity: int) -> None:
+        capacity = max(capacity, 1024)
+        self._size = 0
+        self._learner = np.zeros(capacity, dtype=np.int64)
+        self._course = np.zeros(capacity, dtype=np.int64)
+        self._status = np.zeros(capacity, dtype=np.int8)
+        self._progress = np.zeros(capacity, dtype=np.float64)
+        self._score = np.full(capacity, np.nan, dtype=np.float64)
+        self._activity = np.zeros(capacity, dtype=np.int64)
+        self._activity_text = np.empty(capacity, dtype=object)
+        self._live = np.zeros(capacity, dtype=bool)
+        self._rows: Dict[Tuple[int, int], int] = {}
+        self._sorted_keys: "np.ndarray | None" = None
+        self._sorted_rows: "np.ndarray | None" = None
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._learner)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in ("_learner", "_course", "_status", "_progress", "_activity", "_live"):
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+        score = np.full(new_capacity, np.nan, dtype=np.float64)
+        score[:capacity] = self._score
+        self._score = score
+        text = np.empty(new_capacity, dtype=object)
+        text[:capacity] = self._activity_text
+        self._activity_text = text
+
+    def _write_rows(self, rows: Sequence[sqlite3.Row]) -> None:
+        if not rows:
+            return
+        # Existing keys are patched in place; new keys are appended.
+        indices = np.empty(len(rows), dtype=np.int64)
+        next_index = self._size
+        for position, row in enumerate(rows):
+            key = (int(row["learner_id"]), int(row["course_id"]))
+            index = self._rows.get(key)
+            if index is None:
+                index = next_index
+                next_index += 1
+                self._rows[key] = index
+            indices[position] = index
+        self._grow(next_index)
+        self._size = next_index
+
+        self._learner[indices] = [row["learner_id"] for row in rows]
+        self._course[indices] = [row["course_id"] for row in rows]
+        self._status[indices] = [STATUS_CODES[row["status"]] for row in rows]
+        self._progress[indices] = [row["progress_percent"] for row in rows]
+        self._score[indices] = [np.nan if row["score"] is None else row["score"] for row in rows]
+        texts = [row["last_activity_at"] for row in rows]
+        self._activity[indices] = _epochs(texts)
+        self._activity_text[indices] = texts
+        self._live[indices] = True
+
+    def _delete_key(self, key: Tuple[int, int]) -> None:
+        index = self._rows.pop(key, None)
+        if index is not None:
+            self._live[index] = False
+
+    def _compact_if_sparse(self) -> None:
+        live = int(self._live[: self._size].sum())
+        if self._size < 1024 or live >= self._size * 3 // 4:
+            return
+        keep = np.flatnonzero(self._live[: self._size])
+        for name in ("_learner", "_course", "_status", "_progress", "_score", "_activity", "_activity_text"):
+            column = getattr(self, name)
+            column[: len(keep)] = column[keep]
+        self._live[: self._size] = False
+        self._live[: len(keep)] = True
+        self._size = len(keep)
+        self._rows = {
+            (int(learner), int(course)): index
+            for index, (learner, course) in enumerate(zip(self._learner[: self._size], self._course[: self._size]))
+        }
+
+    # -- refresh -----------------------------------------------------------
+
+    _PROGRESS_COLUMNS = "learner_id, course_id, status, progress_percent, score, last_activity_at"
+
+    def _load_all(self, conn: sqlite3.Connection) -> None:
+        rows = conn.execute(f"SELECT {self._PROGRESS_COLUMNS} FROM learner_course_progress").fetchall()
+        self._reset(len(rows))
+        self._write_rows(rows)
+        self._load_memberships(conn)
+        self._load_catalog(conn)
+
+    def _load_memberships(self, conn: sqlite3.Connection) -> None:
+        rows = conn.execute("SELECT group_id, learner_id FROM group_memberships").fetchall()
+        self._member_group = np.array([row[0] for row in rows], dtype=np.int64)
+        self._member_learner = np.array([row[1] for row in rows], dtype=np.int64)
+
+    def _load_catalog(self, conn: sqlite3.Connection) -> None:
+        self._courses = {
+            row["id"]: (row["title"], row["category"], row["created_at"])
+            for row in conn.execute("SELECT id, title, category, created_at FROM courses")
+        }
+        self._groups = {
+            row["id"]: (row["name"], row["course_id"])
+            for row in conn.execute("SELECT id, name, course_id FROM groups")
+        }
+
+    def _apply_progress_keys(self, conn: sqlite3.Connection, keys: Set[Tuple[int, int]]) -> None:
+        ordered = sorted(keys)
+        for start in range(0, len(ordered), 400):
+            chunk = ordered[start : start + 400]
+            values = ", ".join("(?, ?)" for _ in chunk)
+            params = [part for key in chunk for part in key]
+            rows = conn.execute(
+                f"SELECT {self._PROGRESS_COLUMNS} FROM learner_course_progress "
+                f"WHERE (learner_id, course_id) IN (VALUES {values})",
+                params,
+            ).fetchall()
+            found = {(int(row["learner_id"]), int(row["course_id"])) for row in rows}
+            for key in chunk:
+                if key not in found:
+                    self._delete_key(key)
+            self._write_rows(rows)
+        self._compact_if_sparse()
+
+    def refresh(self) -> None:
+        """Bring the snapshot up to date with the change log."""
+
+        with self._lock, get_connection() as conn:
+            latest_row = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'analytics_change_log'"
+            ).fetchone()
+            latest = int(latest_row[0]) if latest_row else 0
+            if self._watermark is not None and latest == self._watermark:
+                return
+
+            floor_row = conn.execute("SELECT MIN(seq) FROM analytics_change_log").fetchone()
+            floor = int(floor_row[0]) if floor_row and floor_row[0] is not None else latest + 1
+            if self._watermark is None or self._watermark < floor - 1:
+                self._load_all(conn)
+            else:
+                changes = conn.execute(
+                    "SELECT kind, learner_id, course_id FROM analytics_change_log WHERE seq > ? AND seq <= ?",
+                    (self._watermark, latest),
+                ).fetchall()
+                kinds = {row["kind"] for row in changes}
+                keys = {
+                    (int(row["learner_id"]), int(row["course_id"])) for row in changes if row["kind"] == "progress"
+                }
+                if keys:
+                    self._apply_progress_keys(conn, keys)
+                if "membership" in kinds:
+                    self._load_memberships(conn)
+                if "catalog" in kinds:
+                    self._load_catalog(conn)
+            self._watermark = latest
+            self._sorted_keys = None
+
+    # -- vectorised helpers ------------------------------------------------
+
+    def _row_mask(self, start: Optional[str], end: Optional[str]) -> "np.ndarray":
+        mask = self._live[: self._size].copy()
+        if start:
+            mask &= self._activity[: self._size] >= _epochs([_parse_date(start)])[0]
+        if end:
+            mask &= self._activity[: self._size] <= _epochs([_parse_date(end)])[0]
+        return mask
+
+    def _membership_rows(self) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """Return (group ids, group course ids, matching progress row or -1) per membership."""
+
+        if self._sorted_keys is None:
+            live = np.flatnonzero(self._live[: self._size])
+            keys = self._learner[live] * _KEY_STRIDE + self._course[live]
+            order = np.argsort(keys, kind="stable")
+            self._sorted_keys = keys[order]
+            self._sorted_rows = live[order]
+
+        group_ids = np.array(sorted(self._groups), dtype=np.int64)
+        group_courses = np.array([self._groups[group][1] for group in group_ids], dtype=np.int64)
+        known = np.isin(self._member_group, group_ids)
+        member_group = self._member_group[known]
+        member_learner = self._member_learner[known]
+        member_course = group_courses[np.searchsorted(group_ids, member_group)] if len(group_ids) else member_group
+
+        wanted = member_learner * _KEY_STRIDE + member_course
+        position = np.searchsorted(self._sorted_keys, wanted)
+        position = np.minimum(position, max(len(self._sorted_keys) - 1, 0))
+        matched = np.zeros(len(wanted), dtype=bool)
+        if len(self._sorted_keys):
+            matched = self._sorted_keys[position] == wanted
+        rows = np.where(matched, self._sorted_rows[position] if len(self._sorted_keys) else -1, -1)
+        return member_group, member_course, rows
+
+    def _aggregate(self, labels: "np.ndarray", rows: "np.ndarray") -> Dict[int, Dict[str, Any]]:
+        """Group the progress ``rows`` by ``labels`` into SQL-compatible aggregates."""
+
+        results: Dict[int, Dict[str, Any]] = {}
+        if len(rows) == 0:
+            return results
+        keys, inverse = np.unique(labels, return_inverse=True)
+        count = np.bincount(inverse, minlength=len(keys))
+        status = self._status[rows]
+        status_counts = {
+            name: np.bincount(inverse, weights=(status == code), minlength=len(keys))
+            for name, code in STATUS_CODES.items()
+        }
+        progress_sum = _group_sums(self._progress[rows], inverse, count)
+        score = self._score[rows]
+        has_score = ~np.isnan(score)
+        score_sum = _group_sums(np.where(has_score, score, 0.0), inverse, count)
+        score_count = np.bincount(inverse, weights=has_score, minlength=len(keys))
+
+        activity = self._activity[rows]
+        order = np.lexsort((activity, inverse))
+        last_in_group = order[np.r_[np.flatnonzero(np.diff(inverse[order])), len(order) - 1]]
+
+        for position, key in enumerate(keys):
+            results[int(key)] = {
+                "total_learners": int(count[position]),
+                "completed_learners": int(status_counts["completed"][position]),
+                "in_progress_learners": int(status_counts["in_progress"][position]),
+                "not_started_learners": int(status_counts["not_started"][position]),
+                "stalled_learners": int(status_counts["stalled"][position]),
+                "average_progress_percent": _average(progress_sum[position], count[position]),
+                "average_score": (
+                    _average(score_sum[position], score_count[position]) if score_count[position] else None
+                ),
+                "last_activity_at": self._activity_text[rows[last_in_group[position]]],
+            }
+        return results
+
+    @staticmethod
+    def _empty_aggregate(total_learners: int = 0) -> Dict[str, Any]:
+        return {
+            "total_learners": total_learners,
+            "completed_learners": 0,
+            "in_progress_learners": 0,
+            "not_started_learners": 0,
+            "stalled_learners": 0,
+            "average_progress_percent": None,
+            "average_score": None,
+            "last_activity_at": None,
+        }
+
+    # -- queries -------------------------------------------------------------
+
+    def course_progress(
+        self,
+        course_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        self.refresh()
+        windowed = bool(start_date or end_date)
+        with self._lock:
+            mask = self._row_mask(start_date, end_date)
+            if course_id is not None:
+                mask &= self._course[: self._size] == course_id
+            rows = np.flatnonzero(mask)
+            aggregates = self._aggregate(self._course[rows], rows)
+            courses = dict(self._courses)
+
+        results = []
+        for cid, (title, category, created_at) in courses.items():
+            if course_id is not None and cid != course_id:
+                continue
+            aggregate = aggregates.get(cid)
+            if aggregate is None:
+                if windowed:
+                    continue
+                aggregate = self._empty_aggregate()
+            results.append(
+                {
+                    "course_id": cid,
+                    "course_title": title,
+                    "course_category": category,
+                    "course_created_at": created_at,
+                    **aggregate,
+                }
+            )
+        results.sort(key=lambda row: (row["course_title"], row["course_id"]))
+        return results
+
+    def _group_selection(
+        self,
+        course_id: Optional[int],
+        group_id: Optional[int],
+        start_date: Optional[str],
+        end_date: Optional[str],
+    ) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        member_group, member_course, rows = self._membership_rows()
+        selected = np.ones(len(member_group), dtype=bool)
+        if course_id is not None:
+            selected &= member_course == course_id
+        if group_id is not None:
+            selected &= member_group == group_id
+        matched = selected & (rows >= 0)
+        if start_date or end_date:
+            in_window = self._row_mask(start_date, end_date)
+            matched &= in_window[np.maximum(rows, 0)]
+        return member_group[selected], member_group[matched], rows[matched]
+
+    def group_progress(
+        self,
+        course_id: Optional[int] = None,
+        group_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        self.refresh()
+        windowed = bool(start_date or end_date)
+        with self._lock:
+            selected_groups, matched_groups, rows = self._group_selection(course_id, group_id, start_date, end_date)
+            aggregates = self._aggregate(matched_groups, rows)
+            members, member_counts = np.unique(selected_groups, return_counts=True)
+            membership = dict(zip(members.tolist(), member_counts.tolist()))
+            groups = dict(self._groups)
+            courses = dict(self._courses)
+
+        results = []
+        for gid, (name, gcourse) in groups.items():
+            if gcourse not in courses:
+                continue
+            if (course_id is not None and gcourse != course_id) or (group_id is not None and gid != group_id):
+                continue
+            aggregate = aggregates.get(gid)
+            if aggregate is None:
+                if windowed:
+                    continue
+                aggregate = self._empty_aggregate()
+            if not windowed:
+                aggregate = {**aggregate, "total_learners": int(membership.get(gid, 0))}
+            title, category, _ = courses[gcourse]
+            results.append(
+                {
+                    "group_id": gid,
+                    "group_name": name,
+                    "course_id": gcourse,
+                    "course_title": title,
+                    "course_category": category,
+                    **aggregate,
+                }
+            )
+        results.sort(key=lambda row: (row["group_name"], row["group_id"]))
+        return results
+
+    def _labelled_rows(
+        self,
+        by: str,
+        course_id: Optional[int],
+        group_id: Optional[int],
+        start_date: Optional[str],
+        end_date: Optional[str],
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        if by == "group":
+            _, labels, rows = self._group_selection(course_id, group_id, start_date, end_date)
+            return labels, rows
+        if by != "course":
+            raise ValueError("Distributions can be grouped by 'course' or 'group'")
+        mask = self._row_mask(start_date, end_date)
+        if course_id is not None:
+            mask &= self._course[: self._size] == course_id
+        if group_id is not None:
+            members = self._member_learner[self._member_group == group_id]
+            mask &= np.isin(self._learner[: self._size], members)
+            if group_id in self._groups:
+                mask &= self._course[: self._size] == self._groups[group_id][1]
+        rows = np.flatnonzero(mask)
+        return self._course[rows], rows
+
+    def score_distribution(
+        self,
+        by: str = "course",
+        bins: int = 10,
+        course_id: Optional[int] = None,
+        group_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        percentiles: Iterable[int] = (25, 50, 75, 90),
+    ) -> List[Dict[str, Any]]:
+        """Score histogram over [0, 100] and score percentiles per course or group."""
+
+        if bins < 1:
+            raise ValueError("bins must be at least 1")
+        percentiles = tuple(percentiles)
+        self.refresh()
+        with self._lock:
+            labels, rows = self._labelled_rows(by, course_id, group_id, start_date, end_date)
+            scores = self._score[rows]
+        has_score = ~np.isnan(scores)
+        labels, scores = labels[has_score], scores[has_score]
+        edges = np.linspace(0.0, 100.0, bins + 1)
+
+        results = []
+        for label in np.unique(labels):
+            values = scores[labels == label]
+            histogram, _ = np.histogram(np.clip(values, 0.0, 100.0), bins=edges)
+            results.append(
+                {
+                    f"{by}_id": int(label),
+                    "scored_learners": int(len(values)),
+                    "bin_edges": [_round(edge) for edge in edges],
+                    "histogram": [int(count) for count in histogram],
+                    "percentiles": {
+                        f"p{p}": _round(value) for p, value in zip(percentiles, np.percentile(values, percentiles))
+                    },
+                }
+            )
+        return results
+
+    def completion_funnel(
+        self,
+        by: str = "course",
+        course_id: Optional[int] = None,
+        group_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Learners enrolled, started and completed per course or group."""
+
+        self.refresh()
+        with self._lock:
+            labels, rows = self._labelled_rows(by, course_id, group_id, start_date, end_date)
+            status = self._status[rows]
+        if len(labels) == 0:
+            return []
+        keys, inverse = np.unique(labels, return_inverse=True)
+        enrolled = np.bincount(inverse, minlength=len(keys))
+        started = np.bincount(inverse, weights=status != STATUS_CODES["not_started"], minlength=len(keys))
+        stalled = np.bincount(inverse, weights=status == STATUS_CODES["stalled"], minlength=len(keys))
+        completed = np.bincount(inverse, weights=status == STATUS_CODES["completed"], minlength=len(keys))
+        return [
+            {
+                f"{by}_id": int(key),
+                "enrolled": int(enrolled[position]),
+                "started": int(started[position]),
+                "stalled": int(stalled[position]),
+                "completed": int(completed[position]),
+                "completion_rate": _round(completed[position] / enrolled[position] * 100),
+            }
+            for position, key in enumerate(keys)
+        ]
+
+
+_snapshot: ColumnarSnapshot | None = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot() -> ColumnarSnapshot:
+    global _snapshot
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = ColumnarSnapshot()
+    return _snapshot
+
+
+def columnar_available() -> bool:
+    try:
+        _require_numpy()
+    except ColumnarUnavailableError:
+        return False
+    return True
+
+
+__all__ = [
+    "CHANGE_LOG_STATEMENTS",
+    "ColumnarSnapshot",
+    "ColumnarUnavailableError",
+    "STATUS_CODES",
+    "columnar_available",
+    "get_snapshot",
+]
@@ -0,0 +1,216 @@
+"""Coalescing write buffer for SCORM CMI commits.
+
+Courses call ``LMSCommit``/``Commit`` every few seconds with a handful of
+changed CMI elements, so a large class produces a steady stream of tiny
+writes. :class:`CommitBuffer` keeps the latest value of each element per
+attempt in memory (a later write to the same element replaces the earlier
+one), and a background thread appends what has accumulated with
+``executemany`` into the CMI log, ``SCORM_COMMIT_BATCH_SIZE`` rows per
+transaction, and marks the learners whose progress they affect (see
+:mod:`app.progress`).
+
+Adapters speaking protocol v2 number their batches. The buffer remembers
+the highest sequence accepted per attempt (for the most recent
+``SCORM_COMMIT_SEQUENCE_ENTRIES`` attempts) and ignores batches that are not
+newer, so retries, duplicate beacons and requests that lose a race are
+dropped before any database read. The marks live in this process only; a
+batch routed to another worker is ordered by its commit time instead.
+
+Durability bounds: a committed value reaches SQLite within
+``SCORM_COMMIT_FLUSH_SECONDS``, or sooner once ``SCORM_COMMIT_MAX_PENDING``
+elements are waiting. :func:`stop_commit_buffer` flushes what is left at
+shutdown, so only a crash can lose data, and at most one flush interval of
+it.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+from .config import get_settings
+from .database import get_database
+from .progress import get_progress_tracker
+from .workers import PeriodicWorker, SharedWorker
+
+CmiRow = Tuple[str, str, str, str]
+
+
+class CommitBuffer(PeriodicWorker):
+    """Per-attempt, last-write-wins buffer of CMI values with a background flusher."""
+
+    def __init__(self, interval: float, max_pending: int, batch_size: int, sequence_entries: int) -> None:
+        super().__init__(interval, name="scorm-commit-writer")
+        self._max_pending = max_pending
+        self._batch_size = batch_size
+        self._sequence_entries = sequence_entries
+        # attempt_token -> highest batch sequence accepted, least recently used first
+        self._sequences: OrderedDict[str, int] = OrderedDict()
+        # attempt_token -> element -> (value, committed_at)
+        self._pending: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        self._pending_elements = 0
+        self._oldest_pending: float | None = None
+        self._flush_lock = threading.Lock()
+        self._received = 0
+        self._coalesced = 0
+        self._stale_batches = 0
+        self._flushed = 0
+        self._transactions = 0
+        self._failures = 0
+
+    def is_stale(self, attempt_token: str, seq: int) -> bool:
+        """Whether a batch numbered ``seq`` is not newer than one already accepted."""
+
+        with self._lock:
+            last = self._sequences.get(attempt_token)
+            if last is not None and seq <= last:
+                self._stale_batches += 1
+                return True
+            return False
+
+    def add(self, attempt_token: str, values: Mapping[str, str], seq: int | None = None) -> bool:
+        """Buffer ``values`` for an attempt; returns False if ``seq`` turned out to be stale."""
+
+        committed_at = datetime.utcnow().isoformat(timespec="microseconds")
+        with self._lock:
+            if seq is not None:
+                last = self._sequences.get(attempt_token)
+                if last is not None and seq <= last:
+                    self._stale_batches += 1
+                    return False
+                self._sequences[attempt_token] = seq
+                self._sequences.move_to_end(attempt_token)
+                if len(self._sequences) > self._sequence_entries:
+                    self._sequences.popitem(last=False)
+            if not values:
+                return True
+            elements = self._pending.setdefault(attempt_token, {})
+            for element, value in values.items():
+                if element in elements:
+                    self._coalesced += 1
+                else:
+                    self._pending_elements += 1
+                elements[element] = (value, committed_at)
+            self._received += len(values)
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+            waiting = self._pending_elements
+            self.start()
+        if waiting >= self._max_pending:
+            self.wake()
+        return True
+
+    def read_through(self, attempt_token: str, load: Callable[[str], Dict[str, str]]) -> Dict[str, str]:
+        """Return ``load(attempt_token)`` overlaid with the attempt's still-buffered values.
+
+        Runs between flushes, so no value is in transit between the buffer
+        and the database while it reads.
+        """
+
+        with self._flush_lock:
+            state = load(attempt_token)
+            with self._lock:
+                for element, (value, _) in self._pending.get(attempt_token, {}).items():
+                    state[element] = value
+        return state
+
+    def run_once(self) -> int:
+        return self.flush()
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written.
+
+        Rows of a failed transaction go back into the buffer unless a newer
+        value for the same element arrived meanwhile, and the error is raised.
+        """
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                oldest, self._oldest_pending = self._oldest_pending, None
+                self._pending_elements = 0
+            rows: List[CmiRow] = [
+                (token, element, value, committed_at)
+                for token, elements in pending.items()
+                for element, (value, committed_at) in elements.items()
+            ]
+            if not rows:
+                return 0
+
+            db = get_database()
+            started = time.perf_counter()
+            written = transactions = 0
+            try:
+                for start in range(0, len(rows), self._batch_size):
+                    chunk = rows[start : start + self._batch_size]
+                    get_progress_tracker().mark_dirty(db.write_cmi_values(chunk))
+                    written += len(chunk)
+                    transactions += 1
+            except Exception:
+                self._requeue(rows[written:], oldest)
+                raise
+            finally:
+                seconds = time.perf_counter() - started
+                with self._lock:
+                    self._flushed += written
+                    self._transactions += transactions
+                    self._record_run(rows=written, transactions=transactions, seconds=round(seconds, 4))
+            return written
+
+    def _requeue(self, rows: List[CmiRow], oldest: float | None) -> None:
+        with self._lock:
+            self._failures += 1
+            for token, element, value, committed_at in rows:
+                elements = self._pending.setdefault(token, {})
+                if element not in elements:
+                    elements[element] = (value, committed_at)
+                    self._pending_elements += 1
+            if oldest is not None and (self._oldest_pending is None or oldest < self._oldest_pending):
+                self._oldest_pending = oldest
+
+    def stop(self) -> None:
+        super().stop()
+        self.flush()
+
+    def _stats(self) -> Dict[str, Any]:
+        oldest = self._oldest_pending
+        return {
+            "pending_attempts": len(self._pending),
+            "pending_elements": self._pending_elements,
+            "oldest_pending_seconds": round(time.monotonic() - oldest, 4) if oldest is not None else 0.0,
+            "received": self._received,
+            "coalesced": self._coalesced,
+            "stale_batches": self._stale_batches,
+            "tracked_sequences": len(self._sequences),
+            "flushed": self._flushed,
+            "transactions": self._transactions,
+            "failures": self._failures,
+        }
+
+
+def _new_commit_buffer() -> CommitBuffer:
+    settings = get_settings()
+    return CommitBuffer(
+        settings.scorm_commit_flush_seconds,
+        settings.scorm_commit_max_pending,
+        settings.scorm_commit_batch_size,
+        settings.scorm_commit_sequence_entries,
+    )
+
+
+_buffer = SharedWorker(_new_commit_buffer)
+
+
+def get_commit_buffer() -> CommitBuffer:
+    return _buffer.get()
+
+
+def stop_commit_buffer() -> None:
+    """Flush and stop the shared buffer, if one was created."""
+
+    _buffer.stop()
+
+
+__all__ = ["CommitBuffer", "get_commit_buffer", "stop_commit_buffer"]
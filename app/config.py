@@ -15,8 +15,58 @@ class Settings(BaseSettings):
     s3_secret_key: str | None = Field(default=None, env="S3_SECRET_KEY")
     s3_bucket: str = Field("lms-scorm", env="S3_BUCKET")
     s3_use_ssl: bool = Field(True, env="S3_USE_SSL")
+    s3_upload_workers: int = Field(16, env="S3_UPLOAD_WORKERS")
+    s3_upload_max_attempts: int = Field(4, env="S3_UPLOAD_MAX_ATTEMPTS")
+    s3_upload_backoff_seconds: float = Field(0.2, env="S3_UPLOAD_BACKOFF_SECONDS")
+    s3_multipart_threshold_bytes: int = Field(16 * 1024 * 1024, env="S3_MULTIPART_THRESHOLD_BYTES")
+    s3_multipart_chunk_bytes: int = Field(16 * 1024 * 1024, env="S3_MULTIPART_CHUNK_BYTES")
+    s3_multipart_concurrency: int = Field(4, env="S3_MULTIPART_CONCURRENCY")
+    storage_backend: str = Field("s3", env="STORAGE_BACKEND")
+    storage_root: str = Field("./data/objects", env="STORAGE_ROOT")
+    storage_signing_key: str | None = Field(default=None, env="STORAGE_SIGNING_KEY")
+    storage_cache_max_age_seconds: int = Field(300, env="STORAGE_CACHE_MAX_AGE_SECONDS")
+    startup_warmup_timeout_seconds: float = Field(10.0, env="STARTUP_WARMUP_TIMEOUT_SECONDS")
     presign_ttl_seconds: int = Field(900, env="SCORM_PRESIGN_TTL")
+    presign_cache_size: int = Field(10_000, env="SCORM_PRESIGN_CACHE_SIZE")
+    presign_reuse_fraction: float = Field(0.5, env="SCORM_PRESIGN_REUSE_FRACTION")
+    presign_local_signing: bool = Field(True, env="SCORM_PRESIGN_LOCAL_SIGNING")
     attempt_ttl_seconds: int = Field(3600, env="SCORM_ATTEMPT_TTL")
+    scorm_package_index_ttl_seconds: float = Field(30.0, env="SCORM_PACKAGE_INDEX_TTL_SECONDS")
+    scorm_attempt_flush_seconds: float = Field(0.05, env="SCORM_ATTEMPT_FLUSH_SECONDS")
+    scorm_attempt_batch_size: int = Field(500, env="SCORM_ATTEMPT_BATCH_SIZE")
+    scorm_attempt_cache_size: int = Field(100_000, env="SCORM_ATTEMPT_CACHE_SIZE")
+    scorm_attempt_cache_negative_ttl_seconds: float = Field(1.0, env="SCORM_ATTEMPT_CACHE_NEGATIVE_TTL_SECONDS")
+    scorm_commit_flush_seconds: float = Field(1.0, env="SCORM_COMMIT_FLUSH_SECONDS")
+    scorm_commit_max_pending: int = Field(50_000, env="SCORM_COMMIT_MAX_PENDING")
+    scorm_commit_batch_size: int = Field(1000, env="SCORM_COMMIT_BATCH_SIZE")
+    scorm_commit_sequence_entries: int = Field(100_000, env="SCORM_COMMIT_SEQUENCE_ENTRIES")
+    scorm_cmi_compact_interval_seconds: float = Field(5.0, env="SCORM_CMI_COMPACT_INTERVAL_SECONDS")
+    scorm_cmi_compact_segment_rows: int = Field(5000, env="SCORM_CMI_COMPACT_SEGMENT_ROWS")
+    scorm_cmi_compact_pause_seconds: float = Field(0.01, env="SCORM_CMI_COMPACT_PAUSE_SECONDS")
+    progress_refresh_seconds: float = Field(2.0, env="PROGRESS_REFRESH_SECONDS")
+    scorm_attempt_sweep_interval_seconds: float = Field(60.0, env="SCORM_ATTEMPT_SWEEP_INTERVAL_SECONDS")
+    scorm_attempt_sweep_batch_size: int = Field(500, env="SCORM_ATTEMPT_SWEEP_BATCH_SIZE")
+    scorm_attempt_sweep_pause_seconds: float = Field(0.05, env="SCORM_ATTEMPT_SWEEP_PAUSE_SECONDS")
+    scorm_attempt_sweep_grace_seconds: float = Field(3600.0, env="SCORM_ATTEMPT_SWEEP_GRACE_SECONDS")
+    scorm_attempt_archive: bool = Field(True, env="SCORM_ATTEMPT_ARCHIVE")
+    scorm_max_upload_bytes: int = Field(4 * 1024 * 1024 * 1024, env="SCORM_MAX_UPLOAD_BYTES")
+    scorm_max_uncompressed_bytes: int = Field(8 * 1024 * 1024 * 1024, env="SCORM_MAX_UNCOMPRESSED_BYTES")
+    scorm_upload_chunk_bytes: int = Field(1024 * 1024, env="SCORM_UPLOAD_CHUNK_BYTES")
+    scorm_staging_dir: str = Field("./data/ingest", env="SCORM_STAGING_DIR")
+    scorm_ingest_processes: int = Field(2, env="SCORM_INGEST_PROCESSES")
+    scorm_ingest_max_attempts: int = Field(3, env="SCORM_INGEST_MAX_ATTEMPTS")
+    scorm_ingest_lease_seconds: float = Field(60.0, env="SCORM_INGEST_LEASE_SECONDS")
+    scorm_ingest_retry_backoff_seconds: float = Field(5.0, env="SCORM_INGEST_RETRY_BACKOFF_SECONDS")
+    scorm_ingest_poll_seconds: float = Field(1.0, env="SCORM_INGEST_POLL_SECONDS")
+    db_pool_size: int = Field(8, env="DB_POOL_SIZE")
+    db_pool_timeout_seconds: float = Field(5.0, env="DB_POOL_TIMEOUT")
+    sqlite_mmap_size: int = Field(256 * 1024 * 1024, env="SQLITE_MMAP_SIZE")
+    sqlite_cache_size_kib: int = Field(16 * 1024, env="SQLITE_CACHE_SIZE_KIB")
+    sqlite_statement_cache_size: int = Field(256, env="SQLITE_STATEMENT_CACHE_SIZE")
+    analytics_cache_max_bytes: int = Field(32 * 1024 * 1024, env="ANALYTICS_CACHE_MAX_BYTES")
+    analytics_db_workers: int = Field(4, env="ANALYTICS_DB_WORKERS")
+    analytics_db_max_queue: int = Field(64, env="ANALYTICS_DB_MAX_QUEUE")
+    analytics_backend: str = Field("sql", env="ANALYTICS_BACKEND")
 
     class Config:
         env_file = ".env"
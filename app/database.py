@@ -1,15 +1,49 @@
+"""Lightweight SQLite helper used by the LMS service."""
+from __future__ import annotations
+
+import json
+import secrets
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Any, ContextManager, Dict, Iterable, Iterator, List, Mapping, Sequence, Set, Tuple
+from urllib.parse import urlparse
+
+from .attempt_cache import AttemptCache, AttemptTokenSigner, CachedAttempt
+from .config import get_settings
+from .pool import ConnectionPool
+from .pool import get_pool as get_shared_pool
+from .workers import PeriodicWorker
+
+if TYPE_CHECKING:
+    from .scorm import ManifestDetails
 
 DB_PATH = Path(__file__).resolve().parent.parent / "data" / "lms.db"
 
 
-def get_connection() -> sqlite3.Connection:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Averages are rounded to this many places before the final two, so float
+# noise from summation order (or from the rollups' running sums) cannot flip
+# the last reported digit. The columnar engine rounds the same way.
+AVERAGE_NOISE_PLACES = 6
+
+
+def average_sql(expression: str) -> str:
+    return f"ROUND(ROUND({expression}, {AVERAGE_NOISE_PLACES}), 2)"
+
+
+def get_pool() -> ConnectionPool:
+    """Return the shared connection pool for the analytics database."""
+
+    return get_shared_pool(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+
+
+def get_connection() -> ContextManager[sqlite3.Connection]:
+    """Check out a pooled analytics connection for the duration of a ``with`` block."""
+
+    return get_pool().connection()
 
 
 def run_script(conn: sqlite3.Connection, statements: Iterable[str]) -> None:
@@ -78,13 +112,33 @@ def initialize_database() -> None:
             FOREIGN KEY (course_id) REFERENCES courses(id)
         );
         """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_lcp_activity_keyset
+            ON learner_course_progress (last_activity_at, learner_id, course_id);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_lcp_status_activity
+            ON learner_course_progress (status, last_activity_at);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_lcp_course_status_activity
+            ON learner_course_progress (course_id, status, last_activity_at);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_group_memberships_learner
+            ON group_memberships (learner_id, group_id);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_groups_course
+            ON groups (course_id);
+        """,
     ]
 
     view_statements = [
         """
         DROP VIEW IF EXISTS course_progress_view;
         """,
-        """
+        f"""
         CREATE VIEW course_progress_view AS
         SELECT
             c.id AS course_id,
@@ -96,8 +150,8 @@ def initialize_database() -> None:
             SUM(CASE WHEN lcp.status = 'in_progress' THEN 1 ELSE 0 END) AS in_progress_learners,
             SUM(CASE WHEN lcp.status = 'not_started' THEN 1 ELSE 0 END) AS not_started_learners,
             SUM(CASE WHEN lcp.status = 'stalled' THEN 1 ELSE 0 END) AS stalled_learners,
-            ROUND(AVG(lcp.progress_percent), 2) AS average_progress_percent,
-            ROUND(AVG(lcp.score), 2) AS average_score,
+            {average_sql("AVG(lcp.progress_percent)")} AS average_progress_percent,
+            {average_sql("AVG(lcp.score)")} AS average_score,
             MAX(lcp.last_activity_at) AS last_activity_at
         FROM courses c
         LEFT JOIN learner_course_progress lcp ON lcp.course_id = c.id
@@ -106,7 +160,7 @@ def initialize_database() -> None:
         """
         DROP VIEW IF EXISTS group_progress_view;
         """,
-        """
+        f"""
         CREATE VIEW group_progress_view AS
         SELECT
             g.id AS group_id,
@@ -119,8 +173,8 @@ def initialize_database() -> None:
             SUM(CASE WHEN lcp.status = 'in_progress' THEN 1 ELSE 0 END) AS in_progress_learners,
             SUM(CASE WHEN lcp.status = 'not_started' THEN 1 ELSE 0 END) AS not_started_learners,
             SUM(CASE WHEN lcp.status = 'stalled' THEN 1 ELSE 0 END) AS stalled_learners,
-            ROUND(AVG(lcp.progress_percent), 2) AS average_progress_percent,
-            ROUND(AVG(lcp.score), 2) AS average_score,
+            {average_sql("AVG(lcp.progress_percent)")} AS average_progress_percent,
+            {average_sql("AVG(lcp.score)")} AS average_score,
             MAX(lcp.last_activity_at) AS last_activity_at
         FROM groups g
         JOIN courses c ON c.id = g.course_id
@@ -159,9 +213,26 @@ def initialize_database() -> None:
         """,
     ]
 
+    from .cache import DATA_VERSION_STATEMENTS
+    from .columnar import CHANGE_LOG_STATEMENTS
+    from .rollups import (
+        ROLLUP_TABLE_STATEMENTS,
+        ROLLUP_TRIGGER_STATEMENTS,
+        ROLLUP_VIEW_STATEMENTS,
+        rebuild_rollups,
+        rollups_need_rebuild,
+    )
+
     with get_connection() as conn:
         run_script(conn, schema_statements)
         run_script(conn, view_statements)
+        run_script(conn, ROLLUP_TABLE_STATEMENTS)
+        run_script(conn, ROLLUP_TRIGGER_STATEMENTS)
+        run_script(conn, ROLLUP_VIEW_STATEMENTS)
+        run_script(conn, DATA_VERSION_STATEMENTS)
+        run_script(conn, CHANGE_LOG_STATEMENTS)
+        if rollups_need_rebuild(conn):
+            rebuild_rollups(conn)
 
 
 def seed_demo_data() -> None:
@@ -220,18 +291,403 @@ def seed_demo_data() -> None:
         run_script(conn, sample_inserts)
 
 
-__all__ = ["get_connection", "initialize_database", "seed_demo_data", "DB_PATH"]
-"""Lightweight SQLite helper used by the LMS service."""
-from __future__ import annotations
+LATEST_PACKAGE_SQL = """
+    SELECT * FROM scorm_packages
+    WHERE course_id = ?
+    ORDER BY created_at DESC, id DESC
+    LIMIT 1;
+"""
 
-import sqlite3
-from contextlib import contextmanager
-from datetime import datetime
-from pathlib import Path
-from typing import Any, Dict, Iterator
-from urllib.parse import urlparse
+PACKAGE_FILE_SQL = "SELECT blob_key FROM scorm_package_files WHERE package_id = ? AND path = ?;"
 
-from .config import get_settings
+ATTEMPT_SQL = """
+    SELECT a.id, a.package_id, a.attempt_token, a.expires_at, p.object_prefix, p.entry_point
+    FROM scorm_attempts a
+    JOIN scorm_packages p ON p.id = a.package_id
+    WHERE a.attempt_token = ?;
+"""
+
+PACKAGE_PREFIX_SQL = """
+    SELECT object_prefix FROM scorm_packages WHERE id = ?;
+"""
+
+PACKAGE_ITEMS_SQL = """
+    SELECT * FROM scorm_items
+    WHERE package_id = ?
+    ORDER BY position;
+"""
+
+PACKAGE_ITEM_SQL = "SELECT * FROM scorm_items WHERE package_id = ? AND identifier = ?;"
+
+# Files of a resource plus those of every resource it depends on, transitively.
+RESOURCE_FILES_SQL = """
+    WITH RECURSIVE needed(identifier) AS (
+        SELECT ?
+        UNION
+        SELECT d.dependency_identifier
+        FROM scorm_resource_dependencies d
+        JOIN needed n ON d.package_id = ? AND d.resource_identifier = n.identifier
+    )
+    SELECT DISTINCT f.path
+    FROM needed n
+    JOIN scorm_resource_files f ON f.package_id = ? AND f.resource_identifier = n.identifier
+    ORDER BY f.path;
+"""
+
+EXPIRED_ATTEMPTS_SQL = """
+    SELECT id, attempt_token FROM scorm_attempts
+    WHERE expires_at < ?
+    ORDER BY expires_at
+    LIMIT ?;
+"""
+
+EXPIRED_ATTEMPT_COUNT_SQL = "SELECT COUNT(*) FROM scorm_attempts WHERE expires_at < ?;"
+
+# CMI runtime data is an append-only log compacted into one snapshot row per
+# attempt (see compact_cmi_log). Within a compacted segment, values are
+# applied in commit order.
+APPEND_CMI_LOG_SQL = """
+    INSERT INTO scorm_cmi_log (attempt_token, element, value, committed_at)
+    VALUES (?, ?, ?, ?);
+"""
+
+CMI_LOG_SEGMENT_SQL = """
+    SELECT id, attempt_token, element, value, committed_at
+    FROM scorm_cmi_log
+    ORDER BY id
+    LIMIT ?;
+"""
+
+CMI_SNAPSHOT_SQL = "SELECT state, updated_at FROM scorm_cmi_snapshots WHERE attempt_token = ?;"
+
+CMI_LOG_TAIL_SQL = """
+    SELECT element, value, committed_at FROM scorm_cmi_log
+    WHERE attempt_token = ?
+    ORDER BY committed_at, id;
+"""
+
+UPSERT_CMI_SNAPSHOT_SQL = """
+    INSERT INTO scorm_cmi_snapshots (attempt_token, state, elements, folded_through, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (attempt_token) DO UPDATE SET
+        state = excluded.state,
+        elements = excluded.elements,
+        folded_through = excluded.folded_through,
+        updated_at = MAX(excluded.updated_at, updated_at);
+"""
+
+INSERT_ATTEMPT_SQL = """
+    INSERT INTO scorm_attempts (package_id, attempt_token, expires_at, created_at, learner_id, item_identifier)
+    VALUES (?, ?, ?, ?, ?, ?);
+"""
+
+# CMI elements that feed learner progress, by the summary column they update.
+PROGRESS_ELEMENTS = {
+    "cmi.core.lesson_status": "lesson_status",
+    "cmi.completion_status": "completion_status",
+    "cmi.progress_measure": "progress_measure",
+    "cmi.core.score.raw": "score_raw",
+    "cmi.score.raw": "score_raw",
+}
+PROGRESS_FIELDS = ("lesson_status", "completion_status", "progress_measure", "score_raw")
+
+# Attempts whose progress is tracked: launched for a learner, in a course
+# with a numeric id, i.e. one that can exist in ``courses``. A launch without
+# an explicit item counts towards the item whose resource is the package
+# entry point.
+_PROGRESS_SCOPE = """
+    SELECT
+        a.attempt_token,
+        a.learner_id,
+        CAST(p.course_id AS INTEGER) AS course_id,
+        COALESCE(
+            a.item_identifier,
+            (
+                SELECT i.identifier FROM scorm_items i
+                WHERE i.package_id = p.id AND i.launch_path = p.entry_point
+                ORDER BY i.position
+                LIMIT 1
+            ),
+            ''
+        ) AS activity
+    FROM scorm_attempts a
+    JOIN scorm_packages p ON p.id = a.package_id
+    WHERE a.learner_id IS NOT NULL
+      AND p.course_id <> '' AND p.course_id NOT GLOB '*[^0-9]*'
+"""
+
+# Incremental path: fold the progress elements of one flushed batch into the
+# attempt's summary. Each element keeps the value with the latest commit time,
+# whatever order batches flush in; a NULL parameter means the batch did not
+# touch that element, so the stored value is kept.
+FOLD_ATTEMPT_PROGRESS_SQL = f"""
+    INSERT INTO scorm_attempt_progress (
+        attempt_token, learner_id, course_id, activity,
+        lesson_status, lesson_status_at, completion_status, completion_status_at,
+        progress_measure, progress_measure_at, score_raw, score_raw_at, last_activity_at
+    )
+    SELECT s.attempt_token, s.learner_id, s.course_id, s.activity, ?, ?, ?, ?, ?, ?, ?, ?, ?
+    FROM ({_PROGRESS_SCOPE} AND a.attempt_token = ?) s
+    WHERE true
+    ON CONFLICT (attempt_token) DO UPDATE SET
+        lesson_status = CASE WHEN excluded.lesson_status_at >= COALESCE(lesson_status_at, '')
+            THEN excluded.lesson_status ELSE lesson_status END,
+        lesson_status_at = CASE WHEN excluded.lesson_status_at >= COALESCE(lesson_status_at, '')
+            THEN excluded.lesson_status_at ELSE lesson_status_at END,
+        completion_status = CASE WHEN excluded.completion_status_at >= COALESCE(completion_status_at, '')
+            THEN excluded.completion_status ELSE completion_status END,
+        completion_status_at = CASE WHEN excluded.completion_status_at >= COALESCE(completion_status_at, '')
+            THEN excluded.completion_status_at ELSE completion_status_at END,
+        progress_measure = CASE WHEN excluded.progress_measure_at >= COALESCE(progress_measure_at, '')
+            THEN excluded.progress_measure ELSE progress_measure END,
+        progress_measure_at = CASE WHEN excluded.progress_measure_at >= COALESCE(progress_measure_at, '')
+            THEN excluded.progress_measure_at ELSE progress_measure_at END,
+        score_raw = CASE WHEN excluded.score_raw_at >= COALESCE(score_raw_at, '')
+            THEN excluded.score_raw ELSE score_raw END,
+        score_raw_at = CASE WHEN excluded.score_raw_at >= COALESCE(score_raw_at, '')
+            THEN excluded.score_raw_at ELSE score_raw_at END,
+        last_activity_at = MAX(excluded.last_activity_at, last_activity_at);
+"""
+
+# Rebuild path: the same summary, from each attempt's fully compacted snapshot
+# (element -> [value, committed_at]). Of the two score elements, the later
+# commit wins, as in the fold.
+REBUILD_ATTEMPT_PROGRESS_SQL = f"""
+    INSERT OR REPLACE INTO scorm_attempt_progress (
+        attempt_token, learner_id, course_id, activity,
+        lesson_status, lesson_status_at, completion_status, completion_status_at,
+        progress_measure, progress_measure_at, score_raw, score_raw_at, last_activity_at
+    )
+    SELECT
+        s.attempt_token, s.learner_id, s.course_id, s.activity,
+        json_extract(c.state, '$."cmi.core.lesson_status"[0]'),
+        json_extract(c.state, '$."cmi.core.lesson_status"[1]'),
+        json_extract(c.state, '$."cmi.completion_status"[0]'),
+        json_extract(c.state, '$."cmi.completion_status"[1]'),
+        json_extract(c.state, '$."cmi.progress_measure"[0]'),
+        json_extract(c.state, '$."cmi.progress_measure"[1]'),
+        CASE WHEN COALESCE(json_extract(c.state, '$."cmi.score.raw"[1]'), '')
+                > COALESCE(json_extract(c.state, '$."cmi.core.score.raw"[1]'), '')
+            THEN json_extract(c.state, '$."cmi.score.raw"[0]')
+            ELSE json_extract(c.state, '$."cmi.core.score.raw"[0]') END,
+        CASE WHEN COALESCE(json_extract(c.state, '$."cmi.score.raw"[1]'), '')
+                > COALESCE(json_extract(c.state, '$."cmi.core.score.raw"[1]'), '')
+            THEN json_extract(c.state, '$."cmi.score.raw"[1]')
+            ELSE json_extract(c.state, '$."cmi.core.score.raw"[1]') END,
+        c.updated_at
+    FROM ({_PROGRESS_SCOPE}) s
+    JOIN scorm_cmi_snapshots c ON c.attempt_token = s.attempt_token
+    WHERE true;
+"""
+
+# Learner/course progress from attempt summaries; both paths use it, and
+# write the result to the analytics database with UPSERT_PROGRESS_SQL. Each
+# activity (SCO) counts once, with its best attempt; the course total is the
+# number of launchable items in its newest package.
+_PROGRESS_ROWS = """
+    WITH activities AS (
+        SELECT
+            learner_id,
+            course_id,
+            activity,
+            MAX(CASE WHEN lesson_status IN ('passed', 'completed') OR completion_status = 'completed'
+                THEN 1 ELSE 0 END) AS completed,
+            MAX(CASE WHEN COALESCE(lesson_status, 'not attempted') NOT IN ('not attempted', '')
+                  OR COALESCE(completion_status, 'not attempted') NOT IN ('not attempted', 'unknown', '')
+                  OR progress_measure IS NOT NULL OR score_raw IS NOT NULL
+                THEN 1 ELSE 0 END) AS started,
+            MAX(MIN(MAX(CAST(COALESCE(progress_measure, '0') AS REAL), 0.0), 1.0)) AS measure,
+            MAX(CASE WHEN score_raw <> '' THEN CAST(score_raw AS REAL) END) AS score,
+            MAX(last_activity_at) AS last_activity_at
+        FROM scorm_attempt_progress
+        {where}
+        GROUP BY learner_id, course_id, activity
+    ),
+    totals AS (
+        SELECT
+            learner_id,
+            course_id,
+            SUM(completed) AS completed_activities,
+            MAX(
+                COUNT(*),
+                (
+                    SELECT COUNT(*) FROM scorm_items i
+                    WHERE i.launch_path IS NOT NULL AND i.package_id = (
+                        SELECT p.id FROM scorm_packages p
+                        WHERE p.course_id = CAST(activities.course_id AS TEXT)
+                        ORDER BY p.created_at DESC, p.id DESC
+                        LIMIT 1
+                    )
+                )
+            ) AS total_activities,
+            SUM(CASE WHEN completed = 1 THEN 1.0 ELSE measure END) AS progress,
+            MAX(started) AS started,
+            AVG(score) AS score,
+            MAX(last_activity_at) AS last_activity_at
+        FROM activities
+        GROUP BY learner_id, course_id
+    )
+    SELECT
+        t.learner_id,
+        t.course_id,
+        CASE
+            WHEN t.completed_activities >= t.total_activities THEN 'completed'
+            WHEN t.started = 1 THEN 'in_progress'
+            ELSE 'not_started'
+        END AS status,
+        ROUND(MIN(100.0 * t.progress / t.total_activities, 100.0), 2) AS progress_percent,
+        ROUND(t.score, 2) AS score,
+        -- Commit times carry microseconds; analytics timestamps are
+        -- whole-second UTC with a trailing Z.
+        strftime('%Y-%m-%dT%H:%M:%SZ', t.last_activity_at) AS last_activity_at,
+        t.completed_activities,
+        t.total_activities
+    FROM totals t
+    ORDER BY t.learner_id, t.course_id;
+"""
+
+DERIVE_PROGRESS_SQL = _PROGRESS_ROWS.format(where="")
+PAIR_PROGRESS_SQL = _PROGRESS_ROWS.format(where="WHERE learner_id = ? AND course_id = ?")
+
+
+# Rows for learners or courses unknown to the analytics database are skipped.
+UPSERT_PROGRESS_SQL = """
+    INSERT INTO learner_course_progress (
+        learner_id, course_id, status, progress_percent, score,
+        last_activity_at, completed_activities, total_activities
+    )
+    SELECT l.id, c.id, ?, ?, ?, ?, ?, ?
+    FROM learners l
+    JOIN courses c ON c.id = ?
+    WHERE l.id = ?
+    ON CONFLICT (learner_id, course_id) DO UPDATE SET
+        status = excluded.status,
+        progress_percent = excluded.progress_percent,
+        score = excluded.score,
+        last_activity_at = excluded.last_activity_at,
+        completed_activities = excluded.completed_activities,
+        total_activities = excluded.total_activities;
+"""
+
+PROGRESS_ROW_SQL = """
+    SELECT learner_id, course_id, status, progress_percent, score,
+           last_activity_at, completed_activities, total_activities
+    FROM learner_course_progress
+    WHERE learner_id = ? AND course_id = ?;
+"""
+
+
+def write_learner_progress(rows: Iterable[Sequence[Any]]) -> None:
+    """Upsert derived ``learner_course_progress`` rows into the analytics database."""
+
+    params = [(*row[2:], row[1], row[0]) for row in rows]
+    with get_connection() as conn:
+        conn.executemany(UPSERT_PROGRESS_SQL, params)
+        conn.commit()
+
+
+def load_learner_progress(pairs: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], sqlite3.Row]:
+    """Current ``learner_course_progress`` rows of ``pairs``, where they exist."""
+
+    with get_connection() as conn:
+        found = {}
+        for pair in pairs:
+            row = conn.execute(PROGRESS_ROW_SQL, pair).fetchone()
+            if row is not None:
+                found[pair] = row
+        return found
+
+
+def learner_course_exists(learner_id: int, course_id: int) -> bool:
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM learners WHERE id = ?) AND EXISTS (SELECT 1 FROM courses WHERE id = ?);",
+            (learner_id, course_id),
+        ).fetchone()
+        return bool(row[0])
+
+
+class _AttemptWriter(PeriodicWorker):
+    """Write-behind queue for new attempt rows.
+
+    Launches enqueue their attempt and return; a background thread inserts
+    the queue in one transaction every ``interval`` seconds, or sooner once
+    ``batch_size`` rows are waiting. A row stays in the queue until its
+    transaction commits, so :meth:`is_pending` followed by :meth:`flush`
+    guarantees a token is durable before it is relied on.
+    """
+
+    def __init__(self, db: "Database", interval: float, batch_size: int) -> None:
+        super().__init__(interval, name="scorm-attempt-writer")
+        self._db = db
+        self._batch_size = batch_size
+        self._pending: Dict[str, Tuple[int, str, str, str, int | None, str | None]] = {}
+        self._flush_lock = threading.Lock()
+        self._flushed = 0
+        self._largest_batch = 0
+        self._failures = 0
+
+    def add(
+        self,
+        package_id: int,
+        token: str,
+        expires_at: str,
+        created_at: str,
+        learner_id: int | None = None,
+        item_identifier: str | None = None,
+    ) -> None:
+        with self._lock:
+            self._pending[token] = (package_id, token, expires_at, created_at, learner_id, item_identifier)
+            waiting = len(self._pending)
+            self.start()
+        if waiting >= self._batch_size:
+            self.wake()
+
+    def is_pending(self, token: str) -> bool:
+        with self._lock:
+            return token in self._pending
+
+    def run_once(self) -> int:
+        return self.flush()
+
+    def flush(self) -> int:
+        """Insert every queued attempt in one transaction; returns the number written.
+
+        Rows stay queued if the transaction fails, and are retried by the next flush.
+        """
+
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending.values())
+            if not batch:
+                return 0
+            try:
+                with self._db.get_connection() as conn:
+                    conn.executemany(INSERT_ATTEMPT_SQL, batch)
+                    conn.commit()
+            except sqlite3.Error:
+                with self._lock:
+                    self._failures += 1
+                raise
+            with self._lock:
+                for row in batch:
+                    del self._pending[row[1]]
+                self._flushed += len(batch)
+                self._record_run(rows=len(batch))
+                self._largest_batch = max(self._largest_batch, len(batch))
+            return len(batch)
+
+    def stop(self) -> None:
+        super().stop()
+        self.flush()
+
+    def _stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "flushed": self._flushed,
+            "largest_batch": self._largest_batch,
+            "failures": self._failures,
+        }
 
 
 class Database:
@@ -247,10 +703,25 @@ class Database:
 
         path = parsed.path.lstrip("/") or "app.db"
         self._path = Path(path)
-        self._path.parent.mkdir(parents=True, exist_ok=True)
-        self._connection_kwargs: Dict[str, Any] = {"check_same_thread": False}
+        self._pool = get_shared_pool(self._path, pragmas={"foreign_keys": "ON"})
+
+        settings = get_settings()
+        # course_id -> (loaded_at, latest package row or None). Writes through
+        # this process invalidate it directly; the TTL bounds how long a
+        # package inserted by another process can go unseen.
+        self._latest_packages: Dict[str, Tuple[float, sqlite3.Row | None]] = {}
+        self._latest_generation = 0
+        self._latest_lock = threading.Lock()
+        self._latest_ttl = settings.scorm_package_index_ttl_seconds
+        self._latest_hits = 0
+        self._latest_misses = 0
+        self._attempts = _AttemptWriter(self, settings.scorm_attempt_flush_seconds, settings.scorm_attempt_batch_size)
+        self._attempt_cache = AttemptCache(
+            settings.scorm_attempt_cache_size, settings.scorm_attempt_cache_negative_ttl_seconds
+        )
 
         self._initialise()
+        self._token_signer = AttemptTokenSigner(self._load_token_key())
 
     @property
     def path(self) -> Path:
@@ -258,7 +729,6 @@ class Database:
 
     def _initialise(self) -> None:
         with self.get_connection() as conn:
-            conn.execute("PRAGMA foreign_keys = ON;")
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS scorm_packages (
@@ -284,16 +754,310 @@ class Database:
                 );
                 """
             )
+            # Added after the table first shipped; older databases get them here.
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(scorm_attempts);")}
+            for column, declaration in (("learner_id", "INTEGER"), ("item_identifier", "TEXT")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE scorm_attempts ADD COLUMN {column} {declaration};")
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_scorm_attempts_expires
+                    ON scorm_attempts (expires_at);
+                """
+            )
+            # Swept attempts kept for audit. Append-only and unindexed beyond
+            # its key so archiving stays cheap; nothing on the request path reads it.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_attempts_archive (
+                    id INTEGER PRIMARY KEY,
+                    package_id INTEGER NOT NULL,
+                    attempt_token TEXT NOT NULL,
+                    learner_id INTEGER,
+                    item_identifier TEXT,
+                    expires_at TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    archived_at TEXT NOT NULL
+                );
+                """
+            )
+            # Committed CMI values, appended as batches flush and trimmed once
+            # compacted into scorm_cmi_snapshots (element -> [value, committed_at]
+            # as JSON).
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_cmi_log (
+                    id INTEGER PRIMARY KEY,
+                    attempt_token TEXT NOT NULL,
+                    element TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    committed_at TEXT NOT NULL
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_scorm_cmi_log_attempt
+                    ON scorm_cmi_log (attempt_token, id);
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_cmi_snapshots (
+                    attempt_token TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    elements INTEGER NOT NULL,
+                    folded_through INTEGER NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+                """
+            )
+            # Progress-relevant CMI values per attempt, maintained as batches
+            # flush. Kept when the attempt itself is swept.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_attempt_progress (
+                    attempt_token TEXT PRIMARY KEY,
+                    learner_id INTEGER NOT NULL,
+                    course_id INTEGER NOT NULL,
+                    activity TEXT NOT NULL,
+                    lesson_status TEXT,
+                    lesson_status_at TEXT,
+                    completion_status TEXT,
+                    completion_status_at TEXT,
+                    progress_measure TEXT,
+                    progress_measure_at TEXT,
+                    score_raw TEXT,
+                    score_raw_at TEXT,
+                    last_activity_at TEXT NOT NULL
+                ) WITHOUT ROWID;
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_scorm_attempt_progress_learner_course
+                    ON scorm_attempt_progress (learner_id, course_id);
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_scorm_packages_course_created
+                    ON scorm_packages (course_id, created_at, id);
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_blobs (
+                    blob_key TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    content_type TEXT,
+                    created_at TEXT NOT NULL
+                ) WITHOUT ROWID;
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_package_files (
+                    package_id INTEGER NOT NULL REFERENCES scorm_packages(id) ON DELETE CASCADE,
+                    path TEXT NOT NULL,
+                    blob_key TEXT NOT NULL REFERENCES scorm_blobs(blob_key),
+                    PRIMARY KEY (package_id, path)
+                ) WITHOUT ROWID;
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_ingest_jobs (
+                    id TEXT PRIMARY KEY,
+                    course_id TEXT NOT NULL,
+                    archive_path TEXT NOT NULL,
+                    archive_size INTEGER NOT NULL,
+                    archive_sha256 TEXT NOT NULL,
+                    status TEXT NOT NULL CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+                    phase TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    files_total INTEGER NOT NULL DEFAULT 0,
+                    files_done INTEGER NOT NULL DEFAULT 0,
+                    bytes_total INTEGER NOT NULL DEFAULT 0,
+                    bytes_done INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    available_at TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+                """
+            )
+            # The manifest's organization and resource index, written at
+            # ingest so launch and navigation never parse the XML again.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_items (
+                    package_id INTEGER NOT NULL REFERENCES scorm_packages(id) ON DELETE CASCADE,
+                    position INTEGER NOT NULL,
+                    identifier TEXT NOT NULL,
+                    organization TEXT,
+                    parent_identifier TEXT,
+                    depth INTEGER NOT NULL,
+                    title TEXT,
+                    resource_identifier TEXT,
+                    parameters TEXT,
+                    launch_path TEXT,
+                    is_visible INTEGER NOT NULL DEFAULT 1,
+                    PRIMARY KEY (package_id, position)
+                ) WITHOUT ROWID;
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_scorm_items_identifier
+                    ON scorm_items (package_id, identifier);
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_resources (
+                    package_id INTEGER NOT NULL REFERENCES scorm_packages(id) ON DELETE CASCADE,
+                    identifier TEXT NOT NULL,
+                    resource_type TEXT,
+                    scorm_type TEXT,
+                    href TEXT,
+                    PRIMARY KEY (package_id, identifier)
+                ) WITHOUT ROWID;
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_resource_files (
+                    package_id INTEGER NOT NULL REFERENCES scorm_packages(id) ON DELETE CASCADE,
+                    resource_identifier TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    PRIMARY KEY (package_id, resource_identifier, path)
+                ) WITHOUT ROWID;
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_resource_dependencies (
+                    package_id INTEGER NOT NULL REFERENCES scorm_packages(id) ON DELETE CASCADE,
+                    resource_identifier TEXT NOT NULL,
+                    dependency_identifier TEXT NOT NULL,
+                    PRIMARY KEY (package_id, resource_identifier, dependency_identifier)
+                ) WITHOUT ROWID;
+                """
+            )
+            # Queued jobs become available at available_at; running ones hold a
+            # lease until it, after which another dispatcher may reclaim them.
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_scorm_ingest_jobs_available
+                    ON scorm_ingest_jobs (status, available_at);
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scorm_settings (
+                    name TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                """
+            )
+            # Every worker on this database signs attempt tokens with the same
+            # key; whichever starts first picks it.
+            conn.execute(
+                "INSERT OR IGNORE INTO scorm_settings (name, value) VALUES ('attempt_token_key', ?);",
+                (secrets.token_hex(32),),
+            )
             conn.commit()
 
+    def _load_token_key(self) -> bytes:
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT value FROM scorm_settings WHERE name = 'attempt_token_key';").fetchone()
+        return bytes.fromhex(row[0])
+
     @contextmanager
     def get_connection(self) -> Iterator[sqlite3.Connection]:
-        conn = sqlite3.connect(self._path, **self._connection_kwargs)
-        conn.row_factory = sqlite3.Row
-        try:
+        with self._pool.connection() as conn:
             yield conn
-        finally:
-            conn.close()
+
+    @staticmethod
+    def _insert_package(
+        conn: sqlite3.Connection,
+        course_id: str,
+        version: str,
+        entry_point: str,
+        object_prefix: str,
+        manifest: str,
+        files: Mapping[str, str] | None = None,
+        index: ManifestDetails | None = None,
+    ) -> int:
+        now = datetime.utcnow().isoformat()
+        cursor = conn.execute(
+            """
+            INSERT INTO scorm_packages (course_id, version, entry_point, object_prefix, manifest, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?);
+            """,
+            (course_id, version, entry_point, object_prefix, manifest, now, now),
+        )
+        package_id = int(cursor.lastrowid)
+        if files:
+            conn.executemany(
+                "INSERT INTO scorm_package_files (package_id, path, blob_key) VALUES (?, ?, ?);",
+                [(package_id, path, blob_key) for path, blob_key in files.items()],
+            )
+        if index is not None:
+            Database._insert_manifest_index(conn, package_id, index)
+        return package_id
+
+    @staticmethod
+    def _insert_manifest_index(conn: sqlite3.Connection, package_id: int, index: ManifestDetails) -> None:
+        conn.executemany(
+            """
+            INSERT INTO scorm_items (
+                package_id, position, identifier, organization, parent_identifier, depth,
+                title, resource_identifier, parameters, launch_path, is_visible
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+            """,
+            [
+                (
+                    package_id,
+                    position,
+                    item.identifier,
+                    item.organization,
+                    item.parent,
+                    item.depth,
+                    item.title,
+                    item.identifierref,
+                    item.parameters,
+                    index.launch_path(item),
+                    int(item.is_visible),
+                )
+                for position, item in enumerate(index.items)
+            ],
+        )
+        resources = index.resources.values()
+        conn.executemany(
+            """
+            INSERT INTO scorm_resources (package_id, identifier, resource_type, scorm_type, href)
+            VALUES (?, ?, ?, ?, ?);
+            """,
+            [(package_id, r.identifier, r.resource_type, r.scorm_type, r.href) for r in resources],
+        )
+        # Manifests in the wild repeat files and dependencies; keep one of each.
+        conn.executemany(
+            "INSERT OR IGNORE INTO scorm_resource_files (package_id, resource_identifier, path) VALUES (?, ?, ?);",
+            [(package_id, r.identifier, path) for r in resources for path in r.files],
+        )
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO scorm_resource_dependencies (package_id, resource_identifier, dependency_identifier)
+            VALUES (?, ?, ?);
+            """,
+            [(package_id, r.identifier, ref) for r in resources for ref in r.dependencies],
+        )
 
     def insert_package(
         self,
@@ -302,54 +1066,634 @@ class Database:
         entry_point: str,
         object_prefix: str,
         manifest: str,
+        files: Mapping[str, str] | None = None,
+        index: ManifestDetails | None = None,
     ) -> int:
+        """Insert a package with, when given, its path -> blob key map and manifest index."""
+
+        with self.get_connection() as conn:
+            package_id = self._insert_package(
+                conn, course_id, version, entry_point, object_prefix, manifest, files, index
+            )
+            conn.commit()
+        self.forget_latest_package(course_id)
+        return package_id
+
+    def existing_blobs(self, blob_keys: Iterable[str]) -> Set[str]:
+        """Return the subset of ``blob_keys`` already recorded in the blob index."""
+
+        keys = list(blob_keys)
+        found: Set[str] = set()
+        with self.get_connection() as conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"SELECT blob_key FROM scorm_blobs WHERE blob_key IN ({placeholders});", chunk
+                )
+                found.update(row[0] for row in rows)
+        return found
+
+    def record_blobs(self, blobs: Iterable[Tuple[str, str, int, str | None]]) -> None:
+        """Record uploaded ``(blob_key, sha256, size, content_type)`` blobs; duplicates are ignored."""
+
         now = datetime.utcnow().isoformat()
         with self.get_connection() as conn:
-            cursor = conn.execute(
+            conn.executemany(
                 """
-                INSERT INTO scorm_packages (course_id, version, entry_point, object_prefix, manifest, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?);
+                INSERT OR IGNORE INTO scorm_blobs (blob_key, sha256, size, content_type, created_at)
+                VALUES (?, ?, ?, ?, ?);
                 """,
-                (course_id, version, entry_point, object_prefix, manifest, now, now),
+                [(*blob, now) for blob in blobs],
             )
             conn.commit()
-            return int(cursor.lastrowid)
+
+    def resolve_package_file(self, package_id: int, object_prefix: str, path: str) -> str | None:
+        """Return the storage key for ``path`` within a package.
+
+        Content-addressed packages resolve through ``scorm_package_files``;
+        packages uploaded before it keep their assets under ``object_prefix``.
+        """
+
+        with self.get_connection() as conn:
+            row = conn.execute(PACKAGE_FILE_SQL, (package_id, path)).fetchone()
+            if row is not None:
+                return str(row[0])
+            mapped = conn.execute(
+                "SELECT 1 FROM scorm_package_files WHERE package_id = ? LIMIT 1;", (package_id,)
+            ).fetchone()
+        return None if mapped else f"{object_prefix}/{path}"
+
+    def list_package_items(self, package_id: int) -> List[sqlite3.Row]:
+        """Return the package's organization items in manifest order."""
+
+        with self.get_connection() as conn:
+            return conn.execute(PACKAGE_ITEMS_SQL, (package_id,)).fetchall()
+
+    def find_package_item(self, package_id: int, identifier: str) -> sqlite3.Row | None:
+        with self.get_connection() as conn:
+            return conn.execute(PACKAGE_ITEM_SQL, (package_id, identifier)).fetchone()
+
+    def list_resource_files(self, package_id: int, resource_identifier: str) -> List[str]:
+        """Return every file a resource needs, following its dependencies."""
+
+        with self.get_connection() as conn:
+            rows = conn.execute(RESOURCE_FILES_SQL, (resource_identifier, package_id, package_id))
+            return [str(row[0]) for row in rows]
+
+    def find_attempt(self, token: str) -> sqlite3.Row | None:
+        if self._attempts.is_pending(token):
+            self._attempts.flush()
+        with self.get_connection() as conn:
+            return conn.execute(ATTEMPT_SQL, (token,)).fetchone()
+
+    def lookup_attempt(self, token: str) -> CachedAttempt | None:
+        """Return what authenticating ``token`` needs, from the attempt cache when possible.
+
+        Callers check :meth:`CachedAttempt.expired` themselves; an expired
+        attempt is still returned so they can tell it from an unknown one.
+        """
+
+        return self._attempt_cache.lookup(token, self._load_attempt)
+
+    def issue_attempt_token(self, package_id: int, expires_at: datetime) -> str:
+        """Return a new attempt token that any worker can verify before its row exists."""
+
+        return self._token_signer.issue(package_id, expires_at)
+
+    def _load_attempt(self, token: str) -> CachedAttempt | None:
+        row = self.find_attempt(token)
+        if row is None:
+            # Launched through another worker whose queued row has not been
+            # written yet; the token itself vouches for the attempt.
+            claims = self._token_signer.verify(token)
+            if claims is None:
+                return None
+            package_id, expires_at = claims
+            with self.get_connection() as conn:
+                package = conn.execute(PACKAGE_PREFIX_SQL, (package_id,)).fetchone()
+            if package is None:
+                return None
+            return CachedAttempt(None, package_id, package["object_prefix"], expires_at)
+        return CachedAttempt(
+            attempt_id=int(row["id"]),
+            package_id=int(row["package_id"]),
+            object_prefix=row["object_prefix"],
+            expires_at=datetime.fromisoformat(row["expires_at"]),
+        )
+
+    def _cache_attempt(self, package_id: int, token: str, expires_at: datetime, object_prefix: str | None) -> None:
+        if object_prefix is not None:
+            self._attempt_cache.put(token, CachedAttempt(None, package_id, object_prefix, expires_at))
 
     def find_latest_package(self, course_id: str) -> sqlite3.Row | None:
+        """Return the course's newest package, served from the in-process index when fresh."""
+
+        now = time.monotonic()
+        with self._latest_lock:
+            entry = self._latest_packages.get(course_id)
+            generation = self._latest_generation
+            if entry is not None and now - entry[0] < self._latest_ttl:
+                self._latest_hits += 1
+                return entry[1]
+            self._latest_misses += 1
         with self.get_connection() as conn:
-            cursor = conn.execute(
+            row = conn.execute(LATEST_PACKAGE_SQL, (course_id,)).fetchone()
+        with self._latest_lock:
+            # Skip caching a row read while a package insert was invalidating.
+            if generation == self._latest_generation:
+                self._latest_packages[course_id] = (now, row)
+        return row
+
+    def forget_latest_package(self, course_id: str | None = None) -> None:
+        """Drop the indexed latest package for ``course_id``, or for every course."""
+
+        with self._latest_lock:
+            self._latest_generation += 1
+            if course_id is None:
+                self._latest_packages.clear()
+            else:
+                self._latest_packages.pop(course_id, None)
+
+    def create_attempt(
+        self,
+        package_id: int,
+        token: str,
+        expires_at: datetime,
+        learner_id: int | None = None,
+        item_identifier: str | None = None,
+        object_prefix: str | None = None,
+    ) -> None:
+        now = datetime.utcnow().isoformat()
+        with self.get_connection() as conn:
+            conn.execute(INSERT_ATTEMPT_SQL, (package_id, token, expires_at.isoformat(), now, learner_id, item_identifier))
+            conn.commit()
+        self._cache_attempt(package_id, token, expires_at, object_prefix)
+
+    def queue_attempt(
+        self,
+        package_id: int,
+        token: str,
+        expires_at: datetime,
+        learner_id: int | None = None,
+        item_identifier: str | None = None,
+        object_prefix: str | None = None,
+    ) -> None:
+        """Record an attempt through the write-behind queue.
+
+        The row is inserted within ``scorm_attempt_flush_seconds``; looking
+        the token up with :meth:`find_attempt` before then flushes it first.
+        Given the package's ``object_prefix``, the attempt is cached right
+        away so :meth:`lookup_attempt` never has to wait for the row.
+        """
+
+        self._attempts.add(
+            package_id, token, expires_at.isoformat(), datetime.utcnow().isoformat(), learner_id, item_identifier
+        )
+        self._cache_attempt(package_id, token, expires_at, object_prefix)
+
+    def flush_attempts(self) -> int:
+        return self._attempts.flush()
+
+    def close(self) -> None:
+        """Stop the attempt writer after flushing what it still holds."""
+
+        self._attempts.stop()
+
+    def launch_stats(self) -> Dict[str, Any]:
+        with self._latest_lock:
+            index = {
+                "courses": len(self._latest_packages),
+                "hits": self._latest_hits,
+                "misses": self._latest_misses,
+            }
+        return {
+            "package_index": index,
+            "attempt_writer": self._attempts.stats(),
+            "attempt_cache": self._attempt_cache.stats(),
+        }
+
+    def sweep_expired_attempts(self, cutoff: datetime, batch_size: int, archive: bool) -> int:
+        """Remove up to ``batch_size`` attempts that expired before ``cutoff``.
+
+        Runs as one short write transaction; when ``archive`` is set the rows
+        are copied to ``scorm_attempts_archive`` first. The attempts' CMI
+        snapshots and any log rows not yet compacted are deleted with them.
+        Returns the number of attempts removed.
+        """
+
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(EXPIRED_ATTEMPTS_SQL, (_utcnow(cutoff), batch_size)).fetchall()
+            if not rows:
+                conn.rollback()
+                return 0
+            ids = [row[0] for row in rows]
+            tokens = [row[1] for row in rows]
+            placeholders = ", ".join("?" for _ in ids)
+            if archive:
+                conn.execute(
+                    f"""
+                    INSERT OR IGNORE INTO scorm_attempts_archive
+                        (id, package_id, attempt_token, learner_id, item_identifier, expires_at, created_at, archived_at)
+                    SELECT id, package_id, attempt_token, learner_id, item_identifier, expires_at, created_at, ?
+                    FROM scorm_attempts
+                    WHERE id IN ({placeholders});
+                    """,
+                    (_utcnow(), *ids),
+                )
+            conn.execute(f"DELETE FROM scorm_attempts WHERE id IN ({placeholders});", ids)
+            conn.execute(f"DELETE FROM scorm_cmi_snapshots WHERE attempt_token IN ({placeholders});", tokens)
+            conn.execute(f"DELETE FROM scorm_cmi_log WHERE attempt_token IN ({placeholders});", tokens)
+            conn.commit()
+            return len(ids)
+
+    def count_expired_attempts(self, cutoff: datetime) -> int:
+        with self.get_connection() as conn:
+            return int(conn.execute(EXPIRED_ATTEMPT_COUNT_SQL, (_utcnow(cutoff),)).fetchone()[0])
+
+    def count_attempts(self) -> int:
+        with self.get_connection() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM scorm_attempts;").fetchone()[0])
+
+    def write_cmi_values(self, rows: Sequence[Tuple[str, str, str, str]]) -> List[Tuple[int, int]]:
+        """Append ``(attempt_token, element, value, committed_at)`` rows to the CMI log in one transaction.
+
+        The attempts' progress summaries are folded in the same transaction.
+        Returns the ``(learner_id, course_id)`` pairs whose progress may have
+        changed.
+        """
+
+        # attempt_token -> {progress field: (value, committed_at)}, and the
+        # attempt's latest commit time in the batch.
+        folds: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        latest: Dict[str, str] = {}
+        for token, element, value, committed_at in rows:
+            fold = folds.setdefault(token, {})
+            field = PROGRESS_ELEMENTS.get(element)
+            if field is not None and (field not in fold or committed_at >= fold[field][1]):
+                fold[field] = (value, committed_at)
+            if committed_at > latest.get(token, ""):
+                latest[token] = committed_at
+        fold_params = [
+            (*(part for field in PROGRESS_FIELDS for part in fold.get(field, (None, None))), latest[token], token)
+            for token, fold in folds.items()
+        ]
+
+        # Commits are authenticated from the attempt cache, which knows
+        # attempts still queued for writing; the progress fold needs their rows.
+        self._attempts.flush()
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(APPEND_CMI_LOG_SQL, rows)
+                conn.executemany(FOLD_ATTEMPT_PROGRESS_SQL, fold_params)
+                tokens = list(folds)
+                pairs: Set[Tuple[int, int]] = set()
+                for start in range(0, len(tokens), 500):
+                    chunk = tokens[start : start + 500]
+                    placeholders = ", ".join("?" for _ in chunk)
+                    pairs.update(
+                        (int(row[0]), int(row[1]))
+                        for row in conn.execute(
+                            "SELECT DISTINCT learner_id, course_id FROM scorm_attempt_progress "
+                            f"WHERE attempt_token IN ({placeholders});",
+                            chunk,
+                        )
+                    )
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        return sorted(pairs)
+
+    @staticmethod
+    def _compact_cmi_segment(conn: sqlite3.Connection, segment_rows: int) -> Tuple[int, int]:
+        """Fold the oldest ``segment_rows`` log rows into snapshots and trim them; call inside a write transaction.
+
+        Segments follow log ids, which are flush order, not commit order: a
+        batch flushed late by another worker can be older than values folded
+        already. Each element therefore keeps its commit time and only a
+        value committed at or after it replaces it.
+        """
+
+        segment = conn.execute(CMI_LOG_SEGMENT_SQL, (segment_rows,)).fetchall()
+        if not segment:
+            return 0, 0
+        by_attempt: Dict[str, List[sqlite3.Row]] = {}
+        for row in segment:
+            by_attempt.setdefault(row["attempt_token"], []).append(row)
+
+        snapshots = []
+        for token, rows in by_attempt.items():
+            current = conn.execute(CMI_SNAPSHOT_SQL, (token,)).fetchone()
+            state: Dict[str, List[str]] = json.loads(current["state"]) if current else {}
+            updated_at = current["updated_at"] if current else ""
+            for row in sorted(rows, key=lambda r: (r["committed_at"], r["id"])):
+                _apply_cmi_value(state, row["element"], row["value"], row["committed_at"])
+                updated_at = max(updated_at, row["committed_at"])
+            snapshots.append(
+                (token, json.dumps(state, separators=(",", ":")), len(state), rows[-1]["id"], updated_at)
+            )
+        conn.executemany(UPSERT_CMI_SNAPSHOT_SQL, snapshots)
+        conn.execute("DELETE FROM scorm_cmi_log WHERE id <= ?;", (segment[-1]["id"],))
+        return len(segment), len(snapshots)
+
+    def compact_cmi_log(self, segment_rows: int) -> Tuple[int, int]:
+        """Compact one log segment in its own transaction; returns ``(rows folded, snapshots written)``."""
+
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = self._compact_cmi_segment(conn, segment_rows)
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        return result
+
+    def count_cmi_log(self) -> int:
+        with self.get_connection() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM scorm_cmi_log;").fetchone()[0])
+
+    def load_cmi_state(self, attempt_token: str) -> Dict[str, str]:
+        """Latest stored value of every CMI element of an attempt.
+
+        Reads the attempt's snapshot row, then whatever of its log the
+        compactor has not folded yet (nothing, in steady state), in one read
+        transaction so a concurrent compaction cannot hide either. The log
+        overrides the snapshot only with values committed at or after the
+        snapshot's, as in compaction.
+        """
+
+        with self.get_connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute(CMI_SNAPSHOT_SQL, (attempt_token,)).fetchone()
+                state: Dict[str, List[str]] = json.loads(row["state"]) if row else {}
+                for element, value, committed_at in conn.execute(CMI_LOG_TAIL_SQL, (attempt_token,)):
+                    _apply_cmi_value(state, element, value, committed_at)
+            finally:
+                conn.rollback()
+        return {element: value for element, (value, _) in state.items()}
+
+    def derive_progress(self, pairs: Sequence[Tuple[int, int]]) -> List[sqlite3.Row]:
+        """Progress rows of ``pairs`` from their attempt summaries, ready for :func:`write_learner_progress`."""
+
+        rows: List[sqlite3.Row] = []
+        with self.get_connection() as conn:
+            for pair in pairs:
+                rows.extend(conn.execute(PAIR_PROGRESS_SQL, pair))
+        return rows
+
+    def rebuild_progress(self, dry_run: bool = False) -> List[sqlite3.Row]:
+        """Re-derive every attempt summary from stored CMI values and return every progress row.
+
+        The whole CMI log is compacted first so every snapshot is current.
+        Summaries of attempts that have since been swept are kept as they
+        are. With ``dry_run`` the compaction and summaries are rolled back
+        after deriving the rows.
+        """
+
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                while self._compact_cmi_segment(conn, 10_000)[0]:
+                    pass
+                conn.execute(REBUILD_ATTEMPT_PROGRESS_SQL)
+                rows = conn.execute(DERIVE_PROGRESS_SQL).fetchall()
+            except BaseException:
+                conn.rollback()
+                raise
+            if dry_run:
+                conn.rollback()
+            else:
+                conn.commit()
+        return rows
+
+    # -- SCORM ingestion jobs ------------------------------------------------
+    #
+    # A job is owned by whoever moved it to ``running`` for its current
+    # attempt; every write below is conditioned on (id, attempts, running) so
+    # a worker whose lease was reclaimed cannot overwrite the new owner.
+
+    _OWNED = "id = ? AND attempts = ? AND status = 'running'"
+
+    def create_ingest_job(
+        self,
+        job_id: str,
+        course_id: str,
+        archive_path: str,
+        archive_size: int,
+        archive_sha256: str,
+        max_attempts: int,
+    ) -> None:
+        now = _utcnow()
+        with self.get_connection() as conn:
+            conn.execute(
                 """
-                SELECT * FROM scorm_packages
-                WHERE course_id = ?
-                ORDER BY created_at DESC, id DESC
-                LIMIT 1;
+                INSERT INTO scorm_ingest_jobs (
+                    id, course_id, archive_path, archive_size, archive_sha256, status, phase,
+                    max_attempts, available_at, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, 'queued', 'queued', ?, ?, ?, ?);
                 """,
-                (course_id,),
+                (job_id, course_id, archive_path, archive_size, archive_sha256, max_attempts, now, now, now),
             )
-            return cursor.fetchone()
+            conn.commit()
 
-    def create_attempt(self, package_id: int, token: str, expires_at: datetime) -> None:
-        now = datetime.utcnow().isoformat()
+    def claim_ingest_job(self, lease_seconds: float) -> sqlite3.Row | None:
+        """Take the oldest available job (queued, or running with an expired lease)."""
+
+        now = datetime.utcnow()
         with self.get_connection() as conn:
-            conn.execute(
+            row = conn.execute(
                 """
-                INSERT INTO scorm_attempts (package_id, attempt_token, expires_at, created_at)
-                VALUES (?, ?, ?, ?);
+                UPDATE scorm_ingest_jobs
+                SET status = 'running', attempts = attempts + 1, available_at = ?, updated_at = ?
+                WHERE id = (
+                    SELECT id FROM scorm_ingest_jobs
+                    WHERE status IN ('queued', 'running') AND available_at <= ? AND attempts < max_attempts
+                    ORDER BY available_at
+                    LIMIT 1
+                )
+                RETURNING id, attempts, max_attempts, archive_path;
                 """,
-                (package_id, token, expires_at.isoformat(), now),
+                (_utcnow(now + timedelta(seconds=lease_seconds)), _utcnow(now), _utcnow(now)),
+            ).fetchone()
+            conn.commit()
+            return row
+
+    def expire_ingest_jobs(self) -> list[str]:
+        """Fail running jobs whose lease expired on their last attempt; return their archive paths."""
+
+        now = _utcnow()
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                """
+                UPDATE scorm_ingest_jobs
+                SET status = 'failed', phase = 'failed', error = 'Worker stopped responding', updated_at = ?
+                WHERE status = 'running' AND available_at <= ? AND attempts >= max_attempts
+                RETURNING archive_path;
+                """,
+                (now, now),
+            ).fetchall()
+            conn.commit()
+            return [str(row[0]) for row in rows]
+
+    def heartbeat_ingest_job(self, job_id: str, attempt: int, lease_seconds: float) -> bool:
+        lease = _utcnow(datetime.utcnow() + timedelta(seconds=lease_seconds))
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                f"UPDATE scorm_ingest_jobs SET available_at = ? WHERE {self._OWNED};", (lease, job_id, attempt)
             )
             conn.commit()
+            return cursor.rowcount == 1
+
+    def update_ingest_progress(
+        self,
+        job_id: str,
+        attempt: int,
+        phase: str,
+        files_total: int,
+        files_done: int,
+        bytes_total: int,
+        bytes_done: int,
+    ) -> bool:
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                f"""
+                UPDATE scorm_ingest_jobs
+                SET phase = ?, files_total = ?, files_done = ?, bytes_total = ?, bytes_done = ?, updated_at = ?
+                WHERE {self._OWNED};
+                """,
+                (phase, files_total, files_done, bytes_total, bytes_done, _utcnow(), job_id, attempt),
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def complete_ingest_job(
+        self,
+        job_id: str,
+        attempt: int,
+        package: Mapping[str, str],
+        files: Mapping[str, str],
+        result: str,
+        index: ManifestDetails | None = None,
+    ) -> bool:
+        """Insert the package and mark the job succeeded with ``result`` in one transaction.
+
+        Returns False (inserting nothing) if the attempt no longer owns the job.
+        """
+
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            owned = conn.execute(f"SELECT 1 FROM scorm_ingest_jobs WHERE {self._OWNED};", (job_id, attempt)).fetchone()
+            if owned is None:
+                conn.rollback()
+                return False
+            self._insert_package(conn, files=files, index=index, **package)
+            conn.execute(
+                f"""
+                UPDATE scorm_ingest_jobs
+                SET status = 'succeeded', phase = 'done', result = ?, error = NULL, updated_at = ?
+                WHERE {self._OWNED};
+                """,
+                (result, _utcnow(), job_id, attempt),
+            )
+            conn.commit()
+        self.forget_latest_package(package["course_id"])
+        return True
+
+    def fail_ingest_job(self, job_id: str, attempt: int, error: str, retry_delay: float | None) -> str | None:
+        """Record a failed attempt; requeue after ``retry_delay`` while attempts remain.
+
+        Returns the job's new status, or None if the attempt no longer owns it.
+        """
+
+        now = datetime.utcnow()
+        retry_at = _utcnow(now + timedelta(seconds=retry_delay or 0))
+        with self.get_connection() as conn:
+            row = conn.execute(
+                f"""
+                UPDATE scorm_ingest_jobs
+                SET status = CASE WHEN ? AND attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                    phase = CASE WHEN ? AND attempts < max_attempts THEN 'retrying' ELSE 'failed' END,
+                    error = ?, available_at = ?, updated_at = ?
+                WHERE {self._OWNED}
+                RETURNING status;
+                """,
+                (retry_delay is not None, retry_delay is not None, error, retry_at, _utcnow(now), job_id, attempt),
+            ).fetchone()
+            conn.commit()
+            return None if row is None else str(row[0])
+
+    def release_ingest_job(self, job_id: str, attempt: int) -> None:
+        """Hand back a claimed job that never started, without using up an attempt."""
+
+        now = _utcnow()
+        with self.get_connection() as conn:
+            conn.execute(
+                f"""
+                UPDATE scorm_ingest_jobs
+                SET status = 'queued', attempts = attempts - 1, available_at = ?, updated_at = ?
+                WHERE {self._OWNED};
+                """,
+                (now, now, job_id, attempt),
+            )
+            conn.commit()
+
+    def get_ingest_job(self, job_id: str) -> sqlite3.Row | None:
+        with self.get_connection() as conn:
+            return conn.execute("SELECT * FROM scorm_ingest_jobs WHERE id = ?;", (job_id,)).fetchone()
+
+
+def _apply_cmi_value(state: Dict[str, List[str]], element: str, value: str, committed_at: str) -> None:
+    """Last writer wins by commit time; of equal times, the value applied last."""
+
+    current = state.get(element)
+    if current is None or committed_at >= current[1]:
+        state[element] = [value, committed_at]
+
+
+def _utcnow(moment: datetime | None = None) -> str:
+    # Fixed-width timestamps so the job table's text comparisons order correctly.
+    return (moment or datetime.utcnow()).isoformat(timespec="microseconds")
 
 
 _database_instance: Database | None = None
+_database_lock = threading.Lock()
 
 
 def get_database() -> Database:
     global _database_instance
     if _database_instance is None:
-        settings = get_settings()
-        _database_instance = Database(settings.database_url)
+        with _database_lock:
+            if _database_instance is None:
+                settings = get_settings()
+                _database_instance = Database(settings.database_url)
     return _database_instance
 
 
-__all__ = ["Database", "get_database"]
+def close_database() -> None:
+    """Flush queued writes of the shared :class:`Database`, if one was created."""
+
+    global _database_instance
+    with _database_lock:
+        database, _database_instance = _database_instance, None
+    if database is not None:
+        database.close()
+
+
+__all__ = [
+    "DB_PATH",
+    "Database",
+    "close_database",
+    "get_connection",
+    "get_pool",
+    "get_database",
+    "initialize_database",
+    "learner_course_exists",
+    "load_learner_progress",
+    "seed_demo_data",
+    "write_learner_progress",
+]
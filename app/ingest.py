@@ -0,0 +1,388 @@
+"""Background ingestion of uploaded SCORM packages.
+
+The upload route only stages the archive and records a ``queued`` row in
+``scorm_ingest_jobs``. A dispatcher thread in the API process claims queued
+jobs and runs :func:`run_ingest_job` in a pool of worker processes, which
+validates the archive, hashes its members, uploads new blobs and records the
+package, reporting progress on the job row as it goes.
+
+Claims are leases: a running job's ``available_at`` is pushed forward by a
+heartbeat while its worker is alive. If the worker (or the whole service)
+dies, the lease runs out and the next dispatcher claims the job again as a
+new attempt. Transient failures are retried with backoff up to
+``SCORM_INGEST_MAX_ATTEMPTS``; invalid packages fail immediately.
+"""
+from __future__ import annotations
+
+import logging
+import mimetypes
+import multiprocessing
+import posixpath
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from .config import get_settings
+from .database import Database, get_database
+from .schemas import UploadResponse
+from .scorm import ManifestDetails, ManifestNotFoundError, ManifestParseError, read_manifest
+from .storage import BatchUploadError, Storage, UploadItem, get_storage
+from .uploads import BLOB_PREFIX, PackageTooLargeError, blob_key, check_uncompressed_size, hash_member
+from .workers import PeriodicWorker, SharedWorker
+
+logger = logging.getLogger(__name__)
+
+
+class IngestError(ValueError):
+    """Raised for packages that can never be ingested; the job is not retried."""
+
+
+class LeaseLostError(RuntimeError):
+    """Raised when a worker finds its job was reclaimed by another attempt."""
+
+
+class _Progress:
+    """Thread-safe progress counters flushed to the job row at most every ``interval`` seconds."""
+
+    def __init__(self, db: Database, job_id: str, attempt: int, interval: float = 0.5) -> None:
+        self._db = db
+        self._job_id = job_id
+        self._attempt = attempt
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+        self.phase = "validating"
+        self.files_total = self.files_done = 0
+        self.bytes_total = self.bytes_done = 0
+
+    def start(self, phase: str, files_total: int = 0, bytes_total: int = 0) -> None:
+        with self._lock:
+            self.phase = phase
+            self.files_total, self.bytes_total = files_total, bytes_total
+            self.files_done = self.bytes_done = 0
+        self.flush(force=True)
+
+    def set_phase(self, phase: str) -> None:
+        with self._lock:
+            self.phase = phase
+        self.flush(force=True)
+
+    def advance(self, files: int, size: int) -> None:
+        with self._lock:
+            self.files_done += files
+            self.bytes_done += size
+        self.flush()
+
+    def flush(self, force: bool = False) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._flushed_at < self._interval:
+                return
+            self._flushed_at = now
+            state = (self.phase, self.files_total, self.files_done, self.bytes_total, self.bytes_done)
+        if not self._db.update_ingest_progress(self._job_id, self._attempt, *state):
+            raise LeaseLostError(f"Ingest job {self._job_id} attempt {self._attempt} was reclaimed")
+
+
+class _Heartbeat:
+    """Keep extending a job's lease from a background thread while the attempt runs."""
+
+    def __init__(self, db: Database, job_id: str, attempt: int, lease_seconds: float) -> None:
+        self._db = db
+        self._job_id = job_id
+        self._attempt = attempt
+        self._lease_seconds = lease_seconds
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"ingest-heartbeat-{job_id}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._lease_seconds / 3):
+            try:
+                if not self._db.heartbeat_ingest_job(self._job_id, self._attempt, self._lease_seconds):
+                    return
+            except Exception:  # pragma: no cover - best effort; the lease simply lapses
+                logger.exception("Heartbeat for ingest job %s failed", self._job_id)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+
+def ingest_archive(
+    db: Database,
+    storage: Callable[[], Storage],
+    course_id: str,
+    path: Path,
+    progress: _Progress,
+) -> Tuple[Dict[str, str], Dict[str, str], Dict[str, int], ManifestDetails]:
+    """Validate, hash and upload a staged archive.
+
+    ``storage`` is only called once the archive has been validated. Returns
+    the package columns, the path -> blob key map, upload stats and the
+    parsed manifest index; recording the package is left to the caller so it
+    can be made atomic with completing the job.
+    """
+
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as exc:
+        raise IngestError("Upload is not a valid zip archive") from exc
+
+    with archive:
+        try:
+            check_uncompressed_size(archive)
+            manifest = read_manifest(archive)
+        except (PackageTooLargeError, ManifestNotFoundError, ManifestParseError) as exc:
+            raise IngestError(str(exc)) from exc
+
+        members = [item for item in archive.infolist() if not item.is_dir()]
+        for item in members:
+            name = posixpath.normpath(item.filename)
+            if name.startswith("../") or "..\\" in name:
+                raise IngestError("Archive contains unsafe paths")
+
+        names = {posixpath.normpath(item.filename) for item in members}
+        entry_file = manifest.entry_point.split("?", 1)[0].split("#", 1)[0]
+        if "://" not in entry_file and entry_file not in names:
+            raise IngestError(f"Manifest entry point {entry_file} is not in the archive")
+        declared = {path for resource in manifest.resources.values() for path in resource.files if "://" not in path}
+        if missing_declared := declared - names:
+            logger.warning(
+                "Manifest for course %s declares %d file(s) missing from the archive, e.g. %s",
+                course_id,
+                len(missing_declared),
+                min(missing_declared),
+            )
+
+        progress.start("hashing", len(members), sum(item.file_size for item in members))
+        files: Dict[str, str] = {}
+        blobs: Dict[str, Tuple[zipfile.ZipInfo, str, str | None]] = {}
+        for item in members:
+            name = posixpath.normpath(item.filename)
+            sha256 = hash_member(archive, item)
+            key = blob_key(sha256, name)
+            files[name] = key
+            if key not in blobs:
+                mime_type, _ = mimetypes.guess_type(name)
+                blobs[key] = (item, sha256, mime_type)
+            progress.advance(1, item.file_size)
+
+        stored = db.existing_blobs(blobs)
+        missing = [key for key in blobs if key not in stored]
+        uploads = [
+            UploadItem(
+                key=key,
+                open=partial(archive.open, blobs[key][0]),
+                size=blobs[key][0].file_size,
+                content_type=blobs[key][2],
+            )
+            for key in missing
+        ]
+        progress.start("uploading", len(uploads), sum(item.size for item in uploads))
+        try:
+            report = storage().upload_many(uploads, progress=lambda item: progress.advance(1, item.size))
+        except BatchUploadError as exc:
+            raise RuntimeError(str(exc)) from exc
+        logger.info(
+            "Uploaded %d new objects (%d bytes) of %d files for course %s in %.2fs: "
+            "%.1f objects/s, %.2f MiB/s, %d retries",
+            report.objects,
+            report.bytes,
+            len(files),
+            course_id,
+            report.seconds,
+            report.objects_per_second,
+            report.megabytes_per_second,
+            report.retries,
+        )
+
+        progress.set_phase("recording")
+        db.record_blobs((key, blobs[key][1], blobs[key][0].file_size, blobs[key][2]) for key in missing)
+
+    package = {
+        "course_id": course_id,
+        "version": manifest.version,
+        "entry_point": manifest.entry_point,
+        "object_prefix": BLOB_PREFIX,
+        "manifest": manifest.manifest_xml,
+    }
+    stats = {"files": len(files), "new_blobs": report.objects, "uploaded_bytes": report.bytes}
+    return package, files, stats, manifest
+
+
+def run_ingest_job(job_id: str, attempt: int) -> str:
+    """Run one attempt of an ingest job; executed in a worker process.
+
+    Returns the job's resulting status. Unexpected errors are recorded as a
+    retryable failure here rather than propagated to the dispatcher.
+    """
+
+    settings = get_settings()
+    db = get_database()
+    job = db.get_ingest_job(job_id)
+    if job is None:
+        return "missing"
+
+    archive_path = Path(job["archive_path"])
+    status: str | None
+    with _Heartbeat(db, job_id, attempt, settings.scorm_ingest_lease_seconds):
+        try:
+            progress = _Progress(db, job_id, attempt)
+            package, files, stats, manifest = ingest_archive(db, get_storage, job["course_id"], archive_path, progress)
+            result = UploadResponse(
+                **{key: package[key] for key in ("course_id", "version", "entry_point", "object_prefix")},
+                size_bytes=job["archive_size"],
+                sha256=job["archive_sha256"],
+                **stats,
+            )
+            completed = db.complete_ingest_job(job_id, attempt, package, files, result.json(), index=manifest)
+            status = "succeeded" if completed else None
+        except LeaseLostError:
+            status = None
+        except IngestError as exc:
+            status = db.fail_ingest_job(job_id, attempt, str(exc), retry_delay=None)
+        except Exception as exc:
+            logger.exception("Ingest job %s attempt %d failed", job_id, attempt)
+            backoff = settings.scorm_ingest_retry_backoff_seconds * 2 ** (attempt - 1)
+            status = db.fail_ingest_job(job_id, attempt, f"{type(exc).__name__}: {exc}", retry_delay=backoff)
+
+    if status is None:
+        logger.warning("Ingest job %s attempt %d lost its lease; leaving it to the new owner", job_id, attempt)
+        return "reclaimed"
+    if status in ("succeeded", "failed"):
+        archive_path.unlink(missing_ok=True)
+    return status
+
+
+class IngestDispatcher(PeriodicWorker):
+    """Claim queued ingest jobs and run them in a pool of worker processes."""
+
+    def __init__(self, processes: int, poll_seconds: float, lease_seconds: float) -> None:
+        super().__init__(poll_seconds, name="scorm-ingest-dispatcher", run_first=True)
+        self._processes = processes
+        self._lease_seconds = lease_seconds
+        self._inflight: Dict[Future[str], Tuple[str, int]] = {}
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Spawned workers do not inherit the API process's threads, sockets
+        # or pooled SQLite connections.
+        return ProcessPoolExecutor(max_workers=self._processes, mp_context=multiprocessing.get_context("spawn"))
+
+    def start(self) -> None:
+        with self._thread_lock:
+            if self._executor is None and not self._stopped.is_set():
+                self._executor = self._new_executor()
+        super().start()
+
+    def notify(self) -> None:
+        """Wake the dispatcher after a job was enqueued."""
+
+        self.wake()
+
+    def run_once(self) -> int:
+        """Fail lapsed final attempts, then claim jobs while worker processes are free."""
+
+        db = get_database()
+        expired = db.expire_ingest_jobs()
+        for path in expired:
+            Path(path).unlink(missing_ok=True)
+        claimed = 0
+        while len(self._inflight) < self._processes and not self._stopped.is_set():
+            job = db.claim_ingest_job(self._lease_seconds)
+            if job is None:
+                break
+            self._submit(db, str(job["id"]), int(job["attempts"]))
+            claimed += 1
+        with self._lock:
+            self._record_run(expired=len(expired), claimed=claimed)
+        return claimed
+
+    def _submit(self, db: Database, job_id: str, attempt: int) -> None:
+        assert self._executor is not None
+        try:
+            future = self._executor.submit(run_ingest_job, job_id, attempt)
+        except (BrokenProcessPool, RuntimeError):
+            db.release_ingest_job(job_id, attempt)
+            self._executor = self._new_executor()
+            return
+        with self._lock:
+            self._inflight[future] = (job_id, attempt)
+        future.add_done_callback(partial(self._finished, db))
+
+    def _finished(self, db: Database, future: Future[str]) -> None:
+        with self._lock:
+            job_id, attempt = self._inflight.pop(future)
+        if self._stopped.is_set():
+            # Shutting down: the database may already be closed. A job left
+            # running is reclaimed once its lease lapses.
+            return
+        if future.cancelled():
+            db.release_ingest_job(job_id, attempt)
+        elif (exc := future.exception()) is not None:
+            # The worker process died (or the result could not be returned);
+            # the job row still says running, so record the failed attempt.
+            logger.error("Ingest job %s attempt %d crashed: %s", job_id, attempt, exc)
+            settings = get_settings()
+            backoff = settings.scorm_ingest_retry_backoff_seconds * 2 ** (attempt - 1)
+            db.fail_ingest_job(job_id, attempt, f"Worker crashed: {exc!r}", retry_delay=backoff)
+            if isinstance(exc, BrokenProcessPool) and not self._stopped.is_set():
+                self._executor = self._new_executor()
+        elif future.result() == "succeeded":
+            # The package was inserted by the worker process; drop this
+            # process's cached latest package for the course.
+            job = db.get_ingest_job(job_id)
+            if job is not None:
+                db.forget_latest_package(str(job["course_id"]))
+        self.wake()
+
+    def stop(self) -> None:
+        """Stop claiming jobs; queued work is released and running work is left to its lease."""
+
+        super().stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _stats(self) -> Dict[str, Any]:
+        return {"processes": self._processes, "in_flight": len(self._inflight)}
+
+
+def _new_dispatcher() -> IngestDispatcher:
+    settings = get_settings()
+    return IngestDispatcher(
+        settings.scorm_ingest_processes,
+        settings.scorm_ingest_poll_seconds,
+        settings.scorm_ingest_lease_seconds,
+    )
+
+
+_dispatcher = SharedWorker(_new_dispatcher)
+
+
+def get_dispatcher() -> IngestDispatcher:
+    return _dispatcher.get()
+
+
+def stop_dispatcher() -> None:
+    _dispatcher.stop()
+
+
+__all__ = [
+    "IngestDispatcher",
+    "IngestError",
+    "LeaseLostError",
+    "get_dispatcher",
+    "ingest_archive",
+    "run_ingest_job",
+    "stop_dispatcher",
+]
@@ -0,0 +1,278 @@
+"""Local-disk storage backend for installs without S3/MinIO.
+
+``STORAGE_BACKEND=filesystem`` stores objects under ``STORAGE_ROOT``. A
+launched package's HTML and CSS are sent by the attempt-scoped content
+route through :meth:`FilesystemStorage.serve`; its other assets are
+redirected to this service's ``/scorm/objects`` route, with URLs signed with
+an HMAC and an expiry that the route checks itself. Objects are served with
+a strong ETag, ``Accept-Ranges``/``Range`` support and long-lived cache
+headers (content-addressed blobs never change, so they are marked
+``immutable``). Bodies go out through the ASGI zero-copy (``sendfile``) or
+path-send extension when the server offers one, and in ``pread`` chunks off
+the event loop otherwise.
+
+The signing key comes from ``STORAGE_SIGNING_KEY``; without it, a random key
+is created once in ``STORAGE_ROOT/.signing-key`` so every worker process on
+the host agrees on it.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import posixpath
+import re
+import secrets
+import shutil
+import stat
+import time
+from email.utils import formatdate
+from mimetypes import guess_type
+from pathlib import Path
+from typing import BinaryIO, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from .config import get_settings
+from .storage import _BLOB_KEY, Storage, UploadItem
+
+OBJECT_URL_PREFIX = "/scorm/objects"
+READ_CHUNK_BYTES = 256 * 1024
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FilesystemStorage(Storage):
+    """Stores objects as files under a root directory."""
+
+    def __init__(self, root: Path | str | None = None) -> None:
+        super().__init__()
+        settings = get_settings()
+        self._root = Path(root or settings.storage_root).resolve()
+        self._configured_key = settings.storage_signing_key
+        self._signing_key: bytes | None = None
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def warm_up(self) -> None:
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._key()
+
+    def _key(self) -> bytes:
+        if self._signing_key is None:
+            if self._configured_key:
+                self._signing_key = self._configured_key.encode("utf-8")
+            else:
+                self._signing_key = self._load_or_create_key(self._root / ".signing-key")
+        return self._signing_key
+
+    @staticmethod
+    def _load_or_create_key(path: Path) -> bytes:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            # Another worker may have created it but not written it yet.
+            for _ in range(50):
+                key = path.read_bytes()
+                if key:
+                    return key
+                time.sleep(0.01)
+            raise RuntimeError(f"Signing key file {path} is empty")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(secrets.token_hex(32).encode("ascii"))
+        return path.read_bytes()
+
+    def path_for(self, key: str) -> Path:
+        """Map an object key to its file, rejecting keys that would escape the root."""
+
+        name = posixpath.normpath(key)
+        if not key or name != key or name.startswith(("/", "../")) or name == ".." or "\\" in key:
+            raise ValueError(f"Invalid object key {key!r}")
+        return self._root / name
+
+    def upload(self, key: str, data: BinaryIO, content_type: str | None = None) -> None:
+        # The content type is derived from the key's extension when serving.
+        target = self.path_for(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(f".{target.name}.{secrets.token_hex(4)}.part")
+        try:
+            with partial.open("wb") as handle:
+                shutil.copyfileobj(data, handle, READ_CHUNK_BYTES)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(partial, target)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+    def _upload_item(self, item: UploadItem) -> None:
+        with item.open() as data:
+            self.upload(item.key, data, item.content_type)
+
+    def _signature(self, key: str, expires: int) -> str:
+        return hmac.new(self._key(), f"{key}\n{expires}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def _sign(self, key: str, expires_in: int) -> str:
+        expires = int(time.time()) + expires_in
+        return f"{OBJECT_URL_PREFIX}/{quote(key)}?expires={expires}&signature={self._signature(key, expires)}"
+
+    def verify(self, key: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(key, expires), signature)
+
+    def stat_object(self, key: str) -> Tuple[Path, os.stat_result]:
+        """Return the file and its stat for ``key``; raises FileNotFoundError if absent."""
+
+        path = self.path_for(key)
+        result = path.stat()
+        if not stat.S_ISREG(result.st_mode):
+            raise FileNotFoundError(key)
+        return path, result
+
+    def etag(self, key: str, result: os.stat_result) -> str:
+        match = _BLOB_KEY.match(key)
+        if match:
+            return f'"{match.group(1)}"'
+        return f'"{result.st_size:x}-{result.st_mtime_ns:x}"'
+
+    def serve(self, request: Request, key: str) -> Response:
+        path, result = self.stat_object(key)
+        return object_response(request, self, key, path, result)
+
+    def presign_stats(self) -> dict[str, object]:
+        return {"backend": "filesystem", **super().presign_stats()}
+
+
+class FileRangeResponse(Response):
+    """Send ``count`` bytes of a file from ``offset``, zero-copy when the server supports it."""
+
+    def __init__(
+        self,
+        path: Path,
+        offset: int,
+        count: int,
+        status_code: int,
+        headers: dict[str, str],
+        media_type: str | None,
+    ) -> None:
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.full_file = status_code == 200
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.headers["content-length"] = str(count)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        extensions = scope.get("extensions") or {}
+        if scope["method"].upper() == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in extensions:
+            handle = await anyio.to_thread.run_sync(open, self.path, "rb")
+            try:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": handle,
+                        "offset": self.offset,
+                        "count": self.count,
+                        "more_body": False,
+                    }
+                )
+            finally:
+                handle.close()
+        elif self.full_file and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+        else:
+            fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+            try:
+                position, end = self.offset, self.offset + self.count
+                while position < end:
+                    chunk = await anyio.to_thread.run_sync(os.pread, fd, min(READ_CHUNK_BYTES, end - position), position)
+                    if not chunk:
+                        break
+                    position += len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": position < end})
+                if position < end:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+            finally:
+                os.close(fd)
+
+
+def _parse_range(header: str, size: int) -> Tuple[int, int] | None:
+    """Return ``(start, end_inclusive)`` for a single byte range, or None to serve the whole file.
+
+    Raises ValueError for a syntactically valid range that cannot be satisfied.
+    Multi-range requests are answered with the whole file, which RFC 9110
+    permits.
+    """
+
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("range starts past the end of the file")
+    return start, end
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = {candidate.strip() for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def object_response(request: Request, storage: FilesystemStorage, key: str, path: Path, result: os.stat_result) -> Response:
+    """Build the response for a stored object, honouring conditional and range headers."""
+
+    etag = storage.etag(key, result)
+    headers = {
+        "etag": etag,
+        "cache-control": storage.cache_control(key),
+        "last-modified": formatdate(result.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    media_type = guess_type(key)[0] or "application/octet-stream"
+    size = result.st_size
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            return FileRangeResponse(path, start, end - start + 1, 206, headers, media_type)
+    return FileRangeResponse(path, 0, size, 200, headers, media_type)
+
+
+__all__ = [
+    "FileRangeResponse",
+    "FilesystemStorage",
+    "OBJECT_URL_PREFIX",
+    "object_response",
+]
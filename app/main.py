@@ -1,60 +1,61 @@
+"""FastAPI application exposing analytics, SCORM upload and launch endpoints."""
 from __future__ import annotations
 
-from pathlib import Path
-from fastapi import Depends, FastAPI, Request
-from fastapi.responses import HTMLResponse
+import posixpath
+from datetime import datetime, timedelta
+from mimetypes import guess_type
+from pathlib import Path as FilePath
+from typing import Annotated
+from uuid import uuid4
+
+from fastapi import Depends, FastAPI, HTTPException, Path, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from .database import initialize_database, seed_demo_data
 from routers.analytics import router as analytics_router
 
-BASE_DIR = Path(__file__).resolve().parent.parent
+from .async_analytics import executor_stats, shutdown_executor
+from .attempt_sweeper import get_sweeper, stop_sweeper
+from .cmi_compactor import get_compactor, stop_compactor
+from .cache import get_response_cache
+from .commit_buffer import CommitBuffer, get_commit_buffer, stop_commit_buffer
+from .config import Settings, get_settings
+from .database import Database, close_database, get_database
+from .ingest import get_dispatcher, stop_dispatcher
+from .local_storage import OBJECT_URL_PREFIX, FilesystemStorage
+from .pool import close_pools, pool_stats
+from .progress import get_progress_tracker, stop_progress_tracker
+from .schemas import (
+    IngestJobAccepted,
+    IngestJobStatus,
+    LaunchResponse,
+    ScormCmiState,
+    ScormCommitRequest,
+    ScormCommitResponse,
+    ScormItem,
+    UploadResponse,
+)
+from .storage import Storage, get_storage, storage_stats
+from .uploads import InvalidUploadError, PackageTooLargeError, stage_upload
+from .warmup import warm_up, warmup_report
+
+BASE_DIR = FilePath(__file__).resolve().parent.parent
 TEMPLATES_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "static"
 
-app = FastAPI(title="LMS Analytics API", version="1.0.0")
-app.include_router(analytics_router)
-
-
-@app.on_event("startup")
-def startup() -> None:
-    initialize_database()
-    seed_demo_data()
+# Package content whose relative URLs must keep resolving under
+# /scorm/content/<token>/. Anything else is a leaf asset and is redirected to
+# a signed storage URL, so media never streams through the service.
+DOCUMENT_MEDIA_TYPES = frozenset({"text/html", "application/xhtml+xml", "text/css"})
 
 
 def get_templates() -> Jinja2Templates:
     return Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
-
-
-@app.get("/admin/analytics", response_class=HTMLResponse)
-async def admin_analytics(request: Request, templates: Jinja2Templates = Depends(get_templates)) -> HTMLResponse:
-    return templates.TemplateResponse("admin_analytics.html", {"request": request})
-"""FastAPI application exposing SCORM upload and launch endpoints."""
-from __future__ import annotations
-
-import mimetypes
-import posixpath
-import zipfile
-from datetime import datetime, timedelta
-from tempfile import NamedTemporaryFile
-from typing import Annotated
-from uuid import uuid4
-
-from fastapi import Depends, FastAPI, File, HTTPException, Path, UploadFile
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-
-from .config import Settings, get_settings
-from .database import Database, get_database
-from .schemas import LaunchResponse, UploadResponse
-from .scorm import ManifestNotFoundError, ManifestParseError, read_manifest
-from .storage import S3Storage, get_storage
-
-
 def get_app() -> FastAPI:
     app = FastAPI(title="LMS Service", version="1.0.0")
     app.add_middleware(
@@ -64,83 +65,282 @@ def get_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
-    app.mount("/static", StaticFiles(directory="static"), name="static")
-
-    @app.post("/courses/{course_id}/scorm/upload", response_model=UploadResponse)
+    app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+    app.include_router(analytics_router)
+
+    @app.on_event("startup")
+    def startup() -> None:
+        warm_up(get_settings().startup_warmup_timeout_seconds)
+        get_dispatcher().start()
+        get_sweeper().start()
+        get_compactor().start()
+
+    @app.on_event("shutdown")
+    def shutdown() -> None:
+        stop_dispatcher()
+        stop_sweeper()
+        shutdown_executor()
+        stop_commit_buffer()
+        stop_progress_tracker()
+        stop_compactor()
+        close_database()
+        close_pools()
+
+    @app.get("/metrics/database")
+    def database_metrics() -> dict[str, object]:
+        return {"pools": pool_stats(), "launch": get_database().launch_stats()}
+
+    @app.get("/metrics/analytics-cache")
+    def analytics_cache_metrics() -> dict[str, object]:
+        return get_response_cache().stats()
+
+    @app.get("/metrics/analytics-executor")
+    def analytics_executor_metrics() -> dict[str, object]:
+        return executor_stats()
+
+    @app.get("/metrics/scorm-ingest")
+    def scorm_ingest_metrics() -> dict[str, object]:
+        return get_dispatcher().stats()
+
+    @app.get("/metrics/scorm-attempts")
+    def scorm_attempt_metrics() -> dict[str, object]:
+        return get_sweeper().stats()
+
+    @app.get("/metrics/startup")
+    def startup_metrics() -> dict[str, object]:
+        return warmup_report()
+
+    @app.get("/metrics/scorm-commits")
+    def scorm_commit_metrics() -> dict[str, object]:
+        return get_commit_buffer().stats()
+
+    @app.get("/metrics/scorm-cmi-log")
+    def scorm_cmi_log_metrics() -> dict[str, object]:
+        return get_compactor().stats()
+
+    @app.get("/metrics/progress")
+    def progress_metrics() -> dict[str, object]:
+        return get_progress_tracker().stats()
+
+    @app.get("/metrics/storage")
+    def storage_metrics() -> dict[str, object]:
+        return storage_stats()
+
+    @app.get("/admin/analytics", response_class=HTMLResponse)
+    async def admin_analytics(request: Request, templates: Jinja2Templates = Depends(get_templates)) -> HTMLResponse:
+        return templates.TemplateResponse("admin_analytics.html", {"request": request})
+
+    # The body is streamed by stage_upload rather than declared as a File
+    # parameter, which would have it spooled in full first; describe it here.
+    @app.post(
+        "/courses/{course_id}/scorm/upload",
+        response_model=IngestJobAccepted,
+        status_code=202,
+        openapi_extra={
+            "requestBody": {
+                "required": True,
+                "content": {
+                    "multipart/form-data": {
+                        "schema": {
+                            "type": "object",
+                            "required": ["file"],
+                            "properties": {
+                                "file": {"type": "string", "format": "binary", "description": "Zipped SCORM package"}
+                            },
+                        }
+                    }
+                },
+            }
+        },
+    )
     async def upload_scorm_package(
+        request: Request,
         course_id: Annotated[str, Path(description="Identifier of the course")],
-        file: UploadFile = File(..., description="Zipped SCORM package"),
+        settings: Settings = Depends(get_settings),
         db: Database = Depends(get_database),
-        storage: S3Storage = Depends(get_storage),
-    ) -> UploadResponse:
-        if not file.filename or not file.filename.lower().endswith(".zip"):
-            raise HTTPException(status_code=400, detail="Only .zip uploads are supported")
-
-        with NamedTemporaryFile(suffix=".zip", delete=True) as tmp_file:
-            contents = await file.read()
-            tmp_file.write(contents)
-            tmp_file.flush()
-
-            with zipfile.ZipFile(tmp_file.name) as archive:
-                try:
-                    manifest = read_manifest(archive)
-                except ManifestNotFoundError as exc:
-                    raise HTTPException(status_code=400, detail=str(exc)) from exc
-                except ManifestParseError as exc:
-                    raise HTTPException(status_code=400, detail=str(exc)) from exc
-
-                object_prefix = f"courses/{course_id}/scorm/{uuid4()}"
-
-                for item in archive.infolist():
-                    if item.is_dir():
-                        continue
-                    name = posixpath.normpath(item.filename)
-                    if name.startswith("../") or "..\\" in name:
-                        raise HTTPException(status_code=400, detail="Archive contains unsafe paths")
-                    with archive.open(item) as data:
-                        mime_type, _ = mimetypes.guess_type(name)
-                        storage.upload(f"{object_prefix}/{name}", data, mime_type)
-
-                db.insert_package(
-                    course_id=course_id,
-                    version=manifest.version,
-                    entry_point=manifest.entry_point,
-                    object_prefix=object_prefix,
-                    manifest=manifest.manifest_xml,
-                )
-
-        return UploadResponse(
-            course_id=course_id,
-            version=manifest.version,
-            entry_point=manifest.entry_point,
-            object_prefix=object_prefix,
+    ) -> IngestJobAccepted:
+        job_id = uuid4().hex
+        try:
+            staged = await stage_upload(request, FilePath(settings.scorm_staging_dir), job_id)
+        except InvalidUploadError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except PackageTooLargeError as exc:
+            raise HTTPException(status_code=413, detail=str(exc)) from exc
+
+        db.create_ingest_job(
+            job_id,
+            course_id,
+            str(staged.path),
+            staged.size,
+            staged.sha256,
+            settings.scorm_ingest_max_attempts,
+        )
+        get_dispatcher().notify()
+        return IngestJobAccepted(
+            job_id=job_id,
+            status="queued",
+            status_url=str(request.url_for("scorm_ingest_job_status", job_id=job_id)),
         )
 
+    @app.get("/scorm/jobs/{job_id}", response_model=IngestJobStatus, name="scorm_ingest_job_status")
+    async def scorm_ingest_job_status(job_id: str, db: Database = Depends(get_database)) -> IngestJobStatus:
+        job = db.get_ingest_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Ingest job not found")
+        fields = {key: job[key] for key in job.keys() if key in IngestJobStatus.__fields__ and key != "result"}
+        return IngestJobStatus(
+            **fields,
+            job_id=job["id"],
+            result=UploadResponse.parse_raw(job["result"]) if job["result"] else None,
+        )
+
+    @app.get("/courses/{course_id}/scorm/items", response_model=list[ScormItem])
+    async def list_scorm_items(
+        course_id: Annotated[str, Path(description="Identifier of the course")],
+        db: Database = Depends(get_database),
+    ) -> list[ScormItem]:
+        package = db.find_latest_package(course_id)
+        if package is None:
+            raise HTTPException(status_code=404, detail="SCORM package not found for course")
+        return [
+            ScormItem(
+                identifier=row["identifier"],
+                title=row["title"],
+                organization=row["organization"],
+                parent_identifier=row["parent_identifier"],
+                depth=row["depth"],
+                launchable=row["launch_path"] is not None,
+                is_visible=bool(row["is_visible"]),
+            )
+            for row in db.list_package_items(int(package["id"]))
+        ]
+
     @app.get("/courses/{course_id}/scorm/launch", response_model=LaunchResponse)
     async def launch_scorm_package(
+        request: Request,
         course_id: Annotated[str, Path(description="Identifier of the course")],
+        item: str | None = Query(None, description="Item (SCO) to launch; defaults to the package entry point"),
+        learner_id: int | None = Query(None, description="Learner the attempt belongs to; progress is tracked only when set"),
         settings: Settings = Depends(get_settings),
         db: Database = Depends(get_database),
-        storage: S3Storage = Depends(get_storage),
     ) -> LaunchResponse:
         package = db.find_latest_package(course_id)
         if package is None:
             raise HTTPException(status_code=404, detail="SCORM package not found for course")
+        entry_point = package["entry_point"]
+        if item is not None:
+            row = db.find_package_item(int(package["id"]), item)
+            if row is None or row["launch_path"] is None:
+                raise HTTPException(status_code=404, detail="Launchable item not found in package")
+            entry_point = row["launch_path"]
+
+        # Whole seconds, so the expiry the token carries matches the row's.
+        expires_at = datetime.utcnow().replace(microsecond=0) + timedelta(seconds=settings.attempt_ttl_seconds)
+        attempt_token = db.issue_attempt_token(int(package["id"]), expires_at)
+        db.queue_attempt(
+            int(package["id"]), attempt_token, expires_at, learner_id, item, object_prefix=package["object_prefix"]
+        )
 
-        attempt_token = uuid4().hex
-        expires_at = datetime.utcnow() + timedelta(seconds=settings.attempt_ttl_seconds)
-        db.create_attempt(int(package["id"]), attempt_token, expires_at)
-
-        key = f"{package['object_prefix']}/{package['entry_point']}"
-        presigned_url = storage.presign(key, settings.presign_ttl_seconds)
+        # Launch through the content route so the package's relative asset
+        # URLs resolve against the same attempt-scoped prefix.
+        entry_point, _, fragment = entry_point.partition("#")
+        entry_path, _, query = entry_point.partition("?")
+        launch_url = str(request.url_for("serve_scorm_content", attempt_token=attempt_token, path=entry_path))
+        if query:
+            launch_url = f"{launch_url}?{query}"
+        if fragment:
+            launch_url = f"{launch_url}#{fragment}"
 
         return LaunchResponse(
-            launch_url=presigned_url,
+            launch_url=launch_url,
             attempt_token=attempt_token,
             expires_at=expires_at,
             version=package["version"],
         )
 
+    @app.get("/scorm/content/{attempt_token}/{path:path}", name="serve_scorm_content")
+    async def serve_scorm_content(
+        request: Request,
+        attempt_token: str,
+        path: str,
+        settings: Settings = Depends(get_settings),
+        db: Database = Depends(get_database),
+        storage: Storage = Depends(get_storage),
+    ) -> Response:
+        attempt = db.lookup_attempt(attempt_token)
+        if attempt is None:
+            raise HTTPException(status_code=404, detail="Unknown attempt")
+        if attempt.expired():
+            raise HTTPException(status_code=410, detail="Attempt has expired")
+
+        name = posixpath.normpath(path)
+        if name.startswith("../") or name == ".." or name.startswith("/"):
+            raise HTTPException(status_code=400, detail="Unsafe asset path")
+        key = db.resolve_package_file(attempt.package_id, attempt.object_prefix, name)
+        if key is None:
+            raise HTTPException(status_code=404, detail="Asset not found in package")
+        if guess_type(name)[0] not in DOCUMENT_MEDIA_TYPES:
+            return RedirectResponse(storage.presign(key, settings.presign_ttl_seconds), status_code=307)
+        # Documents are served here: under a blob URL (or any signed URL)
+        # their relative references would lose the package layout and the
+        # signature.
+        try:
+            return await run_in_threadpool(storage.serve, request, key)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Asset not found in package")
+
+    @app.post("/api/scorm/commit", response_model=ScormCommitResponse, status_code=202)
+    async def commit_scorm_cmi(
+        commit: ScormCommitRequest,
+        db: Database = Depends(get_database),
+        buffer: CommitBuffer = Depends(get_commit_buffer),
+    ) -> ScormCommitResponse:
+        # Only tokens validated before have a sequence mark, so this check
+        # cannot let an unknown token through.
+        if commit.seq is not None and buffer.is_stale(commit.attempt_token, commit.seq):
+            return ScormCommitResponse(accepted=0, duplicate=True)
+        attempt = db.lookup_attempt(commit.attempt_token)
+        if attempt is None:
+            raise HTTPException(status_code=404, detail="Unknown attempt")
+        if attempt.expired():
+            raise HTTPException(status_code=410, detail="Attempt has expired")
+        if not buffer.add(commit.attempt_token, commit.cmi, commit.seq):
+            return ScormCommitResponse(accepted=0, duplicate=True)
+        return ScormCommitResponse(accepted=len(commit.cmi))
+
+    @app.get("/api/scorm/attempts/{attempt_token}/cmi", response_model=ScormCmiState, response_model_by_alias=True)
+    async def resume_scorm_cmi(
+        attempt_token: str,
+        db: Database = Depends(get_database),
+        buffer: CommitBuffer = Depends(get_commit_buffer),
+    ) -> ScormCmiState:
+        attempt = db.lookup_attempt(attempt_token)
+        if attempt is None:
+            raise HTTPException(status_code=404, detail="Unknown attempt")
+        if attempt.expired():
+            raise HTTPException(status_code=410, detail="Attempt has expired")
+        state = await run_in_threadpool(buffer.read_through, attempt_token, db.load_cmi_state)
+        return ScormCmiState(attempt_token=attempt_token, cmi=state)
+
+    @app.api_route(OBJECT_URL_PREFIX + "/{key:path}", methods=["GET", "HEAD"], name="serve_storage_object")
+    async def serve_storage_object(
+        request: Request,
+        key: str,
+        expires: int = Query(..., description="Expiry of the signed URL, in Unix seconds"),
+        signature: str = Query(..., description="HMAC of the key and expiry"),
+        storage: Storage = Depends(get_storage),
+    ) -> Response:
+        if not isinstance(storage, FilesystemStorage):
+            raise HTTPException(status_code=404, detail="Objects are not served by this service")
+        if not storage.verify(key, expires, signature):
+            raise HTTPException(status_code=403, detail="Invalid or expired signature")
+        try:
+            return await run_in_threadpool(storage.serve, request, key)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid object key")
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Object not found")
+
     return app
 
 
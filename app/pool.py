@@ -0,0 +1,243 @@
+"""Bounded, pre-configured SQLite connection pool."""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .config import get_settings
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class ConnectionPool:
+    """Hand out at most ``max_size`` long-lived connections to one database file.
+
+    Connections are configured once when opened (WAL journal, relaxed
+    synchronous mode, mmap and page cache sizes, statement cache) and then
+    reused. Idle connections are handed out most-recently-used first, and a
+    thread that re-enters :meth:`connection` while already holding one gets the
+    same connection back instead of taking a second slot.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_size: int,
+        timeout: float,
+        pragmas: Dict[str, Any] | None = None,
+        **connect_kwargs: Any,
+    ) -> None:
+        self._path = path
+        self._max_size = max_size
+        self._timeout = timeout
+        self._pragmas = pragmas or {}
+        self._connect_kwargs = {"check_same_thread": False, **connect_kwargs}
+        self._idle: List[sqlite3.Connection] = []
+        self._open = 0
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._closed = False
+
+        self._checkouts = 0
+        self._reused = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _connect(self) -> sqlite3.Connection:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._path, **self._connect_kwargs)
+        conn.row_factory = sqlite3.Row
+        for name, value in self._pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection, waiting up to the pool timeout for a free slot."""
+
+        started = time.perf_counter()
+        waited = False
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError(f"Connection pool for {self._path} is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    self._reused += 1
+                    break
+                if self._open < self._max_size:
+                    self._open += 1
+                    conn = None
+                    break
+                remaining = self._timeout - (time.perf_counter() - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self._timeout:.1f}s waiting for a connection to {self._path}"
+                    )
+                waited = True
+                self._condition.wait(remaining)
+            self._checkouts += 1
+            if waited:
+                elapsed = time.perf_counter() - started
+                self._waits += 1
+                self._wait_seconds += elapsed
+                self._max_wait_seconds = max(self._max_wait_seconds, elapsed)
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._condition:
+                    self._open -= 1
+                    self._condition.notify()
+                raise
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, rolling back any open transaction."""
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        with self._condition:
+            if self._closed:
+                self._open -= 1
+                conn.close()
+                return
+            self._idle.append(conn)
+            self._condition.notify()
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        finally:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Yield a pooled connection, committing on success and rolling back on error.
+
+        Nested use on the same thread shares the outer connection; only the
+        outermost block commits and returns it to the pool.
+        """
+
+        held: Tuple[sqlite3.Connection, int] | None = getattr(self._local, "held", None)
+        if held is not None:
+            conn, depth = held
+            self._local.held = (conn, depth + 1)
+            try:
+                yield conn
+            finally:
+                self._local.held = (conn, depth)
+            return
+
+        conn = self.acquire()
+        self._local.held = (conn, 1)
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._local.held = None
+            self.release(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            checkouts = self._checkouts
+            return {
+                "path": str(self._path),
+                "max_size": self._max_size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                "checkouts": checkouts,
+                "hit_rate": round(self._reused / checkouts, 4) if checkouts else 0.0,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(self._wait_seconds / self._waits * 1000, 3) if self._waits else 0.0,
+                "max_wait_ms": round(self._max_wait_seconds * 1000, 3),
+            }
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for conn in idle:
+            conn.close()
+
+
+_pools: Dict[Path, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: Path, pragmas: Dict[str, Any] | None = None, **connect_kwargs: Any) -> ConnectionPool:
+    """Return the shared pool for ``path``, creating it on first use.
+
+    ``pragmas`` and ``connect_kwargs`` only apply when the pool is created;
+    every helper that opens the same file shares one pool.
+    """
+
+    key = path.resolve()
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            settings = get_settings()
+            base_pragmas: Dict[str, Any] = {
+                "journal_mode": "WAL",
+                "synchronous": "NORMAL",
+                "busy_timeout": int(settings.db_pool_timeout_seconds * 1000),
+                "mmap_size": settings.sqlite_mmap_size,
+                "cache_size": -settings.sqlite_cache_size_kib,
+            }
+            base_pragmas.update(pragmas or {})
+            pool = ConnectionPool(
+                key,
+                max_size=settings.db_pool_size,
+                timeout=settings.db_pool_timeout_seconds,
+                pragmas=base_pragmas,
+                cached_statements=settings.sqlite_statement_cache_size,
+                **connect_kwargs,
+            )
+            _pools[key] = pool
+        return pool
+
+
+def pool_stats() -> List[Dict[str, Any]]:
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+__all__ = [
+    "ConnectionPool",
+    "PoolTimeoutError",
+    "close_pools",
+    "get_pool",
+    "pool_stats",
+]
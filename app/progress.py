@@ -0,0 +1,137 @@
+"""Learner progress derived from SCORM runtime data.
+
+``learner_course_progress`` is kept up to date incrementally. Each flushed
+CMI batch folds its ``lesson_status``, ``completion_status``,
+``progress_measure`` and ``score.raw`` values into per-attempt summaries (in
+the same transaction as the CMI write) and marks the affected
+``(learner_id, course_id)`` pairs dirty. :class:`ProgressTracker` recomputes
+only the dirty pairs' rows every ``PROGRESS_REFRESH_SECONDS``, so a burst of
+commits from one learner costs one upsert rather than one per commit.
+
+Summaries live next to the CMI data; rows are derived there and upserted
+into the analytics database, skipping learners and courses it does not
+know. A full rebuild re-derives every summary from the stored CMI values and
+then every progress row, with the same SQL as the incremental path, for
+backfills or after changing the derivation::
+
+    python -m app.progress --rebuild
+    python -m app.progress --verify   # compare a rebuild with the current rows, write nothing
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Sequence, Set, Tuple
+
+from .config import get_settings
+from .database import get_database, learner_course_exists, load_learner_progress, write_learner_progress
+from .workers import PeriodicWorker, SharedWorker
+
+Pair = Tuple[int, int]
+
+
+class ProgressTracker(PeriodicWorker):
+    """Dirty set of learner/course pairs, recomputed by a background thread."""
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(interval, name="progress-tracker")
+        self._dirty: Set[Pair] = set()
+        self._refresh_lock = threading.Lock()
+        self._marked = 0
+        self._refreshed = 0
+        self._failures = 0
+
+    def mark_dirty(self, pairs: Iterable[Pair]) -> None:
+        with self._lock:
+            for pair in pairs:
+                self._marked += 1
+                self._dirty.add(pair)
+            if self._dirty:
+                self.start()
+
+    def run_once(self) -> int:
+        return self.refresh()
+
+    def refresh(self) -> int:
+        """Recompute every dirty pair now; returns the number of pairs refreshed."""
+
+        with self._refresh_lock:
+            with self._lock:
+                pairs, self._dirty = sorted(self._dirty), set()
+            if not pairs:
+                return 0
+            started = time.perf_counter()
+            try:
+                write_learner_progress(get_database().derive_progress(pairs))
+            except Exception:
+                with self._lock:
+                    self._dirty.update(pairs)
+                    self._failures += 1
+                raise
+            seconds = time.perf_counter() - started
+            with self._lock:
+                self._refreshed += len(pairs)
+                self._record_run(pairs=len(pairs), seconds=round(seconds, 4))
+            return len(pairs)
+
+    def stop(self) -> None:
+        super().stop()
+        self.refresh()
+
+    def _stats(self) -> Dict[str, Any]:
+        return {
+            "dirty": len(self._dirty),
+            "marked": self._marked,
+            "refreshed": self._refreshed,
+            "failures": self._failures,
+        }
+
+
+_tracker = SharedWorker(lambda: ProgressTracker(get_settings().progress_refresh_seconds))
+
+
+def get_progress_tracker() -> ProgressTracker:
+    return _tracker.get()
+
+
+def stop_progress_tracker() -> None:
+    """Refresh what is still dirty and stop the shared tracker, if one was created."""
+
+    _tracker.stop()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild learner progress from stored SCORM runtime data.")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--rebuild", action="store_true", help="Re-derive and write every progress row")
+    mode.add_argument("--verify", action="store_true", help="Report rows a rebuild would change; write nothing")
+    args = parser.parse_args(argv)
+
+    db = get_database()
+    if args.rebuild:
+        started = time.perf_counter()
+        rows = db.rebuild_progress()
+        write_learner_progress(rows)
+        print(f"rebuilt {len(rows)} progress row(s) in {time.perf_counter() - started:.2f}s")
+        return 0
+
+    rebuilt = {(row[0], row[1]): tuple(row) for row in db.rebuild_progress(dry_run=True)}
+    current = {pair: tuple(row) for pair, row in load_learner_progress(rebuilt).items()}
+    differing = [
+        pair
+        for pair in rebuilt
+        if current.get(pair) != rebuilt[pair] and (pair in current or learner_course_exists(*pair))
+    ]
+    for pair in differing:
+        print(f"learner {pair[0]} course {pair[1]}: current {current.get(pair)} rebuilt {rebuilt[pair]}")
+    print(f"{len(rebuilt)} pair(s) checked, {len(differing)} differ")
+    return 1 if differing else 0
+
+
+__all__ = ["ProgressTracker", "get_progress_tracker", "stop_progress_tracker"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
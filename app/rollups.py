@@ -0,0 +1,437 @@
+"""Incrementally maintained course and group progress rollups.
+
+``course_progress_view`` and ``group_progress_view`` aggregate the whole
+``learner_course_progress`` table on every read. The rollup tables below hold
+the same aggregates as running counters (per-status counts, sum/count of
+progress and score, latest activity) and are kept current by triggers on
+``learner_course_progress``, ``group_memberships``, ``courses`` and ``groups``.
+Reads through the ``*_rollup_view`` views therefore cost O(courses) or
+O(groups) instead of O(progress rows).
+
+Run ``python -m app.rollups`` to rebuild the rollups from the base tables and
+check them against the aggregate views.
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+from typing import Any, Dict, List, Sequence
+
+from .database import average_sql
+
+STATUSES: Sequence[str] = ("completed", "in_progress", "not_started", "stalled")
+
+ROLLUP_COLUMNS: Sequence[str] = (
+    "total_learners",
+    *(f"{status}_learners" for status in STATUSES),
+    "progress_sum",
+    "progress_count",
+    "score_sum",
+    "score_count",
+    "last_activity_at",
+)
+
+_COUNTER_DDL = """
+    total_learners INTEGER NOT NULL DEFAULT 0,
+    completed_learners INTEGER NOT NULL DEFAULT 0,
+    in_progress_learners INTEGER NOT NULL DEFAULT 0,
+    not_started_learners INTEGER NOT NULL DEFAULT 0,
+    stalled_learners INTEGER NOT NULL DEFAULT 0,
+    progress_sum REAL NOT NULL DEFAULT 0,
+    progress_count INTEGER NOT NULL DEFAULT 0,
+    score_sum REAL NOT NULL DEFAULT 0,
+    score_count INTEGER NOT NULL DEFAULT 0,
+    last_activity_at TEXT
+"""
+
+ROLLUP_TABLE_STATEMENTS: List[str] = [
+    f"""
+    CREATE TABLE IF NOT EXISTS course_progress_rollup (
+        course_id INTEGER PRIMARY KEY,{_COUNTER_DDL}
+    );
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS group_progress_rollup (
+        group_id INTEGER PRIMARY KEY,{_COUNTER_DDL}
+    );
+    """,
+    # The triggers recompute MAX(last_activity_at) when the current maximum is
+    # removed; this index keeps that lookup to a single seek per course.
+    """
+    CREATE INDEX IF NOT EXISTS idx_lcp_course_activity
+        ON learner_course_progress (course_id, last_activity_at);
+    """,
+]
+
+# Aggregates matching course_progress_view/group_progress_view, used both for
+# full rebuilds and for recomputing a single row from scratch.
+_COURSE_AGGREGATE = """
+    SELECT
+        c.id,
+        COUNT(lcp.id),
+        COALESCE(SUM(lcp.status = 'completed'), 0),
+        COALESCE(SUM(lcp.status = 'in_progress'), 0),
+        COALESCE(SUM(lcp.status = 'not_started'), 0),
+        COALESCE(SUM(lcp.status = 'stalled'), 0),
+        COALESCE(SUM(lcp.progress_percent), 0),
+        COUNT(lcp.progress_percent),
+        COALESCE(SUM(lcp.score), 0),
+        COUNT(lcp.score),
+        MAX(lcp.last_activity_at)
+    FROM courses c
+    LEFT JOIN learner_course_progress lcp ON lcp.course_id = c.id
+    {where}
+    GROUP BY c.id
+"""
+
+_GROUP_AGGREGATE = """
+    SELECT
+        g.id,
+        COUNT(DISTINCT gm.learner_id),
+        COALESCE(SUM(lcp.status = 'completed'), 0),
+        COALESCE(SUM(lcp.status = 'in_progress'), 0),
+        COALESCE(SUM(lcp.status = 'not_started'), 0),
+        COALESCE(SUM(lcp.status = 'stalled'), 0),
+        COALESCE(SUM(lcp.progress_percent), 0),
+        COUNT(lcp.progress_percent),
+        COALESCE(SUM(lcp.score), 0),
+        COUNT(lcp.score),
+        MAX(lcp.last_activity_at)
+    FROM groups g
+    LEFT JOIN group_memberships gm ON gm.group_id = g.id
+    LEFT JOIN learner_course_progress lcp
+        ON lcp.learner_id = gm.learner_id AND lcp.course_id = g.course_id
+    {where}
+    GROUP BY g.id
+"""
+
+_COLUMN_LIST = ", ".join(ROLLUP_COLUMNS)
+
+
+def _apply_progress(target: str, row: str, sign: str, recompute_latest: str) -> str:
+    """Return SET assignments adding (``+``) or removing (``-``) a progress row.
+
+    ``row`` is the trigger pseudo-row (``NEW``/``OLD``) or table alias that
+    holds the progress values. Removing a row that carried the current
+    ``last_activity_at`` of ``target`` falls back to ``recompute_latest``.
+    """
+
+    assignments = [
+        f"{status}_learners = {target}.{status}_learners {sign} ({row}.status = '{status}')" for status in STATUSES
+    ]
+    assignments += [
+        f"progress_sum = {target}.progress_sum {sign} {row}.progress_percent",
+        f"progress_count = {target}.progress_count {sign} ({row}.progress_percent IS NOT NULL)",
+        f"score_sum = {target}.score_sum {sign} COALESCE({row}.score, 0)",
+        f"score_count = {target}.score_count {sign} ({row}.score IS NOT NULL)",
+    ]
+    latest = f"{target}.last_activity_at"
+    if sign == "+":
+        assignments.append(
+            f"last_activity_at = CASE WHEN {latest} IS NULL OR {row}.last_activity_at > {latest} "
+            f"THEN {row}.last_activity_at ELSE {latest} END"
+        )
+    else:
+        assignments.append(
+            f"last_activity_at = CASE WHEN {latest} = {row}.last_activity_at "
+            f"THEN ({recompute_latest}) ELSE {latest} END"
+        )
+    return ",\n            ".join(assignments)
+
+
+def _ensure_row(table: str, key: str, value: str) -> str:
+    # INSERT OR IGNORE would be overridden by the conflict policy of the
+    # statement firing the trigger (e.g. an upsert), so guard explicitly.
+    return (
+        f"INSERT INTO {table} ({key}) SELECT {value} "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {key} = {value});"
+    )
+
+
+def _course_change(row: str, sign: str) -> str:
+    total = f"total_learners = course_progress_rollup.total_learners {sign} 1"
+    latest = (
+        "SELECT MAX(p.last_activity_at) FROM learner_course_progress p "
+        "WHERE p.course_id = course_progress_rollup.course_id"
+    )
+    statements = []
+    if sign == "+":
+        statements.append(_ensure_row("course_progress_rollup", "course_id", f"{row}.course_id"))
+    statements.append(
+        f"""UPDATE course_progress_rollup SET
+            {total},
+            {_apply_progress("course_progress_rollup", row, sign, latest)}
+        WHERE course_id = {row}.course_id;"""
+    )
+    return "\n        ".join(statements)
+
+
+def _group_latest(course_ref: str) -> str:
+    return (
+        "SELECT MAX(p.last_activity_at) FROM group_memberships m "
+        "JOIN learner_course_progress p ON p.learner_id = m.learner_id "
+        f"WHERE m.group_id = group_progress_rollup.group_id AND p.course_id = {course_ref}"
+    )
+
+
+def _progress_group_change(row: str, sign: str) -> str:
+    return f"""UPDATE group_progress_rollup SET
+            {_apply_progress("group_progress_rollup", row, sign, _group_latest(f"{row}.course_id"))}
+        WHERE group_id IN (
+            SELECT gm.group_id FROM group_memberships gm
+            JOIN groups g ON g.id = gm.group_id
+            WHERE gm.learner_id = {row}.learner_id AND g.course_id = {row}.course_id
+        );"""
+
+
+def _membership_change(row: str, sign: str) -> str:
+    statements = []
+    if sign == "+":
+        statements.append(_ensure_row("group_progress_rollup", "group_id", f"{row}.group_id"))
+    statements.append(
+        f"UPDATE group_progress_rollup SET total_learners = total_learners {sign} 1 "
+        f"WHERE group_id = {row}.group_id;"
+    )
+    statements.append(
+        f"""UPDATE group_progress_rollup SET
+            {_apply_progress("group_progress_rollup", "lcp", sign, _group_latest("g.course_id"))}
+        FROM learner_course_progress lcp
+        JOIN groups g ON g.course_id = lcp.course_id
+        WHERE group_progress_rollup.group_id = {row}.group_id
+            AND g.id = {row}.group_id
+            AND lcp.learner_id = {row}.learner_id;"""
+    )
+    return "\n        ".join(statements)
+
+
+def _recompute_group(group_ref: str) -> str:
+    return (
+        f"DELETE FROM group_progress_rollup WHERE group_id = {group_ref};\n"
+        f"        INSERT INTO group_progress_rollup (group_id, {_COLUMN_LIST})"
+        + _GROUP_AGGREGATE.format(where=f"WHERE g.id = {group_ref}")
+        + ";"
+    )
+
+
+def _trigger(name: str, event: str, body: str) -> List[str]:
+    return [
+        f"DROP TRIGGER IF EXISTS {name};",
+        f"""
+        CREATE TRIGGER {name} {event}
+        BEGIN
+        {body}
+        END;
+        """,
+    ]
+
+
+ROLLUP_TRIGGER_STATEMENTS: List[str] = [
+    *_trigger(
+        "trg_lcp_rollup_insert",
+        "AFTER INSERT ON learner_course_progress",
+        _course_change("NEW", "+") + "\n        " + _progress_group_change("NEW", "+"),
+    ),
+    *_trigger(
+        "trg_lcp_rollup_delete",
+        "AFTER DELETE ON learner_course_progress",
+        _course_change("OLD", "-") + "\n        " + _progress_group_change("OLD", "-"),
+    ),
+    *_trigger(
+        "trg_lcp_rollup_update",
+        "AFTER UPDATE OF learner_id, course_id, status, progress_percent, score, last_activity_at "
+        "ON learner_course_progress",
+        "\n        ".join(
+            [
+                _course_change("OLD", "-"),
+                _progress_group_change("OLD", "-"),
+                _course_change("NEW", "+"),
+                _progress_group_change("NEW", "+"),
+            ]
+        ),
+    ),
+    *_trigger(
+        "trg_group_membership_rollup_insert",
+        "AFTER INSERT ON group_memberships",
+        _membership_change("NEW", "+"),
+    ),
+    *_trigger(
+        "trg_group_membership_rollup_delete",
+        "AFTER DELETE ON group_memberships",
+        _membership_change("OLD", "-"),
+    ),
+    *_trigger(
+        "trg_group_membership_rollup_update",
+        "AFTER UPDATE OF group_id, learner_id ON group_memberships",
+        _membership_change("OLD", "-") + "\n        " + _membership_change("NEW", "+"),
+    ),
+    *_trigger(
+        "trg_course_rollup_insert",
+        "AFTER INSERT ON courses",
+        _ensure_row("course_progress_rollup", "course_id", "NEW.id"),
+    ),
+    *_trigger(
+        "trg_course_rollup_delete",
+        "AFTER DELETE ON courses",
+        "DELETE FROM course_progress_rollup WHERE course_id = OLD.id;",
+    ),
+    *_trigger(
+        "trg_group_rollup_insert",
+        "AFTER INSERT ON groups",
+        _ensure_row("group_progress_rollup", "group_id", "NEW.id"),
+    ),
+    *_trigger(
+        "trg_group_rollup_delete",
+        "AFTER DELETE ON groups",
+        "DELETE FROM group_progress_rollup WHERE group_id = OLD.id;",
+    ),
+    *_trigger(
+        "trg_group_rollup_course_change",
+        "AFTER UPDATE OF course_id ON groups",
+        _recompute_group("NEW.id"),
+    ),
+]
+
+
+def _rollup_select(rollup: str) -> str:
+    return f"""
+            r.total_learners,
+            r.completed_learners,
+            r.in_progress_learners,
+            r.not_started_learners,
+            r.stalled_learners,
+            {average_sql("r.progress_sum / NULLIF(r.progress_count, 0)")} AS average_progress_percent,
+            {average_sql("r.score_sum / NULLIF(r.score_count, 0)")} AS average_score,
+            r.last_activity_at
+        FROM {rollup} r"""
+
+
+ROLLUP_VIEW_STATEMENTS: List[str] = [
+    "DROP VIEW IF EXISTS course_progress_rollup_view;",
+    f"""
+    CREATE VIEW course_progress_rollup_view AS
+    SELECT
+        c.id AS course_id,
+        c.title AS course_title,
+        c.category AS course_category,
+        c.created_at AS course_created_at,{_rollup_select("course_progress_rollup")}
+    JOIN courses c ON c.id = r.course_id;
+    """,
+    "DROP VIEW IF EXISTS group_progress_rollup_view;",
+    f"""
+    CREATE VIEW group_progress_rollup_view AS
+    SELECT
+        g.id AS group_id,
+        g.name AS group_name,
+        g.course_id,
+        c.title AS course_title,
+        c.category AS course_category,{_rollup_select("group_progress_rollup")}
+    JOIN groups g ON g.id = r.group_id
+    JOIN courses c ON c.id = g.course_id;
+    """,
+]
+
+# (aggregate view, rollup view, key column) pairs compared by verify_rollups.
+_VERIFIED_VIEWS = (
+    ("course_progress_view", "course_progress_rollup_view", "course_id"),
+    ("group_progress_view", "group_progress_rollup_view", "group_id"),
+)
+
+
+def rollups_need_rebuild(conn: sqlite3.Connection) -> bool:
+    """Return True when a course or group has no rollup row yet."""
+
+    cursor = conn.execute(
+        """
+        SELECT
+            EXISTS (SELECT 1 FROM courses c
+                    WHERE NOT EXISTS (SELECT 1 FROM course_progress_rollup r WHERE r.course_id = c.id))
+            OR EXISTS (SELECT 1 FROM groups g
+                       WHERE NOT EXISTS (SELECT 1 FROM group_progress_rollup r WHERE r.group_id = g.id))
+        """
+    )
+    return bool(cursor.fetchone()[0])
+
+
+def rebuild_rollups(conn: sqlite3.Connection) -> None:
+    """Recompute both rollup tables from the base tables in one transaction."""
+
+    with conn:
+        conn.execute("DELETE FROM course_progress_rollup")
+        conn.execute(
+            f"INSERT INTO course_progress_rollup (course_id, {_COLUMN_LIST})" + _COURSE_AGGREGATE.format(where="")
+        )
+        conn.execute("DELETE FROM group_progress_rollup")
+        conn.execute(
+            f"INSERT INTO group_progress_rollup (group_id, {_COLUMN_LIST})" + _GROUP_AGGREGATE.format(where="")
+        )
+
+
+def verify_rollups(conn: sqlite3.Connection) -> List[str]:
+    """Compare the rollup views with the aggregate views and describe any drift."""
+
+    mismatches: List[str] = []
+    for view, rollup_view, key in _VERIFIED_VIEWS:
+        expected = _rows_by_key(conn, view, key)
+        actual = _rows_by_key(conn, rollup_view, key)
+        for missing in sorted(expected.keys() - actual.keys()):
+            mismatches.append(f"{rollup_view}: missing {key}={missing}")
+        for extra in sorted(actual.keys() - expected.keys()):
+            mismatches.append(f"{rollup_view}: unexpected {key}={extra}")
+        for row_key in sorted(expected.keys() & actual.keys()):
+            expected_row, actual_row = expected[row_key], actual[row_key]
+            for column, value in expected_row.items():
+                if actual_row.get(column) != value:
+                    mismatches.append(
+                        f"{rollup_view}: {key}={row_key} {column} expected {value!r}, got {actual_row.get(column)!r}"
+                    )
+    return mismatches
+
+
+def _rows_by_key(conn: sqlite3.Connection, view: str, key: str) -> Dict[Any, Dict[str, Any]]:
+    cursor = conn.execute(f"SELECT * FROM {view}")
+    columns = [col[0] for col in cursor.description]
+    rows = (dict(zip(columns, row)) for row in cursor.fetchall())
+    return {row[key]: row for row in rows}
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild and verify analytics progress rollups.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only compare the rollups against the aggregate views, do not rebuild",
+    )
+    args = parser.parse_args(argv)
+
+    from .database import get_connection, initialize_database
+
+    initialize_database()
+    with get_connection() as conn:
+        drift = verify_rollups(conn)
+        for line in drift:
+            print(line)
+        if args.check:
+            print("rollups consistent" if not drift else f"{len(drift)} rollup mismatches")
+            return 1 if drift else 0
+
+        rebuild_rollups(conn)
+        remaining = verify_rollups(conn)
+        for line in remaining:
+            print(line)
+        print(f"rebuilt rollups ({len(drift)} mismatches before, {len(remaining)} after)")
+        return 1 if remaining else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+__all__ = [
+    "ROLLUP_TABLE_STATEMENTS",
+    "ROLLUP_TRIGGER_STATEMENTS",
+    "ROLLUP_VIEW_STATEMENTS",
+    "rebuild_rollups",
+    "rollups_need_rebuild",
+    "verify_rollups",
+]
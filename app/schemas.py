@@ -1,8 +1,16 @@
 """Pydantic schemas used by the LMS service."""
 from __future__ import annotations
 
+import re
 from datetime import datetime
-from pydantic import BaseModel, Field
+from typing import Dict
+
+from pydantic import BaseModel, Field, validator
+
+CMI_ELEMENT_PATTERN = re.compile(r"^(cmi|adl)\.[A-Za-z0-9_.]{1,250}$")
+# SCORM 2004 allows 64,000 characters of suspend_data, the largest element.
+MAX_CMI_VALUE_CHARS = 64_000
+MAX_CMI_ELEMENTS_PER_COMMIT = 4096
 
 
 class UploadResponse(BaseModel):
@@ -10,13 +18,96 @@ class UploadResponse(BaseModel):
     version: str = Field(..., description="Detected SCORM version")
     entry_point: str = Field(..., description="Relative path of the SCORM launch file")
     object_prefix: str = Field(..., description="Object storage prefix containing the SCORM assets")
+    size_bytes: int = Field(..., description="Size of the uploaded archive in bytes")
+    sha256: str = Field(..., description="SHA-256 digest of the uploaded archive")
+    files: int = Field(..., description="Number of files in the package")
+    new_blobs: int = Field(..., description="Files whose content was not already stored")
+    uploaded_bytes: int = Field(..., description="Bytes transferred to object storage")
+
+
+class IngestJobAccepted(BaseModel):
+    job_id: str = Field(..., description="Identifier of the ingestion job")
+    status: str = Field(..., description="Job status: queued, running, succeeded or failed")
+    status_url: str = Field(..., description="URL to poll for job progress")
+
+
+class IngestJobStatus(BaseModel):
+    job_id: str = Field(..., description="Identifier of the ingestion job")
+    course_id: str = Field(..., description="Course identifier")
+    status: str = Field(..., description="Job status: queued, running, succeeded or failed")
+    phase: str | None = Field(None, description="Current step: validating, hashing, uploading, recording")
+    attempts: int = Field(..., description="Attempts started so far")
+    max_attempts: int = Field(..., description="Attempts allowed before the job fails")
+    files_total: int = Field(..., description="Files to process in the current phase")
+    files_done: int = Field(..., description="Files processed in the current phase")
+    bytes_total: int = Field(..., description="Bytes to process in the current phase")
+    bytes_done: int = Field(..., description="Bytes processed in the current phase")
+    error: str | None = Field(None, description="Last error, if any")
+    result: UploadResponse | None = Field(None, description="Upload result once the job succeeded")
+    created_at: datetime = Field(..., description="When the upload was accepted")
+    updated_at: datetime = Field(..., description="Last status change")
+
+
+class ScormItem(BaseModel):
+    identifier: str = Field(..., description="Item identifier from the manifest")
+    title: str | None = Field(None, description="Item title")
+    organization: str | None = Field(None, description="Organization the item belongs to")
+    parent_identifier: str | None = Field(None, description="Enclosing item, if nested")
+    depth: int = Field(..., description="Nesting depth within its organization")
+    launchable: bool = Field(..., description="Whether the item references a launchable resource")
+    is_visible: bool = Field(..., description="Whether the item is shown in navigation")
 
 
 class LaunchResponse(BaseModel):
-    launch_url: str = Field(..., description="Pre-signed URL for the SCORM entry point")
+    launch_url: str = Field(..., description="URL of the SCORM entry point for this attempt")
     attempt_token: str = Field(..., description="Token used to authenticate CMI commits")
     expires_at: datetime = Field(..., description="Attempt expiration timestamp")
     version: str = Field(..., description="SCORM package version")
 
 
-__all__ = ["UploadResponse", "LaunchResponse"]
+class ScormCommitRequest(BaseModel):
+    attempt_token: str = Field(..., alias="attemptToken", description="Token issued at launch")
+    version: str | None = Field(None, description="SCORM_12 or SCORM_2004, as reported by the adapter")
+    seq: int | None = Field(
+        None, ge=0, description="Batch sequence number (protocol v2); batches not newer than the last accepted are ignored"
+    )
+    cmi: Dict[str, str] = Field(default_factory=dict, description="CMI elements changed since the last commit")
+
+    class Config:
+        allow_population_by_field_name = True
+
+    @validator("cmi")
+    def _check_cmi(cls, value: Dict[str, str]) -> Dict[str, str]:
+        if len(value) > MAX_CMI_ELEMENTS_PER_COMMIT:
+            raise ValueError(f"at most {MAX_CMI_ELEMENTS_PER_COMMIT} elements per commit")
+        for element, element_value in value.items():
+            if not CMI_ELEMENT_PATTERN.match(element):
+                raise ValueError(f"invalid CMI element {element!r}")
+            if len(element_value) > MAX_CMI_VALUE_CHARS:
+                raise ValueError(f"value of {element} exceeds {MAX_CMI_VALUE_CHARS} characters")
+        return value
+
+
+class ScormCmiState(BaseModel):
+    attempt_token: str = Field(..., alias="attemptToken", description="Attempt the state belongs to")
+    cmi: Dict[str, str] = Field(..., description="Latest committed value of every CMI element")
+
+    class Config:
+        allow_population_by_field_name = True
+
+
+class ScormCommitResponse(BaseModel):
+    accepted: int = Field(..., description="CMI elements accepted into the commit buffer")
+    duplicate: bool = Field(False, description="Whether the batch was ignored as a stale or repeated sequence")
+
+
+__all__ = [
+    "IngestJobAccepted",
+    "IngestJobStatus",
+    "LaunchResponse",
+    "ScormCmiState",
+    "ScormCommitRequest",
+    "ScormCommitResponse",
+    "ScormItem",
+    "UploadResponse",
+]
@@ -3,8 +3,8 @@ from __future__ import annotations
 
 import posixpath
 import zipfile
-from dataclasses import dataclass
-from typing import Iterable
+from dataclasses import dataclass, field
+from typing import Dict, List
 from xml.etree import ElementTree as ET
 
 
@@ -16,15 +16,50 @@ class ManifestParseError(ValueError):
     """Raised when a SCORM manifest cannot be parsed."""
 
 
+@dataclass(slots=True)
+class ManifestResource:
+    identifier: str
+    resource_type: str | None
+    scorm_type: str | None
+    href: str | None
+    files: List[str] = field(default_factory=list)
+    dependencies: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class ManifestItem:
+    identifier: str
+    organization: str | None
+    parent: str | None
+    depth: int
+    title: str | None
+    identifierref: str | None
+    parameters: str | None
+    is_visible: bool = True
+
+
 @dataclass(slots=True)
 class ManifestDetails:
     entry_point: str
     version: str
     manifest_path: str
     manifest_xml: str
+    default_organization: str | None = None
+    items: List[ManifestItem] = field(default_factory=list)
+    resources: Dict[str, ManifestResource] = field(default_factory=dict)
+
+    def launch_path(self, item: ManifestItem) -> str | None:
+        """Package-relative launch URL of ``item``, with its parameters applied."""
+
+        resource = self.resources.get(item.identifierref or "")
+        if resource is None or not resource.href:
+            return None
+        return _apply_parameters(resource.href, item.parameters)
 
 
 IGNORED_DIRS = {"__MACOSX"}
+MANIFEST_NAME = "imsmanifest.xml"
+_XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
 
 
 def _normalise_path(path: str) -> str:
@@ -34,86 +69,211 @@ def _normalise_path(path: str) -> str:
     return cleaned
 
 
-def read_manifest(archive: zipfile.ZipFile) -> ManifestDetails:
-    """Parse imsmanifest.xml from a zip archive."""
+def _resolve_href(base: str, href: str) -> str:
+    """Join ``href`` onto ``base`` and normalise its path, keeping any query or fragment."""
 
-    manifest_name = None
-    for name in archive.namelist():
-        if name.endswith("/"):
-            continue
-        if any(part in IGNORED_DIRS for part in name.split("/")):
-            continue
-        if name.lower().endswith("imsmanifest.xml"):
-            manifest_name = name
-            break
-    if manifest_name is None:
+    if "?" not in href and "#" not in href and not href.startswith("/"):
+        path = f"{base}/{href}" if base else href
+        # Already normal: joining cannot have introduced anything normpath rewrites.
+        if "//" not in path and "./" not in path and not path.endswith((".", "/")):
+            return path
+    if "://" in href:
+        return href
+    split = min((index for index in (href.find("?"), href.find("#")) if index >= 0), default=len(href))
+    path, suffix = href[:split], href[split:]
+    return _normalise_path(posixpath.join(base, path) if base else path) + suffix
+
+
+def _apply_parameters(href: str, parameters: str | None) -> str:
+    # SCORM 2004 CAM 3.4.1.2: drop leading "?"/"&", then join with "&" if the
+    # href already has a query, otherwise "?"; fragments are appended as-is.
+    if not parameters:
+        return href
+    parameters = parameters.lstrip("?&")
+    if not parameters:
+        return href
+    if parameters.startswith("#"):
+        return href if "#" in href else href + parameters
+    return f"{href}{'&' if '?' in href else '?'}{parameters}"
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def _find_manifest(archive: zipfile.ZipFile) -> str:
+    try:
+        return archive.getinfo(MANIFEST_NAME).filename
+    except KeyError:
+        pass
+    # Some tools wrap the package in a top-level folder; take the shallowest manifest.
+    candidates = [
+        name
+        for name in archive.namelist()
+        if not name.endswith("/")
+        and name.lower().endswith(MANIFEST_NAME)
+        and not any(part in IGNORED_DIRS for part in name.split("/"))
+    ]
+    if not candidates:
         raise ManifestNotFoundError("imsmanifest.xml not found in SCORM package")
+    return min(candidates, key=lambda name: name.count("/"))
+
+
+class _ManifestBuilder:
+    """``XMLParser`` target that indexes a manifest as it streams past.
 
+    Only the elements the index needs are looked at, and no element tree is
+    built, so the manifest is read in one pass with flat memory however many
+    SCOs and files it declares.
+    """
+
+    def __init__(self, manifest_dir: str) -> None:
+        self.manifest_dir = manifest_dir
+        self.version: str | None = None
+        self.root_version: str | None = None
+        self.default_organization: str | None = None
+        self.items: List[ManifestItem] = []
+        self.resources: Dict[str, ManifestResource] = {}
+        self._organization: str | None = None
+        self._open_items: List[ManifestItem] = []
+        self._resource: ManifestResource | None = None
+        self._resources_base = manifest_dir
+        self._resource_base = manifest_dir
+        self._depth = 0
+        self._text: List[str] | None = None
+        self._names: Dict[str, str] = {}
+
+    def _name(self, tag: str) -> str:
+        name = self._names.get(tag)
+        if name is None:
+            name = self._names[tag] = _local_name(tag)
+        return name
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        self._depth += 1
+        name = self._name(tag)
+        if self._depth == 1:
+            self.root_version = attrib.get("version")
+        elif name == "file":
+            href = attrib.get("href")
+            if href and self._resource is not None:
+                self._resource.files.append(_resolve_href(self._resource_base, href))
+        elif name == "item":
+            item = ManifestItem(
+                identifier=attrib.get("identifier", ""),
+                organization=self._organization,
+                parent=self._open_items[-1].identifier if self._open_items else None,
+                depth=len(self._open_items),
+                title=None,
+                identifierref=attrib.get("identifierref") or None,
+                parameters=attrib.get("parameters") or None,
+                is_visible=attrib.get("isvisible", "true").strip().lower() != "false",
+            )
+            self.items.append(item)
+            self._open_items.append(item)
+        elif name == "title":
+            if self._open_items and self._open_items[-1].title is None:
+                self._text = []
+        elif name == "resource":
+            self._resource_base = posixpath.join(self._resources_base, attrib.get(_XML_BASE, "")).rstrip("/")
+            href = attrib.get("href")
+            scorm_type = next((value for key, value in attrib.items() if _local_name(key) == "scormtype"), None)
+            self._resource = ManifestResource(
+                identifier=attrib.get("identifier", ""),
+                resource_type=attrib.get("type"),
+                scorm_type=scorm_type.lower() if scorm_type else None,
+                href=_resolve_href(self._resource_base, href) if href else None,
+            )
+            self.resources.setdefault(self._resource.identifier, self._resource)
+        elif name == "dependency":
+            ref = attrib.get("identifierref")
+            if ref and self._resource is not None:
+                self._resource.dependencies.append(ref)
+        elif name == "schemaversion":
+            if self.version is None:
+                self._text = []
+        elif name == "organization":
+            self._organization = attrib.get("identifier")
+        elif name == "organizations":
+            self.default_organization = attrib.get("default")
+        elif name == "resources":
+            self._resources_base = posixpath.join(self.manifest_dir, attrib.get(_XML_BASE, "")).rstrip("/")
+
+    def data(self, text: str) -> None:
+        if self._text is not None:
+            self._text.append(text)
+
+    def end(self, tag: str) -> None:
+        self._depth -= 1
+        if self._text is not None:
+            value = "".join(self._text).strip() or None
+            self._text = None
+            if self._name(tag) == "title":
+                self._open_items[-1].title = value
+            else:
+                self.version = value
+            return
+        name = self._name(tag)
+        if name == "item":
+            self._open_items.pop()
+        elif name == "resource":
+            self._resource = None
+        elif name == "organization":
+            self._organization = None
+
+    def close(self) -> "_ManifestBuilder":
+        return self
+
+
+def read_manifest(archive: zipfile.ZipFile) -> ManifestDetails:
+    """Parse imsmanifest.xml from a zip archive into its organization and resource index."""
+
+    manifest_name = _find_manifest(archive)
     manifest_bytes = archive.read(manifest_name)
+
+    parser = ET.XMLParser(target=_ManifestBuilder(posixpath.dirname(manifest_name)))
     try:
-        root = ET.fromstring(manifest_bytes)
+        parser.feed(manifest_bytes)
+        builder: _ManifestBuilder = parser.close()
     except ET.ParseError as exc:
         raise ManifestParseError("Unable to parse imsmanifest.xml") from exc
 
-    entry_point = _extract_entry_point(root)
-    if not entry_point:
-        raise ManifestParseError("Unable to determine entry point from manifest")
-
-    version = _extract_version(root)
-    manifest_dir = posixpath.dirname(manifest_name)
-    entry_path = _normalise_path(posixpath.join(manifest_dir, entry_point)) if manifest_dir else _normalise_path(entry_point)
-
-    return ManifestDetails(
-        entry_point=entry_path,
-        version=version,
+    details = ManifestDetails(
+        entry_point="",
+        version=builder.version or (builder.root_version or "").strip() or "SCORM 1.2",
         manifest_path=manifest_name,
         manifest_xml=manifest_bytes.decode("utf-8", errors="replace"),
+        default_organization=builder.default_organization,
+        items=builder.items,
+        resources=builder.resources,
     )
+    details.entry_point = _entry_point(details) or ""
+    if not details.entry_point:
+        raise ManifestParseError("Unable to determine entry point from manifest")
+    return details
 
 
-def _iter_elements(root: ET.Element, tag: str) -> Iterable[ET.Element]:
-    suffix = tag.lower()
-    for element in root.iter():
-        if element.tag.lower().endswith(suffix):
-            yield element
-
-
-def _extract_entry_point(root: ET.Element) -> str | None:
-    identifier_ref = None
-    for item in _iter_elements(root, "item"):
-        identifier_ref = item.attrib.get("identifierref")
-        if identifier_ref:
-            break
-    if not identifier_ref:
-        return None
-
-    for resource in _iter_elements(root, "resource"):
-        if resource.attrib.get("identifier") == identifier_ref:
-            href = resource.attrib.get("href")
-            if href:
-                return href
-            for file_node in _iter_elements(resource, "file"):
-                href = file_node.attrib.get("href")
-                if href:
-                    return href
-    return None
-
-
-def _extract_version(root: ET.Element) -> str:
-    for tag in ("schemaversion", "adlcp:schemaversion"):
-        node = next(_iter_elements(root, tag), None)
-        if node is not None and node.text:
-            return node.text.strip()
+def _entry_point(details: ManifestDetails) -> str | None:
+    """Launch path of the first item with a resource, preferring the default organization."""
 
-    version = root.attrib.get("version")
-    if version:
-        return version.strip()
-    return "SCORM 1.2"
+    candidates = [item for item in details.items if item.identifierref]
+    preferred = [item for item in candidates if item.organization == details.default_organization]
+    for item in preferred or candidates:
+        resource = details.resources.get(item.identifierref or "")
+        if resource is None:
+            continue
+        if resource.href:
+            return resource.href
+        if resource.files:
+            return resource.files[0]
+    return None
 
 
 __all__ = [
     "ManifestDetails",
+    "ManifestItem",
     "ManifestNotFoundError",
     "ManifestParseError",
+    "ManifestResource",
     "read_manifest",
 ]
@@ -0,0 +1,170 @@
+"""Fast presigned GET URLs for object storage.
+
+``SigV4Presigner`` produces AWS Signature Version 4 query-string URLs for
+``GetObject`` directly, without building a botocore request per call, and
+caches the derived signing key per day. Its output is byte-for-byte what
+``generate_presigned_url`` returns: the bucket URL base and signing region
+come from one URL botocore presigns at start-up (so the addressing style and
+endpoint handling are botocore's), and the query parameters are emitted in
+botocore's order and encoding.
+
+``PresignCache`` reuses a signed URL for the same key while enough of its
+lifetime remains, and drops it before it gets too close to expiring.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+ALGORITHM = "AWS4-HMAC-SHA256"
+PROBE_KEY = "__presign_probe__"
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def _quote(value: str, safe: str = "-_.~") -> str:
+    return quote(value.encode("utf-8"), safe=safe)
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+class SigV4Presigner:
+    """Presign ``GetObject`` URLs for one bucket with SigV4 query authentication."""
+
+    def __init__(self, probe_url: str, credentials: Callable[[], Any]) -> None:
+        """``probe_url`` is botocore's presigned URL for :data:`PROBE_KEY`.
+
+        ``credentials`` returns an object with ``access_key``, ``secret_key``
+        and ``token`` (botocore's frozen credentials), called per signature
+        so refreshed credentials are picked up.
+        """
+
+        split = urlsplit(probe_url)
+        if not split.path.endswith(PROBE_KEY):
+            raise ValueError("Probe URL does not end with the probe key")
+        scope = parse_qs(split.query)["X-Amz-Credential"][0].split("/")
+        self._region, self._service = scope[2], scope[3]
+        self._origin = f"{split.scheme}://{split.netloc}"
+        self._path_prefix = split.path[: -len(PROBE_KEY)]
+        host, _, port = split.netloc.partition(":")
+        self._host = host if not port or _DEFAULT_PORTS.get(split.scheme) == port else split.netloc
+        self._credentials = credentials
+        self._signing_keys: Dict[Tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
+
+    def _signing_key(self, secret_key: str, datestamp: str) -> bytes:
+        cache_key = (secret_key, datestamp)
+        with self._lock:
+            key = self._signing_keys.get(cache_key)
+            if key is None:
+                key = _hmac(f"AWS4{secret_key}".encode("utf-8"), datestamp)
+                for part in (self._region, self._service, "aws4_request"):
+                    key = _hmac(key, part)
+                # Only today's (and at midnight yesterday's) key is ever useful.
+                if len(self._signing_keys) > 4:
+                    self._signing_keys.clear()
+                self._signing_keys[cache_key] = key
+            return key
+
+    def presign_get(self, key: str, expires_in: int, now: datetime | None = None) -> str:
+        credentials = self._credentials()
+        moment = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+        datestamp = moment[:8]
+        scope = f"{datestamp}/{self._region}/{self._service}/aws4_request"
+
+        path = self._path_prefix + _quote(key, safe="/~")
+        params = [
+            ("X-Amz-Algorithm", ALGORITHM),
+            ("X-Amz-Credential", f"{credentials.access_key}/{scope}"),
+            ("X-Amz-Date", moment),
+            ("X-Amz-Expires", str(expires_in)),
+            ("X-Amz-SignedHeaders", "host"),
+        ]
+        if credentials.token is not None:
+            params.append(("X-Amz-Security-Token", credentials.token))
+        encoded = [(_quote(name), _quote(value)) for name, value in params]
+
+        canonical_request = "\n".join(
+            (
+                "GET",
+                path,
+                "&".join(f"{name}={value}" for name, value in sorted(encoded)),
+                f"host:{self._host}\n",
+                "host",
+                "UNSIGNED-PAYLOAD",
+            )
+        )
+        string_to_sign = "\n".join(
+            (ALGORITHM, moment, scope, hashlib.sha256(canonical_request.encode("utf-8")).hexdigest())
+        )
+        signature = hmac.new(
+            self._signing_key(credentials.secret_key, datestamp), string_to_sign.encode("utf-8"), hashlib.sha256
+        ).hexdigest()
+
+        query = "&".join(f"{name}={value}" for name, value in encoded)
+        return f"{self._origin}{path}?{query}&X-Amz-Signature={signature}"
+
+
+class PresignCache:
+    """Bounded LRU of presigned URLs, reused while ``reuse_fraction`` of their TTL remains."""
+
+    def __init__(self, max_entries: int, reuse_fraction: float) -> None:
+        self._max_entries = max_entries
+        self._reuse_fraction = reuse_fraction
+        self._entries: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expired = 0
+
+    def get_or_sign(self, key: str, expires_in: int, sign: Callable[[str, int], str]) -> str:
+        now = time.time()
+        cache_key = (key, expires_in)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                url, expires_at = entry
+                if expires_at - now >= expires_in * self._reuse_fraction:
+                    self._entries.move_to_end(cache_key)
+                    self._hits += 1
+                    return url
+                del self._entries[cache_key]
+                self._expired += 1
+            self._misses += 1
+
+        url = sign(key, expires_in)
+        with self._lock:
+            self._entries[cache_key] = (url, now + expires_in)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return url
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expired": self._expired,
+            }
+
+
+__all__ = ["PROBE_KEY", "PresignCache", "SigV4Presigner"]
@@ -1,74 +1,468 @@
-"""S3/MinIO storage helper for SCORM packages."""
+"""Object storage for SCORM packages.
+
+:class:`Storage` is the interface the service uses: batch uploads with
+retries, cached time-limited GET URLs, and :meth:`Storage.serve` for
+routes that send an object's body themselves. ``STORAGE_BACKEND`` selects the
+implementation: :class:`S3Storage` (S3/MinIO, the default) or
+``FilesystemStorage`` (local disk, for on-prem installs without object
+storage; see :mod:`app.local_storage`).
+
+boto3 is imported, and the client created, on first use rather than at
+import time: it is the single most expensive import in the service. The
+start-up warm-up calls :meth:`Storage.warm_up` so the first request does
+not pay for it.
+"""
 from __future__ import annotations
 
 import logging
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import formatdate
 from io import BufferedReader, BytesIO
+from mimetypes import guess_type
 from pathlib import Path
-from typing import BinaryIO
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Iterable, Iterator, List
 
-import boto3
-from botocore.client import Config
-from botocore.exceptions import ClientError
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
 
 from .config import get_settings
+from .signing import PROBE_KEY, PresignCache, SigV4Presigner
+from .uploads import BLOB_PREFIX
+
+if TYPE_CHECKING:
+    import boto3
 
 logger = logging.getLogger(__name__)
 
+# S3 error codes worth retrying; anything else (AccessDenied, NoSuchBucket...) fails fast.
+RETRYABLE_ERROR_CODES = frozenset(
+    {"RequestTimeout", "RequestTimeTooSkewed", "SlowDown", "InternalError", "ServiceUnavailable", "Throttling"}
+)
+
+# Content-addressed blobs never change under their key.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+STREAM_CHUNK_BYTES = 256 * 1024
+
+_BLOB_KEY = re.compile(rf"^{re.escape(BLOB_PREFIX)}/[0-9a-f]{{2}}/([0-9a-f]{{64}})(\.[^/]*)?$")
+
+
+@dataclass(slots=True)
+class UploadItem:
+    """One object of a batch upload; ``open`` is called again on every retry."""
+
+    key: str
+    open: Callable[[], BinaryIO]
+    size: int
+    content_type: str | None = None
+
+
+@dataclass(slots=True)
+class UploadReport:
+    objects: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    retries: int = 0
+    multipart_objects: int = 0
+    failed_keys: List[str] = field(default_factory=list)
+
+    @property
+    def objects_per_second(self) -> float:
+        return self.objects / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / self.seconds / (1024 * 1024) if self.seconds else 0.0
+
+
+class BatchUploadError(RuntimeError):
+    """Raised when members of a batch upload still fail after retries."""
+
+    def __init__(self, report: UploadReport) -> None:
+        super().__init__(f"{len(report.failed_keys)} object(s) failed to upload, e.g. {report.failed_keys[0]}")
+        self.report = report
+
+
+def _is_retryable(exc: Exception) -> bool:
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    if isinstance(exc, ClientError):
+        error = exc.response.get("Error", {})
+        status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return error.get("Code") in RETRYABLE_ERROR_CODES or status >= 500
+    return isinstance(exc, (BotoCoreError, ConnectionError, TimeoutError))
+
+
+class Storage(ABC):
+    """Interface shared by the storage backends.
+
+    Subclasses implement :meth:`upload`, :meth:`_upload_item`, :meth:`_sign`
+    and :meth:`serve`; batching, retries and URL caching live here.
+    """
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self._upload_workers = settings.s3_upload_workers
+        self._max_attempts = settings.s3_upload_max_attempts
+        self._backoff_seconds = settings.s3_upload_backoff_seconds
+        self._presign_cache = PresignCache(settings.presign_cache_size, settings.presign_reuse_fraction)
+        self._cache_max_age = settings.storage_cache_max_age_seconds
+
+    def warm_up(self) -> None:
+        """Do any slow set-up ahead of the first request."""
+
+    @abstractmethod
+    def upload(self, key: str, data: BinaryIO, content_type: str | None = None) -> None:
+        """Store one object."""
+
+    @abstractmethod
+    def _upload_item(self, item: UploadItem) -> None:
+        """Upload one batch member; errors propagate to the retry loop."""
+
+    @abstractmethod
+    def _sign(self, key: str, expires_in: int) -> str:
+        """Return a GET URL for ``key``; :meth:`presign` caches the result."""
+
+    @abstractmethod
+    def serve(self, request: Request, key: str) -> Response:
+        """Respond with the body of ``key``, honouring conditional and range headers.
+
+        Blocking; call it from a worker thread. Raises FileNotFoundError if
+        the object does not exist and ValueError if the key is invalid.
+        """
+
+    def cache_control(self, key: str) -> str:
+        if _BLOB_KEY.match(key):
+            return IMMUTABLE_CACHE_CONTROL
+        return f"private, max-age={self._cache_max_age}"
+
+    def _prepare_upload(self) -> None:
+        """Hook run once before a batch upload."""
+
+    def _is_retryable(self, exc: Exception) -> bool:
+        return False
+
+    def _is_multipart(self, item: UploadItem) -> bool:
+        return False
+
+    def upload_many(
+        self,
+        items: Iterable[UploadItem],
+        max_workers: int | None = None,
+        progress: Callable[[UploadItem], None] | None = None,
+    ) -> UploadReport:
+        """Upload ``items`` through a bounded thread pool, retrying transient failures.
+
+        Failed attempts back off exponentially with full jitter. ``progress``
+        is called from the worker threads after each object lands. Raises
+        :class:`BatchUploadError` (carrying the report) if any object still
+        fails after ``s3_upload_max_attempts`` tries.
+        """
+
+        self._prepare_upload()
+        items = list(items)
+        report = UploadReport()
+        lock = threading.Lock()
+
+        def run(item: UploadItem) -> None:
+            for attempt in range(1, self._max_attempts + 1):
+                try:
+                    self._upload_item(item)
+                except Exception as exc:
+                    if attempt == self._max_attempts or not self._is_retryable(exc):
+                        logger.warning("Upload of %s failed after %d attempt(s): %s", item.key, attempt, exc)
+                        with lock:
+                            report.failed_keys.append(item.key)
+                        return
+                    with lock:
+                        report.retries += 1
+                    time.sleep(random.uniform(0, self._backoff_seconds * 2 ** (attempt - 1)))
+                else:
+                    with lock:
+                        report.objects += 1
+                        report.bytes += item.size
+                        if self._is_multipart(item):
+                            report.multipart_objects += 1
+                    if progress is not None:
+                        progress(item)
+                    return
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers or self._upload_workers, thread_name_prefix="storage-upload") as pool:
+            # Consume the iterator so unexpected errors in ``run`` propagate.
+            list(pool.map(run, items))
+        report.seconds = time.perf_counter() - started
+
+        if report.failed_keys:
+            raise BatchUploadError(report)
+        return report
+
+    def upload_bytes(self, key: str, payload: bytes, content_type: str | None = None) -> None:
+        self.upload(key, BytesIO(payload), content_type)
+
+    def upload_file(self, source_path: Path, destination_key: str) -> None:
+        with source_path.open("rb") as handle:
+            self.upload(destination_key, handle)
+
+    def presign(self, key: str, expires_in: int) -> str:
+        """Return a GET URL for ``key`` valid for at least part of ``expires_in``.
 
-class S3Storage:
+        URLs are shared across callers and reused while more than
+        ``presign_reuse_fraction`` of their lifetime remains.
+        """
+
+        return self._presign_cache.get_or_sign(key, expires_in, self._sign)
+
+    def presign_stats(self) -> dict[str, object]:
+        return self._presign_cache.stats()
+
+
+class S3Storage(Storage):
     """Encapsulates S3 interactions used by the service."""
 
     def __init__(self) -> None:
+        super().__init__()
+        settings = get_settings()
+        self._multipart_threshold = settings.s3_multipart_threshold_bytes
+        self._bucket = settings.s3_bucket
+        self._presigner: SigV4Presigner | None = None
+        self._transfer_config: Any = None
+        self._s3_client: Any = None
+        self._client_lock = threading.Lock()
+        self._bucket_ready = False
+
+    @property
+    def _client(self) -> Any:
+        client = self._s3_client
+        if client is None:
+            with self._client_lock:
+                if self._s3_client is None:
+                    self._create_client()
+                client = self._s3_client
+        return client
+
+    def _create_client(self) -> None:
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.client import Config
+
         settings = get_settings()
         session = boto3.session.Session(
             aws_access_key_id=settings.s3_access_key,
             aws_secret_access_key=settings.s3_secret_key,
             region_name=settings.s3_region,
         )
-        config = Config(signature_version="s3v4")
-        self._client = session.client(
+        # Small members go out as single PUTs from the batch pool; only large
+        # media is split into parts, uploaded a few at a time per object.
+        self._transfer_config = TransferConfig(
+            multipart_threshold=settings.s3_multipart_threshold_bytes,
+            multipart_chunksize=settings.s3_multipart_chunk_bytes,
+            max_concurrency=settings.s3_multipart_concurrency,
+            use_threads=True,
+        )
+        config = Config(
+            signature_version="s3v4",
+            max_pool_connections=settings.s3_upload_workers * settings.s3_multipart_concurrency,
+        )
+        client = session.client(
             "s3",
             endpoint_url=settings.s3_endpoint_url,
             config=config,
             use_ssl=settings.s3_use_ssl,
         )
-        self._bucket = settings.s3_bucket
-        self._ensure_bucket()
+        if settings.presign_local_signing:
+            self._presigner = self._build_presigner(session, client)
+        self._s3_client = client
+
+    def _build_presigner(self, session: boto3.session.Session, client: Any) -> SigV4Presigner | None:
+        """Derive a local signer from one URL botocore presigns, or ``None`` to keep using botocore."""
+
+        from botocore.exceptions import NoCredentialsError
+
+        credentials = session.get_credentials()
+        if credentials is None:
+            return None
+        try:
+            probe = client.generate_presigned_url(
+                "get_object", Params={"Bucket": self._bucket, "Key": PROBE_KEY}, ExpiresIn=60
+            )
+            return SigV4Presigner(probe, credentials.get_frozen_credentials)
+        except (NoCredentialsError, KeyError, IndexError, ValueError):
+            logger.info("Local presigning unavailable, falling back to botocore", exc_info=True)
+            return None
+
+    def ensure_bucket(self) -> None:
+        """Create the bucket if it is missing; only the first call does any I/O."""
+
+        if self._bucket_ready:
+            return
+        from botocore.exceptions import ClientError
 
-    def _ensure_bucket(self) -> None:
         try:
             self._client.head_bucket(Bucket=self._bucket)
         except ClientError:
             logger.info("Bucket %s missing, attempting to create", self._bucket)
             self._client.create_bucket(Bucket=self._bucket)
+        self._bucket_ready = True
+
+    def warm_up(self) -> None:
+        """Import boto3, build the client and check the bucket ahead of the first request."""
+
+        self.ensure_bucket()
 
     def upload(self, key: str, data: BinaryIO, content_type: str | None = None) -> None:
+        self.ensure_bucket()
         extra_args = {"ACL": "private"}
         if content_type:
             extra_args["ContentType"] = content_type
         self._client.upload_fileobj(data, self._bucket, key, ExtraArgs=extra_args)
 
-    def upload_bytes(self, key: str, payload: bytes, content_type: str | None = None) -> None:
-        self.upload(key, BytesIO(payload), content_type)
+    def _upload_item(self, item: UploadItem) -> None:
+        extra_args = {"ACL": "private"}
+        if item.content_type:
+            extra_args["ContentType"] = item.content_type
+        client = self._client
+        with item.open() as data:
+            if item.size < self._multipart_threshold:
+                client.put_object(Bucket=self._bucket, Key=item.key, Body=data.read(), **extra_args)
+            else:
+                client.upload_fileobj(data, self._bucket, item.key, ExtraArgs=extra_args, Config=self._transfer_config)
 
-    def upload_file(self, source_path: Path, destination_key: str) -> None:
-        with source_path.open("rb") as handle:
-            self.upload(destination_key, handle)
+    def _prepare_upload(self) -> None:
+        self.ensure_bucket()
 
-    def presign(self, key: str, expires_in: int) -> str:
-        return self._client.generate_presigned_url(
+    def _is_retryable(self, exc: Exception) -> bool:
+        return _is_retryable(exc)
+
+    def _is_multipart(self, item: UploadItem) -> bool:
+        return item.size >= self._multipart_threshold
+
+    def _sign(self, key: str, expires_in: int) -> str:
+        client = self._client
+        if self._presigner is not None:
+            return self._presigner.presign_get(key, expires_in)
+        return client.generate_presigned_url(
             "get_object", Params={"Bucket": self._bucket, "Key": key}, ExpiresIn=expires_in
         )
 
+    def serve(self, request: Request, key: str) -> Response:
+        """Stream ``key`` from the bucket through the service.
+
+        Range and If-None-Match are forwarded to S3. S3 has no If-Range, so a
+        range request carrying one is sent with If-Match instead and repeated
+        without the range when the object has changed.
+        """
+
+        from botocore.exceptions import ClientError
+
+        params: dict[str, Any] = {"Bucket": self._bucket, "Key": key}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            params["IfNoneMatch"] = if_none_match
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        # A date-valued If-Range cannot be checked by S3; send the whole object.
+        if range_header and (if_range is None or if_range.strip().startswith('"')):
+            params["Range"] = range_header
+            if if_range:
+                params["IfMatch"] = if_range.strip()
+
+        cache_control = self.cache_control(key)
+        try:
+            try:
+                obj = self._client.get_object(**params)
+            except ClientError as exc:
+                if "IfMatch" not in params or _status(exc) != 412:
+                    raise
+                del params["Range"], params["IfMatch"]
+                obj = self._client.get_object(**params)
+        except ClientError as exc:
+            status = _status(exc)
+            headers = exc.response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+            if status == 304:
+                return Response(status_code=304, headers={"etag": headers.get("etag", ""), "cache-control": cache_control})
+            if status == 416:
+                return Response(status_code=416)
+            if status == 404 or exc.response.get("Error", {}).get("Code") in ("NoSuchKey", "NotFound"):
+                raise FileNotFoundError(key) from exc
+            raise
+
+        headers = {
+            "etag": obj["ETag"],
+            "cache-control": cache_control,
+            "last-modified": formatdate(obj["LastModified"].timestamp(), usegmt=True),
+            "accept-ranges": "bytes",
+            "content-length": str(obj["ContentLength"]),
+        }
+        if obj.get("ContentRange"):
+            headers["content-range"] = obj["ContentRange"]
+        media_type = guess_type(key)[0] or obj.get("ContentType") or "application/octet-stream"
+        return StreamingResponse(
+            _iter_body(obj["Body"]),
+            status_code=206 if obj.get("ContentRange") else 200,
+            headers=headers,
+            media_type=media_type,
+        )
+
+    def presign_stats(self) -> dict[str, object]:
+        return {"local_signing": self._presigner is not None, **super().presign_stats()}
 
-_storage_instance: S3Storage | None = None
 
+def _status(exc: Exception) -> int:
+    return getattr(exc, "response", {}).get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
 
-def get_storage() -> S3Storage:
+
+def _iter_body(body: Any) -> Iterator[bytes]:
+    try:
+        yield from body.iter_chunks(STREAM_CHUNK_BYTES)
+    finally:
+        body.close()
+
+
+_storage_instance: Storage | None = None
+_storage_lock = threading.Lock()
+
+
+def create_storage(backend: str) -> Storage:
+    if backend == "s3":
+        return S3Storage()
+    if backend == "filesystem":
+        from .local_storage import FilesystemStorage
+
+        return FilesystemStorage()
+    raise ValueError(f"Unknown storage backend {backend!r}; expected 's3' or 'filesystem'")
+
+
+def get_storage() -> Storage:
     global _storage_instance
     if _storage_instance is None:
-        _storage_instance = S3Storage()
+        with _storage_lock:
+            if _storage_instance is None:
+                _storage_instance = create_storage(get_settings().storage_backend)
     return _storage_instance
 
 
-__all__ = ["S3Storage", "get_storage"]
+def storage_stats() -> dict[str, object]:
+    """Presign statistics, without creating the storage client if it was never used."""
+
+    if _storage_instance is None:
+        return {}
+    return {"presign": _storage_instance.presign_stats()}
+
+
+__all__ = [
+    "BatchUploadError",
+    "IMMUTABLE_CACHE_CONTROL",
+    "S3Storage",
+    "Storage",
+    "UploadItem",
+    "UploadReport",
+    "create_storage",
+    "get_storage",
+    "storage_stats",
+]
@@ -0,0 +1,230 @@
+"""Streaming intake for uploaded SCORM archives.
+
+The multipart request body is parsed as it arrives and the archive part
+written straight into a staging file on disk, hashing as it goes, so memory
+per upload stays at roughly one chunk whatever the package size and the
+archive is written once; the staged archive is then ingested by a background
+job. The compressed size is bounded while bytes arrive (and up front, from
+Content-Length), the total uncompressed size the archive declares once it is
+staged.
+
+Members are stored content-addressed under ``scorm/blobs`` so unchanged
+assets are not uploaded again for a new package version.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import posixpath
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from .config import get_settings
+
+BLOB_PREFIX = "scorm/blobs"
+# Room for the multipart boundaries and part headers around the archive.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class PackageTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limits."""
+
+
+class InvalidUploadError(ValueError):
+    """Raised when an upload request does not carry a zipped package."""
+
+
+@dataclass(slots=True)
+class StagedUpload:
+    path: Path
+    size: int
+    sha256: str
+
+
+class _ArchiveWriter:
+    """Multipart callbacks writing the ``field`` part to ``partial``.
+
+    Runs on a worker thread: every callback fires from ``MultipartParser.write``.
+    """
+
+    def __init__(self, partial: Path, field: str, max_bytes: int) -> None:
+        self.partial = partial
+        self.field = field.encode()
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.complete = False
+        self._handle = None
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: dict[bytes, bytes] = {}
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name") != self.field or self.complete:
+            return
+        filename = options.get(b"filename", b"").decode("utf-8", "replace")
+        if not filename.lower().endswith(".zip"):
+            raise InvalidUploadError("Only .zip uploads are supported")
+        self._handle = self.partial.open("wb")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._handle is None:
+            return
+        self.size += end - start
+        if self.size > self.max_bytes:
+            raise PackageTooLargeError(f"SCORM package exceeds the {self.max_bytes} byte upload limit")
+        chunk = data[start:end]
+        self.digest.update(chunk)
+        self._handle.write(chunk)
+
+    def on_part_end(self) -> None:
+        if self._handle is not None:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self._handle.close()
+            self._handle = None
+            self.complete = True
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+async def stage_upload(
+    request: Request,
+    directory: Path,
+    name: str,
+    field: str = "file",
+    max_bytes: int | None = None,
+    chunk_size: int | None = None,
+) -> StagedUpload:
+    """Stream the ``field`` part of a multipart ``request`` to ``directory/name.zip``.
+
+    Reads the body itself rather than through ``request.form()``, which
+    spools the whole file before the size limit could apply. Parsing and disk
+    writes run on the threadpool, one ``chunk_size`` buffer at a time. The
+    archive is written to a ``.part`` file first and renamed once complete,
+    so a staged archive is never partial.
+    """
+
+    settings = get_settings()
+    max_bytes = settings.scorm_max_upload_bytes if max_bytes is None else max_bytes
+    chunk_size = chunk_size or settings.scorm_upload_chunk_bytes
+
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise PackageTooLargeError(f"SCORM package exceeds the {max_bytes} byte upload limit")
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type.lower() != b"multipart/form-data" or b"boundary" not in options:
+        raise InvalidUploadError("Expected a multipart/form-data upload")
+
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"{name}.zip"
+    partial = directory / f"{name}.zip.part"
+    writer = _ArchiveWriter(partial, field, max_bytes)
+    callbacks = {
+        callback: getattr(writer, callback)
+        for callback in (
+            "on_part_begin",
+            "on_header_field",
+            "on_header_value",
+            "on_header_end",
+            "on_headers_finished",
+            "on_part_data",
+            "on_part_end",
+        )
+    }
+    parser = MultipartParser(options[b"boundary"], callbacks)
+    buffer = bytearray()
+    try:
+        try:
+            async for chunk in request.stream():
+                buffer += chunk
+                if len(buffer) >= chunk_size:
+                    await run_in_threadpool(parser.write, bytes(buffer))
+                    buffer.clear()
+            await run_in_threadpool(parser.write, bytes(buffer))
+            parser.finalize()
+        except MultipartParseError as exc:
+            raise InvalidUploadError(f"Malformed multipart upload: {exc}") from exc
+        if not writer.complete:
+            raise InvalidUploadError(f"No complete {field!r} file part in the upload")
+        os.replace(partial, target)
+    except BaseException:
+        writer.close()
+        partial.unlink(missing_ok=True)
+        raise
+    return StagedUpload(path=target, size=writer.size, sha256=writer.digest.hexdigest())
+
+
+def check_uncompressed_size(archive: zipfile.ZipFile, max_bytes: int | None = None) -> int:
+    """Return the declared uncompressed size of ``archive``, enforcing the limit.
+
+    ``ZipExtFile`` never yields more than a member's declared size, so the
+    sum of the central directory entries bounds what extraction can produce.
+    """
+
+    if max_bytes is None:
+        max_bytes = get_settings().scorm_max_uncompressed_bytes
+    total = 0
+    for item in archive.infolist():
+        total += item.file_size
+        if total > max_bytes:
+            raise PackageTooLargeError(f"SCORM package expands beyond the {max_bytes} byte limit")
+    return total
+
+
+def hash_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, chunk_size: int | None = None) -> str:
+    """Return the SHA-256 of an archive member, streamed in chunks."""
+
+    chunk_size = chunk_size or get_settings().scorm_upload_chunk_bytes
+    digest = hashlib.sha256()
+    with archive.open(info) as data:
+        while chunk := data.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_key(sha256: str, path: str) -> str:
+    """Content-addressed storage key for a member.
+
+    The extension is kept so the object's content type (set from it at
+    upload) stays right for every path that shares the blob.
+    """
+
+    extension = posixpath.splitext(path)[1].lower()
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}{extension}"
+
+
+__all__ = [
+    "BLOB_PREFIX",
+    "InvalidUploadError",
+    "MULTIPART_OVERHEAD_BYTES",
+    "PackageTooLargeError",
+    "StagedUpload",
+    "blob_key",
+    "check_uncompressed_size",
+    "hash_member",
+    "stage_upload",
+]
@@ -0,0 +1,94 @@
+"""Start-up warm-up for the API process.
+
+Schema setup and the object-storage bucket check used to happen inside the
+first request that needed them. :func:`warm_up` runs them at start-up
+instead, concurrently and bounded by ``STARTUP_WARMUP_TIMEOUT_SECONDS``. A
+step that overruns keeps going in the background and is reported as timed
+out; the process still starts, and the first request that needs that step
+waits for it.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from .database import get_database, initialize_database, seed_demo_data
+from .storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+_last_report: Dict[str, Any] = {}
+
+
+def _warm_database() -> None:
+    initialize_database()
+    seed_demo_data()
+    get_database()
+
+
+def _warm_storage() -> None:
+    get_storage().warm_up()
+
+
+WARMUP_STEPS: Dict[str, Callable[[], None]] = {
+    "database": _warm_database,
+    "storage": _warm_storage,
+}
+
+
+def warm_up(timeout: float, steps: Dict[str, Callable[[], None]] | None = None) -> Dict[str, Any]:
+    """Run the warm-up steps concurrently, waiting at most ``timeout`` seconds for all of them.
+
+    Returns a report with each step's status (``ok``, ``failed`` or
+    ``timed_out``) and duration; the latest report is kept for
+    :func:`warmup_report`.
+    """
+
+    global _last_report
+    started = time.perf_counter()
+    results: Dict[str, Dict[str, Any]] = {}
+    lock = threading.Lock()
+
+    def run(name: str, step: Callable[[], None]) -> None:
+        step_started = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:
+            logger.exception("Warm-up step %s failed", name)
+            outcome: Dict[str, Any] = {"status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+        else:
+            outcome = {"status": "ok"}
+        outcome["seconds"] = round(time.perf_counter() - step_started, 4)
+        with lock:
+            results[name] = outcome
+
+    threads = [
+        threading.Thread(target=run, args=(name, step), name=f"warmup-{name}", daemon=True)
+        for name, step in (steps or WARMUP_STEPS).items()
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = started + timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.perf_counter()))
+
+    with lock:
+        report = {
+            "seconds": round(time.perf_counter() - started, 4),
+            "timeout_seconds": timeout,
+            "steps": {name: dict(results.get(name, {"status": "timed_out"})) for name in (steps or WARMUP_STEPS)},
+        }
+    for name, outcome in report["steps"].items():
+        if outcome["status"] == "timed_out":
+            logger.warning("Warm-up step %s still running after %.1fs; continuing start-up", name, timeout)
+    _last_report = report
+    return report
+
+
+def warmup_report() -> Dict[str, Any]:
+    return dict(_last_report)
+
+
+__all__ = ["WARMUP_STEPS", "warm_up", "warmup_report"]
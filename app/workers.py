@@ -0,0 +1,115 @@
+"""Shared plumbing for the background threads that keep SCORM state tidy.
+
+:class:`PeriodicWorker` owns the daemon thread, its stop and wake events and
+the run counters every worker reports; a subclass implements
+:meth:`PeriodicWorker.run_once` and adds its own counters through
+:meth:`PeriodicWorker._stats`. :class:`SharedWorker` holds the one
+process-wide instance behind each module's ``get_*``/``stop_*`` pair.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Generic, TypeVar
+
+
+class PeriodicWorker:
+    """Daemon thread calling :meth:`run_once` every ``interval`` seconds.
+
+    :meth:`wake` runs it early. With ``run_first`` the first run happens as
+    soon as the thread starts rather than one interval later. Exceptions are
+    logged and the thread carries on; failures a worker wants reported are
+    counted by ``run_once`` itself.
+    """
+
+    def __init__(self, interval: float, name: str, run_first: bool = False) -> None:
+        self._interval = interval
+        self._name = name
+        self._run_first = run_first
+        self._lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._runs = 0
+        self._last_run: Dict[str, Any] = {}
+
+    def run_once(self) -> Any:
+        raise NotImplementedError
+
+    def start(self) -> None:
+        """Start the thread unless it is running or the worker was stopped; safe to call repeatedly."""
+
+        with self._thread_lock:
+            if self._thread is not None or self._stopped.is_set():
+                return
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        if self._run_first:
+            self._run_logged()
+        while not self._stopped.is_set():
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            if not self._stopped.is_set():
+                self._run_logged()
+
+    def _run_logged(self) -> None:
+        try:
+            self.run_once()
+        except Exception:
+            logging.getLogger(type(self).__module__).exception("%s run failed", self._name)
+
+    def _record_run(self, **details: Any) -> None:
+        """Count a finished run and keep its details; call with ``self._lock`` held."""
+
+        self._runs += 1
+        self._last_run = {"finished_at": datetime.utcnow().isoformat(), **details}
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _stats(self) -> Dict[str, Any]:
+        return {}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats(), "runs": self._runs, "last_run": dict(self._last_run)}
+
+
+W = TypeVar("W", bound=PeriodicWorker)
+
+
+class SharedWorker(Generic[W]):
+    """Lazily created process-wide worker; :meth:`stop` discards it so the next :meth:`get` builds a new one."""
+
+    def __init__(self, factory: Callable[[], W]) -> None:
+        self._factory = factory
+        self._worker: W | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> W:
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = self._factory()
+        return self._worker
+
+    def stop(self) -> None:
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.stop()
+
+
+__all__ = ["PeriodicWorker", "SharedWorker"]
@@ -1,86 +1,248 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse
+import csv
+import zlib
+from io import StringIO
+from typing import Callable, Iterator, Sequence
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 
 from app.analytics import (
+    DASHBOARD_SECTIONS,
+    cache_key,
+    data_version,
     fetch_course_progress,
+    fetch_dashboard,
     fetch_group_progress,
-    fetch_learner_progress,
+    fetch_learner_progress_page,
+    iter_course_progress,
+    iter_group_progress,
+    iter_learner_progress,
 )
+from app import async_analytics
+from app.async_analytics import ExecutorBusyError
+from app.cache import etag_matches, make_etag
+from app.columnar import ColumnarUnavailableError, get_snapshot
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
 
+async def _cached_json(
+    name: str,
+    filters: dict[str, object],
+    build: Callable[[], object],
+    if_none_match: str | None,
+) -> Response:
+    """Serve ``build()`` as JSON through the versioned cache with ETag/304 support.
+
+    Database work runs on the dedicated analytics executor; concurrent misses
+    for the same filters and data version are built once.
+    """
+
+    try:
+        key = cache_key(name, **filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    try:
+        version = await async_analytics.data_version()
+        etag = make_etag(key, version)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        entry = await async_analytics.cached_response(name, version, build, **filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except ExecutorBusyError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except ColumnarUnavailableError as exc:
+        raise HTTPException(status_code=501, detail=str(exc)) from exc
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
 @router.get("/course-progress")
-def course_progress(
+async def course_progress(
     course_id: int | None = Query(default=None, description="Optional course identifier"),
     start_date: str | None = Query(default=None, description="ISO-8601 start date filter"),
     end_date: str | None = Query(default=None, description="ISO-8601 end date filter"),
+    if_none_match: str | None = Header(default=None),
 ):
-    try:
-        return fetch_course_progress(course_id=course_id, start_date=start_date, end_date=end_date)
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    filters = {"course_id": course_id, "start_date": start_date, "end_date": end_date}
+    return await _cached_json("course_progress", filters, lambda: fetch_course_progress(**filters), if_none_match)
 
 
 @router.get("/group-progress")
-def group_progress(
+async def group_progress(
     course_id: int | None = Query(default=None),
     group_id: int | None = Query(default=None),
     start_date: str | None = Query(default=None),
     end_date: str | None = Query(default=None),
+    if_none_match: str | None = Header(default=None),
 ):
-    try:
-        return fetch_group_progress(
-            course_id=course_id,
-            group_id=group_id,
-            start_date=start_date,
-            end_date=end_date,
-        )
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    filters = {
+        "course_id": course_id,
+        "group_id": group_id,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    return await _cached_json("group_progress", filters, lambda: fetch_group_progress(**filters), if_none_match)
 
 
 @router.get("/learner-progress")
-def learner_progress(
+async def learner_progress(
     course_id: int | None = Query(default=None),
     group_id: int | None = Query(default=None),
     learner_id: int | None = Query(default=None),
     status: str | None = Query(default=None),
     start_date: str | None = Query(default=None),
     end_date: str | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000, description="Maximum rows per page"),
+    cursor: str | None = Query(default=None, description="Opaque next_cursor from the previous page"),
+    if_none_match: str | None = Header(default=None),
 ):
-    try:
-        return fetch_learner_progress(
-            course_id=course_id,
-            group_id=group_id,
-            learner_id=learner_id,
-            status=status,
-            start_date=start_date,
-            end_date=end_date,
-        )
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    filters = {
+        "course_id": course_id,
+        "group_id": group_id,
+        "learner_id": learner_id,
+        "status": status,
+        "start_date": start_date,
+        "end_date": end_date,
+        "limit": limit,
+        "cursor": cursor,
+    }
+    return await _cached_json("learner_progress", filters, lambda: fetch_learner_progress_page(**filters), if_none_match)
+
+
+@router.get("/dashboard")
+async def dashboard(
+    include: str = Query(
+        default=",".join(DASHBOARD_SECTIONS),
+        description="Comma-separated sections to return: course, group, learner",
+    ),
+    course_id: int | None = Query(default=None),
+    group_id: int | None = Query(default=None),
+    learner_id: int | None = Query(default=None),
+    status: str | None = Query(default=None),
+    start_date: str | None = Query(default=None),
+    end_date: str | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000, description="Maximum learner rows"),
+    cursor: str | None = Query(default=None, description="Opaque learner next_cursor"),
+    if_none_match: str | None = Header(default=None),
+):
+    sections = tuple(sorted({part.strip() for part in include.split(",") if part.strip()}))
+    filters = {
+        "sections": sections,
+        "course_id": course_id,
+        "group_id": group_id,
+        "learner_id": learner_id,
+        "status": status,
+        "start_date": start_date,
+        "end_date": end_date,
+        "limit": limit,
+        "cursor": cursor,
+    }
+    return await _cached_json("dashboard", filters, lambda: fetch_dashboard(**filters), if_none_match)
+
+
+@router.get("/score-distribution")
+async def score_distribution(
+    by: str = Query(default="course", pattern="^(course|group)$"),
+    bins: int = Query(default=10, ge=1, le=100),
+    course_id: int | None = Query(default=None),
+    group_id: int | None = Query(default=None),
+    start_date: str | None = Query(default=None),
+    end_date: str | None = Query(default=None),
+    if_none_match: str | None = Header(default=None),
+):
+    filters = {
+        "by": by,
+        "bins": bins,
+        "course_id": course_id,
+        "group_id": group_id,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    return await _cached_json(
+        "score_distribution", filters, lambda: get_snapshot().score_distribution(**filters), if_none_match
+    )
+
+
+@router.get("/completion-funnel")
+async def completion_funnel(
+    by: str = Query(default="course", pattern="^(course|group)$"),
+    course_id: int | None = Query(default=None),
+    group_id: int | None = Query(default=None),
+    start_date: str | None = Query(default=None),
+    end_date: str | None = Query(default=None),
+    if_none_match: str | None = Header(default=None),
+):
+    filters = {
+        "by": by,
+        "course_id": course_id,
+        "group_id": group_id,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    return await _cached_json(
+        "completion_funnel", filters, lambda: get_snapshot().completion_funnel(**filters), if_none_match
+    )
 
 
-def _as_csv(rows: list[dict[str, object]], filename: str) -> StreamingResponse:
-    import csv
-    from io import StringIO
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
 
+
+def _csv_chunks(batches: Iterator[tuple[list[str], list[Sequence[object]]]]) -> Iterator[bytes]:
     buffer = StringIO()
-    if rows:
-        writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()))
-        writer.writeheader()
+    writer = csv.writer(buffer)
+    header_written = False
+    for columns, rows in batches:
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
         writer.writerows(rows)
-    else:
-        buffer.write("No data available\n")
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if not header_written:
+        yield b"No data available\n"
+
+
+def _gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
 
-    buffer.seek(0)
+
+def _as_csv(
+    batches: Iterator[tuple[list[str], list[Sequence[object]]]],
+    filename: str,
+    accept_encoding: str | None,
+) -> StreamingResponse:
     headers = {
         "Content-Disposition": f"attachment; filename={filename}",
+        "Vary": "Accept-Encoding",
     }
-    return StreamingResponse(buffer, media_type="text/csv", headers=headers)
+    body = _csv_chunks(batches)
+    if _accepts_gzip(accept_encoding):
+        headers["Content-Encoding"] = "gzip"
+        body = _gzip_chunks(body)
+    return StreamingResponse(body, media_type="text/csv", headers=headers)
 
 
 @router.get("/course-progress.csv")
@@ -88,9 +250,13 @@ def course_progress_csv(
     course_id: int | None = Query(default=None),
     start_date: str | None = Query(default=None),
     end_date: str | None = Query(default=None),
+    accept_encoding: str | None = Header(default=None),
 ):
-    rows = fetch_course_progress(course_id=course_id, start_date=start_date, end_date=end_date)
-    return _as_csv(rows, "course-progress.csv")
+    try:
+        batches = iter_course_progress(course_id=course_id, start_date=start_date, end_date=end_date)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return _as_csv(batches, "course-progress.csv", accept_encoding)
 
 
 @router.get("/group-progress.csv")
@@ -99,9 +265,13 @@ def group_progress_csv(
     group_id: int | None = Query(default=None),
     start_date: str | None = Query(default=None),
     end_date: str | None = Query(default=None),
+    accept_encoding: str | None = Header(default=None),
 ):
-    rows = fetch_group_progress(course_id=course_id, group_id=group_id, start_date=start_date, end_date=end_date)
-    return _as_csv(rows, "group-progress.csv")
+    try:
+        batches = iter_group_progress(course_id=course_id, group_id=group_id, start_date=start_date, end_date=end_date)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return _as_csv(batches, "group-progress.csv", accept_encoding)
 
 
 @router.get("/learner-progress.csv")
@@ -112,13 +282,17 @@ def learner_progress_csv(
     status: str | None = Query(default=None),
     start_date: str | None = Query(default=None),
     end_date: str | None = Query(default=None),
+    accept_encoding: str | None = Header(default=None),
 ):
-    rows = fetch_learner_progress(
-        course_id=course_id,
-        group_id=group_id,
-        learner_id=learner_id,
-        status=status,
-        start_date=start_date,
-        end_date=end_date,
-    )
-    return _as_csv(rows, "learner-progress.csv")
+    try:
+        batches = iter_learner_progress(
+            course_id=course_id,
+            group_id=group_id,
+            learner_id=learner_id,
+            status=status,
+            start_date=start_date,
+            end_date=end_date,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return _as_csv(batches, "learner-progress.csv", accept_encoding)
@@ -0,0 +1,138 @@
+"""Measure attempt resume latency as attempts accumulate commits.
+
+For each commit count, a throwaway SCORM database receives that many commits
+per attempt through ``Database.write_cmi_values`` (each commit rewrites
+``cmi.suspend_data``, the location and session time, and records the next of
+a bounded set of interactions). Resume is then timed two ways:
+
+* before: the latest value per element rebuilt from the raw log with
+  ``GROUP BY element``, which is what resuming cost when every delta stayed a
+  row;
+* after: ``Database.load_cmi_state`` once the compactor has folded the log,
+  a single snapshot row read.
+
+Both must return the same state. The run fails (exit status 1) when the
+after-p50 at the largest commit count exceeds ``--max-growth`` times the p50
+at the smallest, i.e. when resume no longer stays flat.
+
+Run ``python -m scripts.cmi_bench``.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import secrets
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from app.database import Database
+
+NAIVE_RESUME_SQL = """
+    SELECT element, value, MAX(committed_at) FROM scorm_cmi_log
+    WHERE attempt_token = ?
+    GROUP BY element
+    ORDER BY element;
+"""
+
+INTERACTIONS = 50
+WRITE_BATCH = 2000
+
+
+def _commits(token: str, commits: int, suspend_bytes: int) -> List[Tuple[str, str, str, str]]:
+    started = datetime(2024, 1, 1)
+    rows = []
+    for commit in range(commits):
+        at = (started + timedelta(seconds=commit)).isoformat(timespec="microseconds")
+        interaction = commit % INTERACTIONS
+        rows.extend(
+            [
+                (token, "cmi.suspend_data", secrets.token_hex(suspend_bytes // 2), at),
+                (token, "cmi.core.lesson_location", f"page-{commit}", at),
+                (token, "cmi.core.session_time", f"00:{commit // 60 % 60:02d}:{commit % 60:02d}", at),
+                (token, f"cmi.interactions.{interaction}.result", "correct" if commit % 3 else "wrong", at),
+            ]
+        )
+    return rows
+
+
+def _time(read: Callable[[str], Dict[str, str]], tokens: Sequence[str], reads: int) -> List[float]:
+    samples = []
+    for index in range(reads):
+        token = tokens[index % len(tokens)]
+        started = time.perf_counter()
+        read(token)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _percentiles(samples: List[float]) -> Tuple[float, float]:
+    cuts = statistics.quantiles(samples, n=100)
+    return cuts[49], cuts[98]
+
+
+def run(commit_counts: Sequence[int], attempts: int, reads: int, suspend_bytes: int) -> List[Tuple[int, float, float, float, float]]:
+    """Return ``(commits, naive p50, naive p99, resume p50, resume p99)`` per commit count."""
+
+    results = []
+    for commits in commit_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            # Database URLs are relative to the working directory.
+            cwd = os.getcwd()
+            os.chdir(directory)
+            db = Database("sqlite:///cmi-bench.db")
+            try:
+                tokens = [secrets.token_urlsafe(16) for _ in range(attempts)]
+                for token in tokens:
+                    rows = _commits(token, commits, suspend_bytes)
+                    for start in range(0, len(rows), WRITE_BATCH):
+                        db.write_cmi_values(rows[start : start + WRITE_BATCH])
+
+                def naive(token: str) -> Dict[str, str]:
+                    with db.get_connection() as conn:
+                        return {row[0]: row[1] for row in conn.execute(NAIVE_RESUME_SQL, (token,))}
+
+                expected = {token: naive(token) for token in tokens}
+                before = _time(naive, tokens, reads)
+                while db.compact_cmi_log(5000)[0]:
+                    pass
+                for token in tokens:
+                    if db.load_cmi_state(token) != expected[token]:
+                        raise AssertionError(f"compacted state of {token} differs from the log after {commits} commits")
+                after = _time(db.load_cmi_state, tokens, reads)
+            finally:
+                db.close()
+                os.chdir(cwd)
+        results.append((commits, *_percentiles(before), *_percentiles(after)))
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, nargs="+", default=[10, 100, 1000, 10000], help="Commits per attempt")
+    parser.add_argument("--attempts", type=int, default=3)
+    parser.add_argument("--reads", type=int, default=300, help="Timed resumes per commit count")
+    parser.add_argument("--suspend-bytes", type=int, default=4096)
+    parser.add_argument("--max-growth", type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    results = run(sorted(args.commits), args.attempts, args.reads, args.suspend_bytes)
+    print(f"{'commits':>8}  {'log GROUP BY p50/p99':>24}  {'snapshot p50/p99':>22}")
+    for commits, naive_p50, naive_p99, p50, p99 in results:
+        print(
+            f"{commits:>8}  {naive_p50 * 1e6:>10.1f}us {naive_p99 * 1e6:>10.1f}us"
+            f"  {p50 * 1e6:>9.1f}us {p99 * 1e6:>9.1f}us"
+        )
+    growth = results[-1][3] / results[0][3]
+    print(f"snapshot p50 growth from {results[0][0]} to {results[-1][0]} commits: {growth:.2f}x")
+    if growth > args.max_growth:
+        print(f"resume latency is not flat (limit {args.max_growth:.1f}x)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Measure local presigning latency against botocore.
+
+Simulates learners launching a course. The content route redirects every
+leaf asset (media, images, fonts, scripts) a launch loads to a presigned
+URL, so each launch presigns ``--assets`` objects of its package. Prints
+p50/p99 signing latency per launch for botocore (before) and the cached
+local signer (after). That the local
+signer's URLs are byte-identical to botocore's is checked by
+``tests/test_signing.py``.
+
+Run ``python -m scripts.presign_bench``; moto is needed only for this
+benchmark (``pip install moto``).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable, List, Sequence
+
+from app.config import get_settings
+from app.storage import S3Storage
+
+
+def _percentiles(samples: List[float]) -> str:
+    cuts = statistics.quantiles(samples, n=100)
+    return f"p50={cuts[49] * 1e6:>8.1f}us p99={cuts[98] * 1e6:>8.1f}us"
+
+
+def _launches(sign: Callable[[str, int], str], keys: Sequence[List[str]], launches: int, ttl: int) -> List[float]:
+    samples = []
+    for _ in range(launches):
+        course = random.choice(keys)
+        started = time.perf_counter()
+        for key in course:
+            sign(key, ttl)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=50)
+    parser.add_argument("--assets", type=int, default=20, help="Leaf assets redirected per launch")
+    parser.add_argument("--launches", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    try:
+        from moto import mock_aws
+    except ImportError:
+        print("moto is required for this benchmark: pip install moto", file=sys.stderr)
+        return 2
+
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(name, "testing")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    with mock_aws():
+        settings = get_settings()
+        settings.s3_endpoint_url = None
+        storage = S3Storage()
+        ttl = settings.presign_ttl_seconds
+        keys = [[f"scorm/blobs/{course:02x}/{asset:04d}.js" for asset in range(args.assets)] for course in range(args.courses)]
+        # Warm both code paths so import and first-call costs are not measured.
+        storage._client.generate_presigned_url("get_object", Params={"Bucket": storage._bucket, "Key": "w"})
+        storage.presign("w", ttl)
+
+        before = _launches(
+            lambda key, expires_in: storage._client.generate_presigned_url(
+                "get_object", Params={"Bucket": storage._bucket, "Key": key}, ExpiresIn=expires_in
+            ),
+            keys,
+            args.launches,
+            ttl,
+        )
+        uncached = _launches(storage._sign, keys, args.launches, ttl)
+        after = _launches(storage.presign, keys, args.launches, ttl)
+
+    print(f"botocore      {_percentiles(before)}  per launch of {args.assets} objects")
+    print(f"local signer  {_percentiles(uncached)}")
+    print(f"cached        {_percentiles(after)}  {storage.presign_stats()}")
+    print(f"p50 speedup   {statistics.median(before) / statistics.median(after):.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Check import time and cold start of the API against a budget.
+
+Each measurement runs in a fresh interpreter, as on a newly scheduled pod:
+
+* import: ``python -X importtime -c "import app.main"``. Reports the
+  cumulative import time of ``app.main``, the heaviest top-level packages,
+  and whether boto3 or numpy were imported (neither should be until used).
+* cold start: time from interpreter start to the first successful
+  response. That covers importing the app, running the start-up warm-up
+  (schema setup and the bucket check), and serving ``GET /metrics/startup``.
+
+The exit status is non-zero when a budget is exceeded. Object storage is an
+in-process moto stand-in unless ``--s3-endpoint`` points at a real one; with
+moto, botocore is already imported by the stand-in, so the storage step
+measures client creation and the bucket round trip but not the boto3 import
+(which the import check covers).
+
+Run ``python -m scripts.startup_bench``; moto is needed only without
+``--s3-endpoint`` (``pip install moto``).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+LAZY_MODULES = ("boto3", "botocore", "numpy")
+
+_COLD_START = """
+import time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+import json, os, sys
+harness = 0.0
+if not os.environ.get("S3_ENDPOINT_URL"):
+    before = time.perf_counter()
+    from moto import mock_aws
+    mock_aws().start()
+    harness = time.perf_counter() - before
+
+import app.database
+from pathlib import Path
+app.database.DB_PATH = Path("analytics.db").resolve()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    response = client.get("/metrics/startup")
+    response.raise_for_status()
+    finished = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "total_ms": (finished - started - harness) * 1000,
+    "warmup": response.json(),
+}))
+"""
+
+
+def _environment(workdir: str, s3_endpoint: str | None) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    env.update(DATABASE_URL="sqlite:///lms.db", SCORM_STAGING_DIR=os.path.join(workdir, "ingest"))
+    if s3_endpoint:
+        env["S3_ENDPOINT_URL"] = s3_endpoint
+    else:
+        env.pop("S3_ENDPOINT_URL", None)
+        env.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        env.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    return env
+
+
+def measure_imports(env: Dict[str, str]) -> Tuple[float, List[Tuple[str, float]], Dict[str, bool]]:
+    """Return app.main's cumulative import ms, the heaviest top-level imports and which lazy modules loaded."""
+
+    probe = "import app.main, sys; print(','.join(m for m in %r if m in sys.modules))" % (LAZY_MODULES,)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe], env=env, capture_output=True, text=True, check=True
+    )
+    loaded = set(filter(None, completed.stdout.strip().split(",")))
+    total = 0.0
+    packages: Dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.split("|"))
+        if not cumulative.isdigit():
+            continue
+        if name == "app.main":
+            total = int(cumulative) / 1000
+        top = name.split(".")[0]
+        # A module's cumulative time includes its children; keep the outermost entry per package.
+        packages[top] = max(packages.get(top, 0.0), int(cumulative) / 1000)
+    heaviest = sorted(((name, ms) for name, ms in packages.items() if name != "app"), key=lambda x: -x[1])[:8]
+    return total, heaviest, {module: module in loaded for module in LAZY_MODULES}
+
+
+def measure_cold_start(env: Dict[str, str], workdir: str) -> Dict[str, Any]:
+    completed = subprocess.run(
+        [sys.executable, "-c", _COLD_START], env=env, cwd=workdir, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Cold start failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--import-budget-ms", type=float, default=600.0)
+    parser.add_argument("--cold-start-budget-ms", type=float, default=2000.0)
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts to run; the median is checked")
+    parser.add_argument("--s3-endpoint", default=None, help="Real S3/MinIO endpoint instead of moto")
+    args = parser.parse_args(argv)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        env = _environment(workdir, args.s3_endpoint)
+
+        total, heaviest, lazy = measure_imports(env)
+        print(f"import app.main     {total:8.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+        for name, ms in heaviest:
+            print(f"  {name:<18}{ms:8.1f} ms")
+        for module, loaded in lazy.items():
+            print(f"  {module:<18}{'IMPORTED' if loaded else 'deferred'}")
+            if loaded:
+                failures.append(f"{module} is imported by app.main")
+        if total > args.import_budget_ms:
+            failures.append(f"import took {total:.0f} ms")
+
+        runs = []
+        for _ in range(args.runs):
+            runs.append(measure_cold_start(env, tempfile.mkdtemp(dir=workdir)))
+        runs.sort(key=lambda result: result["total_ms"])
+        median = runs[len(runs) // 2]
+        print(
+            f"cold start          {median['total_ms']:8.1f} ms median of {len(runs)} "
+            f"(budget {args.cold_start_budget_ms:.0f} ms; import {median['import_ms']:.1f} ms)"
+        )
+        for name, step in median["warmup"]["steps"].items():
+            print(f"  warm-up {name:<10}{step['seconds'] * 1000:8.1f} ms {step['status']}")
+            if step["status"] != "ok":
+                failures.append(f"warm-up step {name} {step['status']}")
+        if median["total_ms"] > args.cold_start_budget_ms:
+            failures.append(f"cold start took {median['total_ms']:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
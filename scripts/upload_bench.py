@@ -0,0 +1,123 @@
+"""Measure sequential versus batched upload of SCORM archive members.
+
+Builds a synthetic package (many small assets plus one large media file),
+uploads its members to an in-process S3 stand-in (moto) once with a single
+worker and once through ``S3Storage.upload_many``, checks every object
+arrived intact, and prints the throughput of both runs. A fixed per-request
+delay stands in for the network round trip, which is what the thread pool
+overlaps. A few uploads fail transiently on their first attempt to exercise
+the retry path. Correctness of ``upload_many`` (retries, partial failure,
+the multipart threshold) is covered by ``tests/test_upload_many.py``.
+
+Run ``python -m scripts.upload_bench`` from the repository root; moto is
+needed only for this benchmark (``pip install moto``).
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+from functools import partial
+from typing import Any, List, Sequence
+
+from botocore.exceptions import ClientError
+
+from app.config import get_settings
+from app.storage import S3Storage, UploadItem, UploadReport
+
+
+def build_archive(small_files: int, small_size: int, large_size: int) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for index in range(small_files):
+            archive.writestr(f"assets/file-{index:05d}.js", os.urandom(small_size))
+        if large_size:
+            archive.writestr("media/lecture.mp4", os.urandom(large_size))
+    return buffer.getvalue()
+
+
+def _items(archive: zipfile.ZipFile, prefix: str) -> List[UploadItem]:
+    return [
+        UploadItem(key=f"{prefix}/{info.filename}", open=partial(archive.open, info), size=info.file_size)
+        for info in archive.infolist()
+    ]
+
+
+def _flaky(storage: S3Storage, every: int) -> None:
+    """Make every ``every``-th object fail once with a retryable 503."""
+
+    upload_item = storage._upload_item
+    seen: set[str] = set()
+
+    def wrapped(item: UploadItem) -> None:
+        if every and hash(item.key) % every == 0 and item.key not in seen:
+            seen.add(item.key)
+            raise ClientError(
+                {"Error": {"Code": "SlowDown"}, "ResponseMetadata": {"HTTPStatusCode": 503}}, "PutObject"
+            )
+        upload_item(item)
+
+    storage._upload_item = wrapped  # type: ignore[method-assign]
+
+
+def _verify(storage: S3Storage, archive: zipfile.ZipFile, prefix: str) -> None:
+    client: Any = storage._client
+    for info in archive.infolist():
+        body = client.get_object(Bucket=storage._bucket, Key=f"{prefix}/{info.filename}")["Body"].read()
+        if body != archive.read(info):
+            raise AssertionError(f"{info.filename} was not uploaded intact")
+
+
+def _describe(label: str, report: UploadReport) -> str:
+    return (
+        f"{label:<10} {report.objects:>6} objects {report.bytes / 1024 / 1024:>8.1f} MiB "
+        f"{report.seconds:>7.2f}s {report.objects_per_second:>8.1f} obj/s "
+        f"{report.megabytes_per_second:>7.2f} MiB/s retries={report.retries} multipart={report.multipart_objects}"
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--small-files", type=int, default=300)
+    parser.add_argument("--small-size", type=int, default=4096)
+    parser.add_argument("--large-size", type=int, default=20 * 1024 * 1024)
+    parser.add_argument("--latency-ms", type=float, default=15.0, help="Simulated round-trip time per request")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--flaky-every", type=int, default=50, help="Fail every Nth object once (0 disables)")
+    args = parser.parse_args(argv)
+
+    try:
+        from moto import mock_aws
+    except ImportError:
+        print("moto is required for this benchmark: pip install moto", file=sys.stderr)
+        return 2
+
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(name, "testing")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    payload = build_archive(args.small_files, args.small_size, args.large_size)
+    with mock_aws(), zipfile.ZipFile(io.BytesIO(payload)) as archive:
+        settings = get_settings()
+        settings.s3_endpoint_url = None
+        storage = S3Storage()
+        delay = args.latency_ms / 1000
+        storage._client.meta.events.register_first("before-send", lambda **_: time.sleep(delay))
+        _flaky(storage, args.flaky_every)
+
+        sequential = storage.upload_many(_items(archive, "bench/sequential"), max_workers=1)
+        _verify(storage, archive, "bench/sequential")
+        batched = storage.upload_many(_items(archive, "bench/batched"), max_workers=args.workers)
+        _verify(storage, archive, "bench/batched")
+
+    print(_describe("sequential", sequential))
+    print(_describe("batched", batched))
+    print(f"speedup    {sequential.seconds / batched.seconds:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 const API_BASE = "/api/analytics";
+const LEARNER_PAGE_SIZE = 100;
 
 const charts = {
   course: null,
@@ -14,6 +15,13 @@ const elements = {
   courseDownload: document.querySelector("#download-course"),
   groupDownload: document.querySelector("#download-group"),
   learnerDownload: document.querySelector("#download-learner"),
+  learnerLoadMore: document.querySelector("#learner-load-more"),
+};
+
+const learnerPages = {
+  filters: {},
+  rows: [],
+  nextCursor: null,
 };
 
 document.addEventListener("DOMContentLoaded", () => {
@@ -31,6 +39,8 @@ document.addEventListener("DOMContentLoaded", () => {
     window.setTimeout(refreshDashboard, 50);
   });
 
+  elements.learnerLoadMore.addEventListener("click", loadMoreLearners);
+
   refreshDashboard();
 });
 
@@ -222,20 +232,52 @@ function renderLearnerChart(rows) {
   });
 }
 
+function fetchLearnerPage(filters, cursor) {
+  return fetchJSON("learner-progress", { ...filters, limit: LEARNER_PAGE_SIZE, cursor });
+}
+
+function renderLearners() {
+  renderTable(elements.learnerTable, learnerPages.rows);
+  renderLearnerChart(learnerPages.rows);
+  elements.learnerLoadMore.hidden = !learnerPages.nextCursor;
+}
+
+async function loadMoreLearners() {
+  if (!learnerPages.nextCursor) {
+    return;
+  }
+
+  elements.learnerLoadMore.disabled = true;
+  try {
+    const page = await fetchLearnerPage(learnerPages.filters, learnerPages.nextCursor);
+    learnerPages.rows = learnerPages.rows.concat(page.items);
+    learnerPages.nextCursor = page.next_cursor;
+    renderLearners();
+  } catch (error) {
+    console.error(error);
+    alert(`Unable to load more learners: ${error.message}`);
+  } finally {
+    elements.learnerLoadMore.disabled = false;
+  }
+}
+
 async function refreshDashboard() {
   const filters = readFilters();
   refreshDownloadLinks(filters);
 
   try {
-    const [courseData, groupData, learnerData] = await Promise.all([
-      fetchJSON("course-progress", filters),
-      fetchJSON("group-progress", filters),
-      fetchJSON("learner-progress", filters),
-    ]);
+    const dashboard = await fetchJSON("dashboard", { ...filters, limit: LEARNER_PAGE_SIZE });
+    const courseData = dashboard.course_progress;
+    const groupData = dashboard.group_progress;
+    const learnerPage = dashboard.learner_progress;
+
+    learnerPages.filters = filters;
+    learnerPages.rows = learnerPage.items;
+    learnerPages.nextCursor = learnerPage.next_cursor;
 
     renderTable(elements.courseTable, courseData);
     renderTable(elements.groupTable, groupData);
-    renderTable(elements.learnerTable, learnerData);
+    renderLearners();
 
     renderChart(
       "course",
@@ -250,8 +292,6 @@ async function refreshDashboard() {
       groupData.map((row) => row.group_name || `Group ${row.group_id}`),
       groupData.map((row) => row.average_progress_percent || 0)
     );
-
-    renderLearnerChart(learnerData);
   } catch (error) {
     console.error(error);
     alert(`Unable to refresh analytics: ${error.message}`);
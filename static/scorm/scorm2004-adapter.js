@@ -1,5 +1,9 @@
 (function () {
   const COMMIT_ENDPOINT = window.SCORM_COMMIT_ENDPOINT || '/api/scorm/commit';
+  // Commit only marks the delta ready; batches go out at most this often.
+  const COMMIT_INTERVAL_MS = window.SCORM_COMMIT_INTERVAL_MS || 15000;
+  // Beacons and keepalive fetches are capped at 64 KiB per page.
+  const MAX_BEACON_BYTES = 60000;
   const ATTEMPT_TOKEN =
     window.SCORM_ATTEMPT_TOKEN ||
     new URLSearchParams(window.location.search).get('attempt');
@@ -8,7 +12,12 @@
   let terminated = false;
   let lastError = '0';
   const state = {};
-  const delta = {};
+  // Elements set since the last batch was handed to the network.
+  let delta = {};
+  // The batch currently being sent; at most one request is in flight.
+  let inflight = null;
+  let flushTimer = null;
+  let lastSeq = 0;
 
   function requireToken() {
     if (!ATTEMPT_TOKEN) {
@@ -19,40 +28,129 @@
     return true;
   }
 
-  function commitDelta() {
-    if (!requireToken()) {
-      return false;
-    }
-    const payload = {
+  // Sequence numbers start from the clock so they keep increasing when the
+  // same attempt is reloaded; the server ignores any batch not newer than
+  // the last one it accepted.
+  function nextSeq() {
+    lastSeq = Math.max(lastSeq + 1, Date.now());
+    return lastSeq;
+  }
+
+  function batchBody(cmi) {
+    return JSON.stringify({
       attemptToken: ATTEMPT_TOKEN,
       version: 'SCORM_2004',
-      cmi: delta,
-    };
-    try {
-      const body = JSON.stringify(payload);
-      if (navigator.sendBeacon) {
-        const blob = new Blob([body], { type: 'application/json' });
-        navigator.sendBeacon(COMMIT_ENDPOINT, blob);
-      } else {
-        fetch(COMMIT_ENDPOINT, {
-          method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
-          body,
-          keepalive: true,
-        }).catch((err) => console.warn('SCORM commit failed', err));
-      }
-      for (const key of Object.keys(delta)) {
-        delete delta[key];
-      }
-      lastError = '0';
-      return true;
-    } catch (error) {
-      console.error('SCORM commit error', error);
-      lastError = '101';
-      return false;
+      seq: nextSeq(),
+      cmi,
+    });
+  }
+
+  function hasDelta() {
+    return Object.keys(delta).length > 0;
+  }
+
+  function scheduleFlush(delay) {
+    if (flushTimer === null) {
+      flushTimer = setTimeout(() => {
+        flushTimer = null;
+        flush();
+      }, delay);
+    }
+  }
+
+  function flush() {
+    if (inflight || !hasDelta() || !requireToken()) {
+      return;
+    }
+    const batch = delta;
+    inflight = batch;
+    delta = {};
+    const blob = new Blob([batchBody(batch)], { type: 'application/json' });
+    fetch(COMMIT_ENDPOINT, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: blob,
+      // Over the keepalive cap the browser rejects the request outright.
+      keepalive: blob.size <= MAX_BEACON_BYTES,
+    })
+      .then((response) => {
+        if (response.status >= 500 || response.status === 429) {
+          throw new Error(`HTTP ${response.status}`);
+        }
+      })
+      .catch((err) => {
+        console.warn('SCORM commit failed, will retry', err);
+        if (inflight === batch) {
+          // Newer values set meanwhile win; the retry goes out under a new seq.
+          delta = Object.assign(batch, delta);
+        }
+      })
+      .then(() => {
+        if (inflight === batch) {
+          inflight = null;
+        }
+      })
+      .finally(() => {
+        if (hasDelta()) {
+          scheduleFlush(COMMIT_INTERVAL_MS);
+        }
+      });
+  }
+
+  // On unload there is no time to wait for the in-flight request, so send
+  // everything not yet acknowledged as one newer batch; if the in-flight
+  // request lands later, its older seq is dropped.
+  function flushNow() {
+    if (!hasDelta() && !inflight) {
+      return;
+    }
+    if (!requireToken()) {
+      return;
+    }
+    const cmi = Object.assign({}, inflight, delta);
+    const blob = new Blob([batchBody(cmi)], { type: 'application/json' });
+    let sent = false;
+    if (navigator.sendBeacon && blob.size <= MAX_BEACON_BYTES) {
+      sent = navigator.sendBeacon(COMMIT_ENDPOINT, blob);
     }
+    if (!sent) {
+      fetch(COMMIT_ENDPOINT, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: blob,
+        keepalive: blob.size <= MAX_BEACON_BYTES,
+      }).catch((err) => console.warn('SCORM commit failed', err));
+    }
+    inflight = null;
+    delta = {};
+    if (flushTimer !== null) {
+      clearTimeout(flushTimer);
+      flushTimer = null;
+    }
+  }
+
+  // Resume: load the attempt's stored values. Elements the course has
+  // already set by the time the response arrives keep their new values.
+  if (ATTEMPT_TOKEN) {
+    fetch(`/api/scorm/attempts/${encodeURIComponent(ATTEMPT_TOKEN)}/cmi`)
+      .then((response) => (response.ok ? response.json() : { cmi: {} }))
+      .then((body) => {
+        Object.entries(body.cmi || {}).forEach(([element, value]) => {
+          if (!(element in state)) {
+            state[element] = value;
+          }
+        });
+      })
+      .catch((err) => console.warn('Loading stored SCORM state failed', err));
   }
 
+  window.addEventListener('pagehide', flushNow);
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') {
+      flushNow();
+    }
+  });
+
   function apiGetValue(element) {
     lastError = '0';
     if (!initialized) {
@@ -89,7 +187,10 @@
         lastError = '201';
         return 'false';
       }
-      commitDelta();
+      if (!requireToken()) {
+        return 'false';
+      }
+      flushNow();
       initialized = false;
       terminated = true;
       lastError = '0';
@@ -102,7 +203,12 @@
         lastError = '301';
         return 'false';
       }
-      return commitDelta() ? 'true' : 'false';
+      if (!requireToken()) {
+        return 'false';
+      }
+      scheduleFlush(COMMIT_INTERVAL_MS);
+      lastError = '0';
+      return 'true';
     },
     GetLastError() {
       return lastError;
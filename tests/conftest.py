@@ -0,0 +1,40 @@
+"""Shared fixtures.
+
+Every test session runs against throwaway SQLite files and a filesystem
+object store under a temporary directory, never against ``data/``.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.database
+from app.config import get_settings
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_environment(tmp_path_factory: pytest.TempPathFactory) -> Iterator[Path]:
+    root = tmp_path_factory.mktemp("lms")
+    with pytest.MonkeyPatch.context() as patch:
+        # SCORM database URLs are resolved against the working directory.
+        patch.chdir(root)
+        patch.setenv("DATABASE_URL", "sqlite:///scorm.db")
+        patch.setenv("STORAGE_BACKEND", "filesystem")
+        patch.setenv("STORAGE_ROOT", str(root / "objects"))
+        patch.setenv("SCORM_STAGING_DIR", str(root / "ingest"))
+        patch.setenv("SCORM_INGEST_POLL_SECONDS", "0.1")
+        patch.setattr(app.database, "DB_PATH", root / "lms.db")
+        get_settings.cache_clear()
+        yield root
+    get_settings.cache_clear()
+
+
+@pytest.fixture(scope="module")
+def client() -> Iterator[TestClient]:
+    from app.main import app as service
+
+    with TestClient(service) as test_client:
+        yield test_client
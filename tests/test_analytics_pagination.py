@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.analytics import _decode_cursor, _encode_cursor
+
+
+def _cursor(key: object) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trips() -> None:
+    row = {"last_activity_at": "2024-03-01T17:00:00Z", "learner_id": 4, "course_id": 2, "group_id": None}
+    assert _decode_cursor(_encode_cursor(row)) == ["2024-03-01T17:00:00Z", 4, 2, 0]
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        [[1], 2, 3, 4],
+        ["2024-03-01T17:00:00Z", "4", 2, 0],
+        ["2024-03-01T17:00:00Z", 4, 2.5, 0],
+        ["2024-03-01T17:00:00Z", 4, 2, True],
+        ["2024-03-01T17:00:00Z", 4, {"id": 2}, 0],
+        [1, 2, 3],
+        {"learner_id": 4},
+    ],
+)
+def test_malformed_cursor_is_rejected(key: object) -> None:
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        _decode_cursor(_cursor(key))
+
+
+def test_malformed_cursor_is_a_bad_request(client: TestClient) -> None:
+    first = client.get("/api/analytics/learner-progress", params={"limit": 1})
+    assert first.status_code == 200
+    assert first.json()["next_cursor"]
+
+    response = client.get("/api/analytics/learner-progress", params={"cursor": _cursor([[1], 2, 3, 4])})
+    assert response.status_code == 400
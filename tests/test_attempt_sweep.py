@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from app.database import Database
+
+
+def _open(path: Path, monkeypatch: pytest.MonkeyPatch) -> Database:
+    # Database URLs are relative to the working directory.
+    monkeypatch.chdir(path.parent)
+    return Database(f"sqlite:///{path.name}")
+
+
+@pytest.fixture
+def scorm_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Database]:
+    db = _open(tmp_path / "sweep.db", monkeypatch)
+    yield db
+    db.close()
+
+
+def _expired_attempt(db: Database, token: str) -> None:
+    package_id = db.insert_package("7", "1.0", "index.html", "scorm/7", "<manifest/>")
+    db.queue_attempt(package_id, token, datetime.utcnow() - timedelta(hours=1), learner_id=42, item_identifier="sco-1")
+    db.flush_attempts()
+
+
+def test_archive_keeps_learner_and_item(scorm_db: Database) -> None:
+    _expired_attempt(scorm_db, "expired")
+
+    assert scorm_db.sweep_expired_attempts(datetime.utcnow(), 100, archive=True) == 1
+    with scorm_db.get_connection() as conn:
+        row = conn.execute(
+            "SELECT learner_id, item_identifier FROM scorm_attempts_archive WHERE attempt_token = 'expired';"
+        ).fetchone()
+    assert tuple(row) == (42, "sco-1")
+    assert scorm_db.count_attempts() == 0
+
+
+@pytest.mark.parametrize("archive", [True, False])
+def test_sweep_removes_cmi_state_of_swept_attempts(scorm_db: Database, archive: bool) -> None:
+    _expired_attempt(scorm_db, "expired")
+    package_id = scorm_db.insert_package("7", "1.1", "index.html", "scorm/7b", "<manifest/>")
+    scorm_db.queue_attempt(package_id, "live", datetime.utcnow() + timedelta(hours=1))
+    scorm_db.flush_attempts()
+    at = datetime.utcnow().isoformat(timespec="microseconds")
+    for token in ("expired", "live"):
+        scorm_db.write_cmi_values([(token, "cmi.core.lesson_location", "page-1", at)])
+    # One compacted snapshot plus a log tail written after it.
+    while scorm_db.compact_cmi_log(1000)[0]:
+        pass
+    scorm_db.write_cmi_values([("expired", "cmi.suspend_data", "state", at), ("live", "cmi.suspend_data", "state", at)])
+
+    assert scorm_db.sweep_expired_attempts(datetime.utcnow(), 100, archive=archive) == 1
+    with scorm_db.get_connection() as conn:
+        snapshots = [row[0] for row in conn.execute("SELECT attempt_token FROM scorm_cmi_snapshots;")]
+        logged = {row[0] for row in conn.execute("SELECT attempt_token FROM scorm_cmi_log;")}
+    assert snapshots == ["live"] and logged == {"live"}
+    assert scorm_db.load_cmi_state("live") == {"cmi.core.lesson_location": "page-1", "cmi.suspend_data": "state"}
+
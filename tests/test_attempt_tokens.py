@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from app.attempt_cache import AttemptTokenSigner
+from app.config import get_settings
+from app.database import Database
+
+EXPIRES = datetime(2026, 1, 1, 12, 30)
+
+
+def test_signed_token_round_trips() -> None:
+    signer = AttemptTokenSigner(b"k" * 32)
+    token = signer.issue(42, EXPIRES)
+    assert signer.verify(token) == (42, EXPIRES)
+    assert signer.issue(42, EXPIRES) != token
+
+
+@pytest.mark.parametrize(
+    "tamper",
+    [
+        lambda token: token.replace(".2a.", ".2b."),
+        lambda token: token[:-1] + ("0" if token[-1] != "0" else "1"),
+        lambda token: token.rpartition(".")[0],
+        lambda token: "not-a-token",
+        lambda token: "",
+    ],
+)
+def test_tampered_or_malformed_tokens_are_rejected(tamper) -> None:
+    signer = AttemptTokenSigner(b"k" * 32)
+    assert signer.verify(tamper(signer.issue(42, EXPIRES))) is None
+
+
+def test_tokens_from_another_key_are_rejected() -> None:
+    token = AttemptTokenSigner(b"a" * 32).issue(42, EXPIRES)
+    assert AttemptTokenSigner(b"b" * 32).verify(token) is None
+
+
+def test_other_worker_accepts_an_unflushed_attempt(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Database URLs are relative to the working directory.
+    monkeypatch.chdir(tmp_path)
+    # Keep worker A's attempt queued for the whole test.
+    monkeypatch.setattr(get_settings(), "scorm_attempt_flush_seconds", 60.0)
+    worker_a = Database("sqlite:///tokens.db")
+    package_id = worker_a.insert_package("7", "1.0", "index.html", "scorm/7", "<manifest/>")
+    expires_at = datetime.utcnow().replace(microsecond=0) + timedelta(hours=1)
+    token = worker_a.issue_attempt_token(package_id, expires_at)
+    worker_a.queue_attempt(package_id, token, expires_at, learner_id=1)
+
+    worker_b = Database("sqlite:///tokens.db")
+    try:
+        with worker_b.get_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM scorm_attempts;").fetchone()[0] == 0
+        attempt = worker_b.lookup_attempt(token)
+        assert attempt is not None and not attempt.expired()
+        assert (attempt.package_id, attempt.object_prefix, attempt.expires_at) == (package_id, "scorm/7", expires_at)
+        # Unsigned tokens still need their row.
+        assert worker_b.lookup_attempt("0" * 32) is None
+    finally:
+        worker_b.close()
+        worker_a.close()
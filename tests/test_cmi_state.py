@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from app.database import Database
+
+EARLIER = "2026-01-01T10:00:00.000001"
+LATER = "2026-01-01T10:00:05.000001"
+
+
+@pytest.fixture
+def scorm_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Database]:
+    # Database URLs are relative to the working directory.
+    monkeypatch.chdir(tmp_path)
+    db = Database("sqlite:///cmi.db")
+    package_id = db.insert_package("12", "1.0", "index.html", "scorm/12", "<manifest/>")
+    db.queue_attempt(package_id, "token", datetime.utcnow() + timedelta(hours=1), learner_id=3)
+    yield db
+    db.close()
+
+
+def _compact(db: Database) -> None:
+    while db.compact_cmi_log(1000)[0]:
+        pass
+
+
+def _summary(db: Database) -> tuple:
+    with db.get_connection() as conn:
+        row = conn.execute(
+            "SELECT lesson_status, score_raw, last_activity_at FROM scorm_attempt_progress WHERE attempt_token = 'token';"
+        ).fetchone()
+    return tuple(row)
+
+
+@pytest.mark.parametrize("compact_between", [True, False])
+def test_late_flush_of_an_older_commit_does_not_win(scorm_db: Database, compact_between: bool) -> None:
+    scorm_db.write_cmi_values(
+        [("token", "cmi.core.lesson_status", "passed", LATER), ("token", "cmi.core.lesson_location", "page-9", LATER)]
+    )
+    if compact_between:
+        _compact(scorm_db)
+    # Another worker flushes a batch committed before the one above.
+    scorm_db.write_cmi_values(
+        [("token", "cmi.core.lesson_status", "incomplete", EARLIER), ("token", "cmi.core.score.raw", "70", EARLIER)]
+    )
+
+    expected = {"cmi.core.lesson_status": "passed", "cmi.core.lesson_location": "page-9", "cmi.core.score.raw": "70"}
+    assert scorm_db.load_cmi_state("token") == expected
+    assert _summary(scorm_db) == ("passed", "70", LATER)
+
+    _compact(scorm_db)
+    assert scorm_db.load_cmi_state("token") == expected
+    derived = [tuple(row) for row in scorm_db.derive_progress([(3, 12)])]
+    assert [tuple(row) for row in scorm_db.rebuild_progress()] == derived
+    assert _summary(scorm_db) == ("passed", "70", LATER)
+
+
+def test_equal_commit_times_keep_the_later_flush(scorm_db: Database) -> None:
+    scorm_db.write_cmi_values([("token", "cmi.suspend_data", "first", LATER)])
+    _compact(scorm_db)
+    scorm_db.write_cmi_values([("token", "cmi.suspend_data", "second", LATER)])
+
+    assert scorm_db.load_cmi_state("token") == {"cmi.suspend_data": "second"}
+    _compact(scorm_db)
+    assert scorm_db.load_cmi_state("token") == {"cmi.suspend_data": "second"}
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+import app.database
+from app import analytics
+from app.database import get_connection, initialize_database
+
+columnar = pytest.importorskip("app.columnar")
+pytest.importorskip("numpy")
+
+STATUSES = ("not_started", "in_progress", "completed", "stalled")
+WINDOWS = [(None, None), ("2024-02-01", None), (None, "2024-05-31"), ("2024-03-01", "2024-04-15")]
+
+
+@pytest.fixture
+def progress_rows(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> random.Random:
+    """A fresh analytics database with random progress, rewritten a few times."""
+
+    monkeypatch.setattr(app.database, "DB_PATH", tmp_path / "analytics.db")
+    initialize_database()
+    rng = random.Random(20240301)
+    with get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO courses (id, title, category) VALUES (?, ?, 'Test');",
+            [(course, f"Course {course}") for course in range(1, 6)],
+        )
+        conn.executemany(
+            "INSERT INTO groups (id, course_id, name) VALUES (?, ?, ?);",
+            [(group, (group - 1) % 5 + 1, f"Group {group}") for group in range(1, 13)],
+        )
+        conn.executemany(
+            "INSERT INTO learners (id, first_name, last_name, email) VALUES (?, 'L', ?, ?);",
+            [(learner, str(learner), f"l{learner}@example.com") for learner in range(1, 401)],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO group_memberships (group_id, learner_id) VALUES (?, ?);",
+            [(rng.randint(1, 12), learner) for learner in range(1, 401) for _ in range(2)],
+        )
+        for _ in range(3):
+            conn.executemany(
+                """
+                INSERT INTO learner_course_progress (learner_id, course_id, status, progress_percent, score, last_activity_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (learner_id, course_id) DO UPDATE SET
+                    status = excluded.status,
+                    progress_percent = excluded.progress_percent,
+                    score = excluded.score,
+                    last_activity_at = excluded.last_activity_at;
+                """,
+                [
+                    (
+                        learner,
+                        rng.randint(1, 5),
+                        rng.choice(STATUSES),
+                        rng.randint(0, 10000) / 100,
+                        None if rng.random() < 0.2 else rng.randint(0, 1000) / 10,
+                        f"2024-{rng.randint(1, 6):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z",
+                    )
+                    for learner in range(1, 401)
+                ],
+            )
+        conn.commit()
+    return rng
+
+
+@pytest.mark.parametrize(("start_date", "end_date"), WINDOWS)
+def test_course_progress_matches_sql(progress_rows: random.Random, start_date: str | None, end_date: str | None) -> None:
+    snapshot = columnar.ColumnarSnapshot()
+    expected = [dict(row) for row in analytics.fetch_course_progress(start_date=start_date, end_date=end_date)]
+    assert snapshot.course_progress(start_date=start_date, end_date=end_date) == expected
+
+
+@pytest.mark.parametrize(("start_date", "end_date"), WINDOWS)
+def test_group_progress_matches_sql(progress_rows: random.Random, start_date: str | None, end_date: str | None) -> None:
+    snapshot = columnar.ColumnarSnapshot()
+    expected = [dict(row) for row in analytics.fetch_group_progress(start_date=start_date, end_date=end_date)]
+    assert snapshot.group_progress(start_date=start_date, end_date=end_date) == expected
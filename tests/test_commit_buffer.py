@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import pytest
+
+from app import commit_buffer
+from app.commit_buffer import CommitBuffer
+from app.database import Database
+
+Pair = Tuple[int, int]
+
+
+class _Tracker:
+    def __init__(self) -> None:
+        self.marked: List[Pair] = []
+
+    def mark_dirty(self, pairs: List[Pair]) -> None:
+        self.marked.extend(pairs)
+
+
+@pytest.fixture
+def scorm_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Database]:
+    # Database URLs are relative to the working directory.
+    monkeypatch.chdir(tmp_path)
+    db = Database("sqlite:///commits.db")
+    package_id = db.insert_package("9", "1.0", "index.html", "scorm/9", "<manifest/>")
+    db.queue_attempt(package_id, "token", datetime.utcnow() + timedelta(hours=1), learner_id=5)
+    db.flush_attempts()
+    monkeypatch.setattr(commit_buffer, "get_database", lambda: db)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def tracker(monkeypatch: pytest.MonkeyPatch) -> _Tracker:
+    tracker = _Tracker()
+    monkeypatch.setattr(commit_buffer, "get_progress_tracker", lambda: tracker)
+    return tracker
+
+
+@pytest.fixture
+def buffer(scorm_db: Database, tracker: _Tracker) -> Iterator[CommitBuffer]:
+    # Long interval and high threshold: only the tests flush.
+    buffer = CommitBuffer(interval=60.0, max_pending=1000, batch_size=1, sequence_entries=2)
+    yield buffer
+    buffer.stop()
+
+
+def test_later_writes_to_an_element_replace_earlier_ones(
+    buffer: CommitBuffer, scorm_db: Database, tracker: _Tracker
+) -> None:
+    buffer.add("token", {"cmi.core.lesson_status": "incomplete", "cmi.core.lesson_location": "p1"})
+    buffer.add("token", {"cmi.core.lesson_status": "completed"})
+    stats = buffer.stats()
+    assert (stats["received"], stats["coalesced"], stats["pending_elements"]) == (3, 1, 2)
+
+    assert buffer.flush() == 2
+    assert scorm_db.load_cmi_state("token") == {"cmi.core.lesson_status": "completed", "cmi.core.lesson_location": "p1"}
+    stats = buffer.stats()
+    assert (stats["flushed"], stats["transactions"], stats["pending_elements"]) == (2, 2, 0)
+    assert (5, 9) in tracker.marked
+    assert buffer.flush() == 0
+
+
+def test_failed_flush_requeues_without_clobbering_newer_values(
+    buffer: CommitBuffer, scorm_db: Database, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    buffer.add("token", {"cmi.core.lesson_location": "p1", "cmi.suspend_data": "s1"})
+    write = scorm_db.write_cmi_values
+
+    def fail_once(rows):
+        monkeypatch.setattr(scorm_db, "write_cmi_values", write)
+        # A commit lands while the failing transaction is in flight.
+        buffer.add("token", {"cmi.core.lesson_location": "p2"})
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr(scorm_db, "write_cmi_values", fail_once)
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+    stats = buffer.stats()
+    assert (stats["failures"], stats["flushed"], stats["pending_elements"]) == (1, 0, 2)
+    assert stats["oldest_pending_seconds"] > 0
+
+    assert buffer.flush() == 2
+    assert scorm_db.load_cmi_state("token") == {"cmi.core.lesson_location": "p2", "cmi.suspend_data": "s1"}
+
+
+def test_stale_and_duplicate_batches_are_dropped(buffer: CommitBuffer) -> None:
+    assert buffer.add("token", {"cmi.core.lesson_location": "p2"}, seq=2)
+    assert not buffer.add("token", {"cmi.core.lesson_location": "dup"}, seq=2)
+    assert not buffer.add("token", {"cmi.core.lesson_location": "old"}, seq=1)
+    assert buffer.is_stale("token", 2) and not buffer.is_stale("token", 3)
+    assert buffer.add("token", {}, seq=3)
+    assert not buffer.add("token", {"cmi.core.lesson_location": "old"}, seq=3)
+    stats = buffer.stats()
+    assert (stats["stale_batches"], stats["received"]) == (4, 1)
+
+    # Marks are kept for the most recent attempts only.
+    buffer.add("a", {}, seq=1)
+    buffer.add("b", {}, seq=1)
+    assert buffer.stats()["tracked_sequences"] == 2
+    assert buffer.add("token", {"cmi.core.lesson_location": "p1"}, seq=1)
+
+
+def test_read_through_overlays_buffered_values(buffer: CommitBuffer, scorm_db: Database) -> None:
+    buffer.add("token", {"cmi.core.lesson_location": "p1", "cmi.suspend_data": "s1"})
+    buffer.flush()
+    buffer.add("token", {"cmi.core.lesson_location": "p2", "cmi.core.exit": "suspend"})
+
+    assert buffer.read_through("token", scorm_db.load_cmi_state) == {
+        "cmi.core.lesson_location": "p2",
+        "cmi.suspend_data": "s1",
+        "cmi.core.exit": "suspend",
+    }
+    assert scorm_db.load_cmi_state("token")["cmi.core.lesson_location"] == "p1"
+    assert buffer.read_through("other", lambda token: {}) == {}
+
+
+def test_stop_flushes_what_is_buffered(buffer: CommitBuffer, scorm_db: Database) -> None:
+    buffer.add("token", {"cmi.core.lesson_location": "p1"})
+    assert buffer._thread is not None
+
+    buffer.stop()
+    assert buffer._thread is None
+    assert scorm_db.load_cmi_state("token") == {"cmi.core.lesson_location": "p1"}
+    assert buffer.stats()["pending_elements"] == 0
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from app.database import Database
+from app.ingest import LeaseLostError, _Progress
+
+# A lease that has already run out when the claim returns.
+EXPIRED = -1.0
+PACKAGE = {
+    "course_id": "11",
+    "version": "1.0",
+    "entry_point": "index.html",
+    "object_prefix": "scorm/11",
+    "manifest": "<manifest/>",
+}
+
+
+@pytest.fixture
+def scorm_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Database]:
+    # Database URLs are relative to the working directory.
+    monkeypatch.chdir(tmp_path)
+    db = Database("sqlite:///jobs.db")
+    yield db
+    db.close()
+
+
+def _create(db: Database, max_attempts: int = 3, job_id: str = "job") -> None:
+    db.create_ingest_job(job_id, "11", f"/staging/{job_id}.zip", 100, "0" * 64, max_attempts)
+
+
+def _status(db: Database, job_id: str = "job") -> tuple:
+    job = db.get_ingest_job(job_id)
+    return job["status"], job["phase"], job["attempts"]
+
+
+def test_claim_reclaims_a_running_job_whose_lease_expired(scorm_db: Database) -> None:
+    _create(scorm_db)
+    first = scorm_db.claim_ingest_job(EXPIRED)
+    assert (first["id"], first["attempts"]) == ("job", 1)
+
+    second = scorm_db.claim_ingest_job(60)
+    assert (second["id"], second["attempts"]) == ("job", 2)
+    # The new lease is live, so nobody else can take the job.
+    assert scorm_db.claim_ingest_job(60) is None
+    assert _status(scorm_db) == ("running", "queued", 2)
+
+
+def test_failed_attempt_requeues_until_attempts_run_out(scorm_db: Database) -> None:
+    _create(scorm_db, max_attempts=2)
+    scorm_db.claim_ingest_job(60)
+    assert scorm_db.fail_ingest_job("job", 1, "boom", retry_delay=0) == "queued"
+    assert _status(scorm_db) == ("queued", "retrying", 1)
+
+    assert scorm_db.claim_ingest_job(60)["attempts"] == 2
+    assert scorm_db.fail_ingest_job("job", 2, "boom again", retry_delay=0) == "failed"
+    assert _status(scorm_db) == ("failed", "failed", 2)
+    assert scorm_db.get_ingest_job("job")["error"] == "boom again"
+    assert scorm_db.claim_ingest_job(60) is None
+
+
+def test_permanent_failure_is_not_retried(scorm_db: Database) -> None:
+    _create(scorm_db, max_attempts=3)
+    scorm_db.claim_ingest_job(60)
+    assert scorm_db.fail_ingest_job("job", 1, "not a SCORM package", retry_delay=None) == "failed"
+    assert scorm_db.claim_ingest_job(60) is None
+
+
+def test_stale_attempt_cannot_write_after_its_lease_is_reclaimed(scorm_db: Database) -> None:
+    _create(scorm_db)
+    scorm_db.claim_ingest_job(EXPIRED)
+    scorm_db.claim_ingest_job(60)
+
+    with pytest.raises(LeaseLostError):
+        _Progress(scorm_db, "job", 1).start("uploading", files_total=3)
+    assert not scorm_db.heartbeat_ingest_job("job", 1, 60)
+    assert not scorm_db.complete_ingest_job("job", 1, PACKAGE, {}, "{}")
+    assert scorm_db.fail_ingest_job("job", 1, "late", retry_delay=0) is None
+    assert scorm_db.find_latest_package("11") is None
+    assert _status(scorm_db) == ("running", "queued", 2)
+
+    assert scorm_db.complete_ingest_job("job", 2, PACKAGE, {}, "{}")
+    assert _status(scorm_db) == ("succeeded", "done", 2)
+    assert scorm_db.find_latest_package("11")["object_prefix"] == "scorm/11"
+
+
+def test_expire_fails_jobs_whose_last_attempt_lapsed(scorm_db: Database) -> None:
+    _create(scorm_db, max_attempts=1, job_id="last")
+    assert scorm_db.claim_ingest_job(EXPIRED)["id"] == "last"
+    _create(scorm_db, max_attempts=2, job_id="retryable")
+    assert scorm_db.claim_ingest_job(EXPIRED)["id"] == "retryable"
+
+    assert scorm_db.expire_ingest_jobs() == ["/staging/last.zip"]
+    last = scorm_db.get_ingest_job("last")
+    assert (last["status"], last["error"]) == ("failed", "Worker stopped responding")
+    # With attempts left, a lapsed lease is reclaimed instead.
+    assert _status(scorm_db, "retryable") == ("running", "queued", 1)
+    assert scorm_db.expire_ingest_jobs() == []
+    assert scorm_db.claim_ingest_job(60)["id"] == "retryable"
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import re
+import secrets
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+import app.database
+from app import progress
+from app.database import get_connection, get_database, initialize_database, load_learner_progress, write_learner_progress
+
+COURSE_ID = 501
+LEARNER_ID = 1
+
+
+@pytest.fixture
+def analytics_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(app.database, "DB_PATH", tmp_path / "lms.db")
+    initialize_database()
+    with get_connection() as conn:
+        conn.execute("INSERT INTO courses (id, title) VALUES (?, 'Course');", (COURSE_ID,))
+        conn.execute(
+            "INSERT INTO learners (id, first_name, last_name, email) VALUES (?, 'A', 'B', 'a@example.com');",
+            (LEARNER_ID,),
+        )
+        conn.commit()
+
+
+def _launch() -> str:
+    db = get_database()
+    package_id = db.insert_package(str(COURSE_ID), "1.0", "index.html", f"scorm/{secrets.token_hex(4)}", "<manifest/>")
+    token = secrets.token_hex(16)
+    db.queue_attempt(package_id, token, datetime.utcnow() + timedelta(hours=1), learner_id=LEARNER_ID)
+    return token
+
+
+def _commit(token: str, values: dict[str, str]) -> None:
+    at = datetime.utcnow().isoformat(timespec="microseconds")
+    get_database().write_cmi_values([(token, element, value, at) for element, value in values.items()])
+
+
+def _refresh() -> None:
+    write_learner_progress(get_database().derive_progress([(LEARNER_ID, COURSE_ID)]))
+
+
+@pytest.mark.usefixtures("analytics_db")
+def test_incremental_progress_matches_a_rebuild() -> None:
+    token = _launch()
+    _commit(token, {"cmi.core.lesson_status": "incomplete", "cmi.core.lesson_location": "page-2"})
+    _commit(token, {"cmi.core.score.raw": "80"})
+    _refresh()
+
+    row = load_learner_progress([(LEARNER_ID, COURSE_ID)])[(LEARNER_ID, COURSE_ID)]
+    assert row["status"] == "in_progress" and row["score"] == 80.0
+    # Commit times carry microseconds; the analytics row is whole-second UTC.
+    assert re.fullmatch(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ", row["last_activity_at"])
+    assert progress.main(["--verify"]) == 0
+
+    # A commit not yet refreshed is reported until the tracker catches up.
+    _commit(token, {"cmi.core.lesson_status": "passed"})
+    assert progress.main(["--verify"]) == 1
+    _refresh()
+    assert progress.main(["--verify"]) == 0
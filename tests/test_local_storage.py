@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.local_storage import FilesystemStorage
+from app.storage import get_storage
+
+BODY = bytes(range(256)) * 4
+KEY = "scorm/course-1/media/clip.bin"
+
+
+@pytest.fixture
+def storage(tmp_path: Path) -> FilesystemStorage:
+    return FilesystemStorage(tmp_path / "objects")
+
+
+@pytest.mark.parametrize(
+    "key", ["../escape", "a/../../escape", "/absolute", "a//b", "a/./b", "a\\b", "", "a/b/"]
+)
+def test_path_for_rejects_keys_outside_the_root(storage: FilesystemStorage, key: str) -> None:
+    with pytest.raises(ValueError):
+        storage.path_for(key)
+
+
+def test_path_for_maps_keys_under_the_root(storage: FilesystemStorage) -> None:
+    assert storage.path_for(KEY) == storage.root / "scorm" / "course-1" / "media" / "clip.bin"
+
+
+def test_verify_rejects_bad_and_expired_signatures(storage: FilesystemStorage) -> None:
+    query = parse_qs(urlsplit(storage._sign(KEY, 60)).query)
+    expires, signature = int(query["expires"][0]), query["signature"][0]
+
+    assert storage.verify(KEY, expires, signature)
+    assert not storage.verify(KEY, expires, "0" * len(signature))
+    assert not storage.verify("scorm/course-1/other.bin", expires, signature)
+    assert not storage.verify(KEY, expires + 1, signature)
+
+    past = int(time.time()) - 1
+    assert not storage.verify(KEY, past, storage._signature(KEY, past))
+
+
+@pytest.fixture(scope="module")
+def object_url(client: TestClient) -> Iterator[str]:
+    storage = get_storage()
+    assert isinstance(storage, FilesystemStorage)
+    storage.upload_bytes(KEY, BODY)
+    yield storage._sign(KEY, 300)
+
+
+def test_signed_route_rejects_tampered_urls(client: TestClient, object_url: str) -> None:
+    assert client.get(object_url.replace("signature=", "signature=0")).status_code == 403
+    assert client.get(object_url.replace("clip.bin", "clip2.bin")).status_code == 403
+
+
+def test_suffix_and_open_ranges(client: TestClient, object_url: str) -> None:
+    suffix = client.get(object_url, headers={"range": "bytes=-16"})
+    assert suffix.status_code == 206
+    assert suffix.content == BODY[-16:]
+    assert suffix.headers["content-range"] == f"bytes {len(BODY) - 16}-{len(BODY) - 1}/{len(BODY)}"
+
+    tail = client.get(object_url, headers={"range": "bytes=1000-"})
+    assert (tail.status_code, tail.content) == (206, BODY[1000:])
+
+
+@pytest.mark.parametrize("header", [f"bytes={len(BODY)}-", f"bytes={len(BODY) + 10}-{len(BODY) + 20}", "bytes=-0"])
+def test_unsatisfiable_range_is_416(client: TestClient, object_url: str, header: str) -> None:
+    response = client.get(object_url, headers={"range": header})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(BODY)}"
+
+
+def test_if_range_with_stale_etag_sends_the_whole_object(client: TestClient, object_url: str) -> None:
+    etag = client.get(object_url).headers["etag"]
+
+    current = client.get(object_url, headers={"range": "bytes=0-9", "if-range": etag})
+    assert (current.status_code, current.content) == (206, BODY[:10])
+
+    stale = client.get(object_url, headers={"range": "bytes=0-9", "if-range": '"stale"'})
+    assert (stale.status_code, stale.content) == (200, BODY)
+    assert "content-range" not in stale.headers
@@ -0,0 +1,165 @@
+"""Query-plan regression guard for the analytics and SCORM queries.
+
+Every filter combination the analytics helpers can generate, plus the SCORM
+lookups, is run through ``EXPLAIN QUERY PLAN``. A query fails when it scans
+one of the per-learner or per-upload tables instead of searching an index.
+Scans of the course/group dimension and rollup tables are O(courses) by
+design and are allowed.
+"""
+from __future__ import annotations
+
+import itertools
+import re
+import sqlite3
+from typing import Any, Dict, Iterator, List, Sequence
+
+import pytest
+
+from app import analytics
+from app.database import (
+    ATTEMPT_SQL,
+    CMI_LOG_TAIL_SQL,
+    CMI_SNAPSHOT_SQL,
+    EXPIRED_ATTEMPT_COUNT_SQL,
+    EXPIRED_ATTEMPTS_SQL,
+    FOLD_ATTEMPT_PROGRESS_SQL,
+    LATEST_PACKAGE_SQL,
+    PACKAGE_FILE_SQL,
+    PACKAGE_ITEM_SQL,
+    PACKAGE_ITEMS_SQL,
+    PACKAGE_PREFIX_SQL,
+    PAIR_PROGRESS_SQL,
+    RESOURCE_FILES_SQL,
+    get_connection,
+    get_database,
+    initialize_database,
+)
+
+# Tables (and the aliases the views give them) that grow with learners or
+# uploads and must only be reached through an index.
+GUARDED_TABLES = frozenset(
+    {
+        "learner_course_progress",
+        "lcp",
+        "group_memberships",
+        "gm",
+        "learners",
+        "l",
+        "scorm_packages",
+        "scorm_attempts",
+        "scorm_package_files",
+        "scorm_blobs",
+        "scorm_items",
+        "scorm_resources",
+        "scorm_resource_files",
+        "scorm_resource_dependencies",
+        "scorm_cmi_log",
+        "scorm_cmi_snapshots",
+        "scorm_attempt_progress",
+        "f",
+        "d",
+    }
+)
+
+_SCAN = re.compile(r"^SCAN (\w+)(.*)$")
+
+_SAMPLE_FILTERS: Dict[str, Any] = {
+    "course_id": 1,
+    "group_id": 1,
+    "learner_id": 1,
+    "status": "completed",
+    "start_date": "2024-01-01",
+    "end_date": "2024-12-31",
+}
+
+_SAMPLE_CURSOR = analytics._encode_cursor(
+    {"last_activity_at": "2024-06-01T00:00:00Z", "learner_id": 1, "course_id": 1, "group_id": 1}
+)
+
+
+def _filter_combinations(names: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    for size in range(len(names) + 1):
+        for combo in itertools.combinations(names, size):
+            yield {name: (_SAMPLE_FILTERS[name] if name in combo else None) for name in names}
+
+
+def _describe(name: str, filters: Dict[str, Any]) -> str:
+    used = ",".join(key for key, value in filters.items() if value is not None)
+    return f"{name}({used})"
+
+
+def analytics_queries() -> Iterator[Any]:
+    """Yield one case per generated analytics query.
+
+    Unfiltered exports read the whole table by definition and are skipped; an
+    unfiltered keyset page may walk an index in order because LIMIT bounds it.
+    """
+
+    for filters in _filter_combinations(("course_id", "start_date", "end_date")):
+        query, params = analytics._course_progress_query(**filters)
+        yield pytest.param("analytics", query, params, False, id=_describe("course_progress", filters))
+
+    for filters in _filter_combinations(("course_id", "group_id", "start_date", "end_date")):
+        query, params = analytics._group_progress_query(**filters)
+        yield pytest.param("analytics", query, params, False, id=_describe("group_progress", filters))
+
+    learner_filters = ("course_id", "group_id", "learner_id", "status", "start_date", "end_date")
+    for filters in _filter_combinations(learner_filters):
+        filtered = any(value is not None for value in filters.values())
+        if filtered:
+            query, params = analytics._learner_progress_query(**filters)
+            query += " ORDER BY last_activity_at DESC"
+            yield pytest.param("analytics", query, params, False, id=_describe("learner_progress", filters))
+        for cursor in (None, _SAMPLE_CURSOR):
+            query, params = analytics._learner_progress_page_query(**filters, limit=100, cursor=cursor)
+            label = _describe("learner_progress_page" + ("+cursor" if cursor else ""), filters)
+            yield pytest.param("analytics", query, params, not filtered, id=label)
+
+
+def scorm_queries() -> Iterator[Any]:
+    cases = [
+        ("find_latest_package", LATEST_PACKAGE_SQL, ("course-1",)),
+        ("resolve_package_file", PACKAGE_FILE_SQL, (1, "index.html")),
+        ("find_attempt", ATTEMPT_SQL, ("token",)),
+        ("sweep_expired_attempts", EXPIRED_ATTEMPTS_SQL, ("2024-01-01T00:00:00", 500)),
+        ("count_expired_attempts", EXPIRED_ATTEMPT_COUNT_SQL, ("2024-01-01T00:00:00",)),
+        ("list_package_items", PACKAGE_ITEMS_SQL, (1,)),
+        ("load_attempt_package", PACKAGE_PREFIX_SQL, (1,)),
+        ("find_package_item", PACKAGE_ITEM_SQL, (1, "item-1")),
+        ("list_resource_files", RESOURCE_FILES_SQL, ("resource-1", 1, 1)),
+        ("fold_attempt_progress", FOLD_ATTEMPT_PROGRESS_SQL, (*[None] * 8, "2024-01-01", "token")),
+        ("derive_progress", PAIR_PROGRESS_SQL, (1, 1)),
+        # The compactor's segment read walks the log from its head by rowid
+        # and stops after one segment, so it is not listed here.
+        ("load_cmi_snapshot", CMI_SNAPSHOT_SQL, ("token",)),
+        ("load_cmi_log_tail", CMI_LOG_TAIL_SQL, ("token",)),
+    ]
+    for label, query, params in cases:
+        yield pytest.param("scorm", query, params, False, id=label)
+
+
+def plan_violations(conn: sqlite3.Connection, query: str, params: Sequence[Any], ordered_walk: bool) -> List[str]:
+    violations = []
+    for row in conn.execute("EXPLAIN QUERY PLAN " + query, tuple(params)):
+        detail = row[3]
+        if detail == "USE TEMP B-TREE FOR ORDER BY" and ordered_walk:
+            violations.append("sorts the whole result instead of walking an index")
+        match = _SCAN.match(detail)
+        if not match or match.group(1) not in GUARDED_TABLES:
+            continue
+        if ordered_walk and "USING" in match.group(2) and "INDEX" in match.group(2):
+            continue
+        violations.append(detail)
+    return violations
+
+
+@pytest.fixture(scope="module", autouse=True)
+def schema() -> None:
+    initialize_database()
+
+
+@pytest.mark.parametrize(("database", "query", "params", "ordered_walk"), [*analytics_queries(), *scorm_queries()])
+def test_query_does_not_scan_guarded_tables(database: str, query: str, params: Sequence[Any], ordered_walk: bool) -> None:
+    connection = get_connection() if database == "analytics" else get_database().get_connection()
+    with connection as conn:
+        assert plan_violations(conn, query, params, ordered_walk) == []
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import time
+import zipfile
+from typing import Any, Iterator
+from urllib.parse import urljoin, urlsplit
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.config import get_settings
+from app.storage import IMMUTABLE_CACHE_CONTROL, S3Storage
+
+MANIFEST = b"""<manifest>
+  <organizations><organization><item identifier="i1" identifierref="r1"/></organization></organizations>
+  <resources>
+    <resource identifier="r1" href="sco/index.html"><file href="sco/index.html"/><file href="sco/css/style.css"/>
+      <file href="sco/img/logo.png"/></resource>
+  </resources>
+</manifest>"""
+INDEX = b'<html><head><link rel="stylesheet" href="css/style.css"></head><body><img src="img/logo.png"></body></html>'
+STYLE = b"body { background: url(../img/logo.png); }"
+LOGO = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 8
+
+
+def _package(files: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, body in files.items():
+            archive.writestr(name, body)
+    return buffer.getvalue()
+
+
+def _path(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+@pytest.fixture(scope="module")
+def launch_url(client: TestClient) -> str:
+    package = _package({"imsmanifest.xml": MANIFEST, "sco/index.html": INDEX, "sco/css/style.css": STYLE, "sco/img/logo.png": LOGO})
+    job = client.post("/courses/content-course/scorm/upload", files={"file": ("lesson.zip", package)}).json()
+    for _ in range(200):
+        status = client.get(_path(job["status_url"])).json()
+        if status["status"] in ("succeeded", "failed"):
+            break
+        time.sleep(0.05)
+    assert status["status"] == "succeeded", status
+    return client.get("/courses/content-course/scorm/launch").json()["launch_url"]
+
+
+def test_relative_asset_resolves_under_the_attempt(client: TestClient, launch_url: str) -> None:
+    document = client.get(_path(launch_url))
+    assert document.status_code == 200 and document.content == INDEX
+    # The browser resolves relative URLs against the document's final URL.
+    assert document.url.path.startswith("/scorm/content/")
+
+    stylesheet = client.get(_path(urljoin(str(document.url), "css/style.css")))
+    assert stylesheet.status_code == 200
+    assert stylesheet.content == STYLE
+    assert stylesheet.headers["content-type"].startswith("text/css")
+    assert stylesheet.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+    # Relative to the stylesheet, as the browser resolves url() references.
+    image = client.get(_path(urljoin(str(stylesheet.url), "../img/logo.png")))
+    assert image.status_code == 200 and image.content == LOGO
+
+
+def test_leaf_assets_redirect_to_signed_urls(client: TestClient, launch_url: str) -> None:
+    url = _path(urljoin(launch_url, "img/logo.png"))
+    redirect = client.get(url, follow_redirects=False)
+    assert redirect.status_code == 307
+    location = redirect.headers["location"]
+    assert location.startswith("/scorm/objects/scorm/blobs/") and "signature=" in location
+    # Repeat launches of the same asset share one cached URL.
+    hits = client.get("/metrics/storage").json()["presign"]["hits"]
+    assert client.get(url, follow_redirects=False).headers["location"] == location
+    assert client.get("/metrics/storage").json()["presign"]["hits"] == hits + 1
+
+    assert client.get(_path(launch_url), follow_redirects=False).status_code == 200
+    assert client.get(_path(urljoin(launch_url, "css/style.css")), follow_redirects=False).status_code == 200
+
+
+def test_content_honours_range_and_etag(client: TestClient, launch_url: str) -> None:
+    url = _path(urljoin(launch_url, "css/style.css"))
+    etag = client.get(url).headers["etag"]
+
+    partial = client.get(url, headers={"range": "bytes=0-3"})
+    assert (partial.status_code, partial.content) == (206, STYLE[:4])
+    assert client.get(url, headers={"if-none-match": etag}).status_code == 304
+    assert client.get(_path(urljoin(launch_url, "css/missing.css"))).status_code == 404
+
+
+def _request(**headers: str) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "query_string": b""})
+
+
+@pytest.fixture
+def s3(monkeypatch: pytest.MonkeyPatch) -> Iterator[S3Storage]:
+    moto = pytest.importorskip("moto")
+    for name, value in {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+    }.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(get_settings(), "s3_endpoint_url", None)
+    with moto.mock_aws():
+        storage = S3Storage()
+        storage.upload_bytes("pkg/sco/css/style.css", STYLE)
+        yield storage
+
+
+def _read(response: Any) -> bytes:
+    async def collect() -> bytes:
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(collect())
+
+
+def test_s3_serve_streams_ranges_and_conditionals(s3: S3Storage) -> None:
+    whole = s3.serve(_request(), "pkg/sco/css/style.css")
+    assert whole.status_code == 200 and whole.media_type == "text/css"
+    assert whole.headers["content-length"] == str(len(STYLE))
+    assert _read(whole) == STYLE
+    etag = whole.headers["etag"]
+
+    partial = s3.serve(_request(range="bytes=5-8"), "pkg/sco/css/style.css")
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 5-8/{len(STYLE)}"
+    assert _read(partial) == STYLE[5:9]
+
+    assert s3.serve(_request(if_none_match=etag), "pkg/sco/css/style.css").status_code == 304
+    # A stale If-Range sends the whole, current object.
+    stale = s3.serve(_request(range="bytes=5-8", if_range='"stale"'), "pkg/sco/css/style.css")
+    assert stale.status_code == 200 and _read(stale) == STYLE
+
+    with pytest.raises(FileNotFoundError):
+        s3.serve(_request(), "pkg/sco/missing.css")
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import types
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+import botocore.auth  # noqa: E402
+from botocore.client import Config  # noqa: E402
+
+from app.signing import PROBE_KEY, SigV4Presigner  # noqa: E402
+
+FROZEN = datetime(2024, 2, 29, 23, 59, 58, tzinfo=timezone.utc)
+KEYS = [
+    "scorm/blobs/ab/abcdef.html",
+    "scorm/course 1/index.html",
+    "scorm/c/ünïcødé/ß.js",
+    "scorm/c/a+b=c&d;e,f@g$h'i(j)k!l*m~n.css",
+    "scorm/c//double//slash",
+    "scorm/c/%41percent.txt",
+]
+# AWS virtual-hosted and regional endpoints, MinIO-style custom endpoints
+# (with and without a port) and session credentials.
+CONFIGURATIONS = {
+    "aws-default": {"region": None, "endpoint": None},
+    "aws-regional": {"region": "eu-west-1", "endpoint": None},
+    "minio-port": {"region": "us-east-1", "endpoint": "http://localhost:9000"},
+    "minio-https": {"region": "us-west-2", "endpoint": "https://minio.example.com"},
+    "session-token": {"region": "ap-south-1", "endpoint": None, "token": "FwoGZXIvYXdzEFYaDH+/session=="},
+}
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch: pytest.MonkeyPatch) -> None:
+    class _Frozen(datetime):
+        @classmethod
+        def utcnow(cls) -> datetime:  # type: ignore[override]
+            return FROZEN.replace(tzinfo=None)
+
+    monkeypatch.setattr(botocore.auth, "datetime", types.SimpleNamespace(datetime=_Frozen))
+
+
+@pytest.mark.usefixtures("frozen_clock")
+@pytest.mark.parametrize("options", CONFIGURATIONS.values(), ids=CONFIGURATIONS.keys())
+@pytest.mark.parametrize("key", KEYS)
+@pytest.mark.parametrize("expires_in", [60, 900])
+def test_local_presign_matches_botocore(options: Dict[str, Any], key: str, expires_in: int) -> None:
+    session = boto3.session.Session(
+        aws_access_key_id="AKIDEXAMPLE",
+        aws_secret_access_key="wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY",
+        aws_session_token=options.get("token"),
+        region_name=options["region"],
+    )
+    client = session.client("s3", endpoint_url=options["endpoint"], config=Config(signature_version="s3v4"))
+
+    def expected(key: str, expires_in: int) -> str:
+        return client.generate_presigned_url("get_object", Params={"Bucket": "lms-scorm", "Key": key}, ExpiresIn=expires_in)
+
+    signer = SigV4Presigner(expected(PROBE_KEY, 60), session.get_credentials().get_frozen_credentials)
+    assert signer.presign_get(key, expires_in, now=FROZEN) == expected(key, expires_in)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import io
+import os
+from typing import Any, Iterator, List
+
+import pytest
+
+from app.config import get_settings
+from app.storage import BatchUploadError, S3Storage, UploadItem
+
+moto = pytest.importorskip("moto")
+from botocore.exceptions import ClientError  # noqa: E402
+
+MiB = 1024 * 1024
+
+
+def _error(code: str, status: int) -> ClientError:
+    return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "PutObject")
+
+
+def _items(payloads: dict[str, bytes]) -> List[UploadItem]:
+    return [
+        UploadItem(key=key, open=lambda body=body: io.BytesIO(body), size=len(body))
+        for key, body in payloads.items()
+    ]
+
+
+@pytest.fixture
+def storage(monkeypatch: pytest.MonkeyPatch) -> Iterator[S3Storage]:
+    for name, value in {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+    }.items():
+        monkeypatch.setenv(name, value)
+    settings = get_settings()
+    monkeypatch.setattr(settings, "s3_endpoint_url", None)
+    monkeypatch.setattr(settings, "s3_upload_max_attempts", 3)
+    monkeypatch.setattr(settings, "s3_upload_backoff_seconds", 0.05)
+    monkeypatch.setattr(settings, "s3_multipart_threshold_bytes", 6 * MiB)
+    # S3 (and moto) reject parts below 5 MiB other than the last.
+    monkeypatch.setattr(settings, "s3_multipart_chunk_bytes", 5 * MiB)
+    with moto.mock_aws():
+        yield S3Storage()
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    """Record backoff delays instead of sleeping them."""
+
+    recorded: List[float] = []
+    monkeypatch.setattr("app.storage.time.sleep", recorded.append)
+    return recorded
+
+
+def _fail(storage: S3Storage, monkeypatch: pytest.MonkeyPatch, failures: dict[str, List[Exception]]) -> dict[str, int]:
+    """Make ``_upload_item`` raise the queued errors for a key before succeeding."""
+
+    attempts: dict[str, int] = {}
+    upload_item = storage._upload_item
+
+    def wrapped(item: UploadItem) -> None:
+        attempts[item.key] = attempts.get(item.key, 0) + 1
+        queued = failures.get(item.key)
+        if queued:
+            raise queued.pop(0)
+        upload_item(item)
+
+    monkeypatch.setattr(storage, "_upload_item", wrapped)
+    return attempts
+
+
+def _body(storage: S3Storage, key: str) -> bytes:
+    client: Any = storage._client
+    return client.get_object(Bucket=storage._bucket, Key=key)["Body"].read()
+
+
+def test_uploads_every_item(storage: S3Storage) -> None:
+    payloads = {f"pkg/assets/{index:03d}.js": os.urandom(2048) for index in range(40)}
+    report = storage.upload_many(_items(payloads), max_workers=8)
+
+    assert (report.objects, report.bytes, report.retries, report.failed_keys) == (40, 40 * 2048, 0, [])
+    assert all(_body(storage, key) == body for key, body in payloads.items())
+
+
+def test_transient_failures_are_retried_with_backoff(
+    storage: S3Storage, monkeypatch: pytest.MonkeyPatch, sleeps: List[float]
+) -> None:
+    payloads = {"pkg/a.html": b"a", "pkg/b.css": b"b", "pkg/c.js": b"c"}
+    attempts = _fail(
+        storage,
+        monkeypatch,
+        {"pkg/a.html": [_error("SlowDown", 503), _error("InternalError", 500)], "pkg/b.css": [ConnectionError()]},
+    )
+    report = storage.upload_many(_items(payloads), max_workers=1)
+
+    assert attempts == {"pkg/a.html": 3, "pkg/b.css": 2, "pkg/c.js": 1}
+    assert (report.objects, report.retries) == (3, 3)
+    assert all(_body(storage, key) == body for key, body in payloads.items())
+    # Full jitter: the n-th retry waits between 0 and backoff * 2 ** (n - 1).
+    assert len(sleeps) == 3
+    assert 0 <= sleeps[0] <= 0.05 and 0 <= sleeps[1] <= 0.1 and 0 <= sleeps[2] <= 0.05
+
+
+def test_partial_failure_raises_with_report(
+    storage: S3Storage, monkeypatch: pytest.MonkeyPatch, sleeps: List[float]
+) -> None:
+    payloads = {"pkg/ok.html": b"ok", "pkg/throttled.js": b"t", "pkg/denied.css": b"d"}
+    attempts = _fail(
+        storage,
+        monkeypatch,
+        {"pkg/throttled.js": [_error("SlowDown", 503)] * 5, "pkg/denied.css": [_error("AccessDenied", 403)]},
+    )
+    with pytest.raises(BatchUploadError) as raised:
+        storage.upload_many(_items(payloads), max_workers=2)
+
+    report = raised.value.report
+    assert sorted(report.failed_keys) == ["pkg/denied.css", "pkg/throttled.js"]
+    assert report.objects == 1
+    # Retryable errors use every attempt; anything else fails on the first.
+    assert attempts == {"pkg/ok.html": 1, "pkg/throttled.js": 3, "pkg/denied.css": 1}
+    assert report.retries == 2 == len(sleeps)
+    assert _body(storage, "pkg/ok.html") == b"ok"
+
+
+def test_multipart_threshold(storage: S3Storage) -> None:
+    small, large = os.urandom(6 * MiB - 1), os.urandom(11 * MiB)
+    report = storage.upload_many(_items({"pkg/small.bin": small, "pkg/media/large.mp4": large}))
+
+    assert report.objects == 2 and report.multipart_objects == 1
+    client: Any = storage._client
+    small_head = client.head_object(Bucket=storage._bucket, Key="pkg/small.bin")
+    large_head = client.head_object(Bucket=storage._bucket, Key="pkg/media/large.mp4")
+    # Multipart ETags end in "-<parts>": 11 MiB in 5 MiB parts is three parts.
+    assert "-" not in small_head["ETag"]
+    assert large_head["ETag"].strip('"').endswith("-3")
+    assert _body(storage, "pkg/small.bin") == small and _body(storage, "pkg/media/large.mp4") == large
+
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.config import get_settings
+from app.uploads import InvalidUploadError, PackageTooLargeError, stage_upload
+
+BOUNDARY = "lms-test-boundary"
+ARCHIVE = bytes(range(256)) * 64
+NOTE_ONLY = f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="note"\r\n\r\nhi\r\n--{BOUNDARY}--\r\n'.encode()
+
+
+def _body(filename: str = "lesson.zip", payload: bytes = ARCHIVE) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="note"\r\n\r\n'
+        f"ignored\r\n--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/zip\r\n\r\n"
+    ).encode() + payload + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def _request(body: bytes, *, content_length: bool = True, piece: int = 1000) -> tuple[Request, list[int]]:
+    """A request whose body arrives in ``piece``-byte messages, recording how many were read."""
+
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    pieces = [body[start : start + piece] for start in range(0, len(body), piece)]
+    received: list[int] = []
+
+    async def receive() -> dict:
+        received.append(len(pieces[len(received)]))
+        return {"type": "http.request", "body": pieces[len(received) - 1], "more_body": len(received) < len(pieces)}
+
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": headers, "query_string": b""}
+    return Request(scope, receive), received
+
+
+def test_streams_the_file_part_to_staging(tmp_path: Path) -> None:
+    request, received = _request(_body())
+    staged = asyncio.run(stage_upload(request, tmp_path, "job", max_bytes=len(ARCHIVE), chunk_size=4096))
+    assert staged.path == tmp_path / "job.zip" and staged.path.read_bytes() == ARCHIVE
+    assert (staged.size, staged.sha256) == (len(ARCHIVE), hashlib.sha256(ARCHIVE).hexdigest())
+    assert sum(received) == len(_body())
+    assert not (tmp_path / "job.zip.part").exists()
+
+
+def test_declared_length_over_the_limit_is_rejected_before_reading(tmp_path: Path) -> None:
+    request, received = _request(_body(payload=ARCHIVE * 8))
+    with pytest.raises(PackageTooLargeError):
+        asyncio.run(stage_upload(request, tmp_path, "job", max_bytes=len(ARCHIVE)))
+    assert received == []
+
+
+def test_limit_applies_while_the_body_streams(tmp_path: Path) -> None:
+    body = _body(payload=ARCHIVE * 8)
+    request, received = _request(body, content_length=False)
+    with pytest.raises(PackageTooLargeError):
+        asyncio.run(stage_upload(request, tmp_path, "job", max_bytes=len(ARCHIVE), chunk_size=1000))
+    # Stopped soon after the limit, not at the end of the body.
+    assert sum(received) < 2 * len(ARCHIVE) < len(body)
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("body", [_body(filename="lesson.tar"), NOTE_ONLY, b"garbage"])
+def test_requests_without_a_zip_part_are_rejected(tmp_path: Path, body: bytes) -> None:
+    request, _ = _request(body)
+    with pytest.raises(InvalidUploadError):
+        asyncio.run(stage_upload(request, tmp_path, "job"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_upload_route_maps_errors(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    url = "/courses/upload-course/scorm/upload"
+    assert client.post(url, files={"file": ("lesson.txt", b"not a zip")}).status_code == 400
+    assert client.post(url, data={"note": "no file"}).status_code == 400
+
+    monkeypatch.setattr(get_settings(), "scorm_max_upload_bytes", 1024)
+    response = client.post(url, files={"file": ("lesson.zip", ARCHIVE)})
+    assert response.status_code == 413 and "1024 byte upload limit" in response.json()["detail"]
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.workers import PeriodicWorker, SharedWorker
+
+
+class _Counter(PeriodicWorker):
+    def __init__(self, run_first: bool = False, fail_first: bool = False) -> None:
+        super().__init__(60.0, name="test-counter", run_first=run_first)
+        self.calls = 0
+        self.ran = threading.Event()
+        self._fail_first = fail_first
+
+    def run_once(self) -> int:
+        self.calls += 1
+        self.ran.set()
+        if self._fail_first and self.calls == 1:
+            raise RuntimeError("first run fails")
+        with self._lock:
+            self._record_run(calls=self.calls)
+        return self.calls
+
+    def _stats(self) -> dict:
+        return {"calls": self.calls}
+
+
+def test_wake_runs_early_and_failures_do_not_stop_the_thread(caplog: pytest.LogCaptureFixture) -> None:
+    worker = _Counter(fail_first=True)
+    worker.start()
+    worker.start()
+    assert not worker.ran.wait(0.05)
+
+    for _ in range(2):
+        worker.ran.clear()
+        worker.wake()
+        assert worker.ran.wait(5)
+    worker.stop()
+    assert "test-counter run failed" in caplog.text
+    stats = worker.stats()
+    assert (stats["calls"], stats["runs"], stats["last_run"]["calls"]) == (2, 1, 2)
+    assert "finished_at" in stats["last_run"]
+
+
+def test_run_first_and_no_restart_after_stop() -> None:
+    worker = _Counter(run_first=True)
+    worker.start()
+    assert worker.ran.wait(5)
+    worker.stop()
+    assert worker._thread is None
+
+    worker.start()
+    assert worker._thread is None and worker.calls == 1
+
+
+def test_shared_worker_is_rebuilt_after_stop() -> None:
+    shared = SharedWorker(_Counter)
+    first = shared.get()
+    assert shared.get() is first
+    first.start()
+
+    shared.stop()
+    assert first._stopped.is_set() and first._thread is None
+    assert shared.get() is not first
+    shared.stop()
+    shared.stop()